@@ -0,0 +1,193 @@
+"""Initial schema
+
+Creates the tables as they existed before migrations were introduced.
+Databases previously created with Base.metadata.create_all() already have
+them, so each table is only created if it is missing.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _user_fk() -> sa.ForeignKey:
+    return sa.ForeignKey("users.id", ondelete="CASCADE")
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("hashed_password", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if "tasks" not in existing:
+        op.create_table(
+            "tasks",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), _user_fk(), nullable=False),
+            sa.Column("title", sa.String(), nullable=False),
+            sa.Column("description", sa.Text()),
+            sa.Column("status", sa.Enum("TODO", "IN_PROGRESS", "DONE", name="taskstatus"), nullable=False),
+            sa.Column("tag", sa.Enum("WORK", "PERSONAL", "HEALTH", "OTHER", name="tasktag")),
+            sa.Column("due_datetime", sa.DateTime(timezone=True)),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_tasks_id", "tasks", ["id"])
+        op.create_index("ix_tasks_user_id", "tasks", ["user_id"])
+
+    if "events" not in existing:
+        op.create_table(
+            "events",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), _user_fk(), nullable=False),
+            sa.Column("title", sa.String(), nullable=False),
+            sa.Column("description", sa.Text()),
+            sa.Column("start_datetime", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("end_datetime", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("location", sa.String()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_events_id", "events", ["id"])
+        op.create_index("ix_events_user_id", "events", ["user_id"])
+        op.create_index("ix_events_start_datetime", "events", ["start_datetime"])
+
+    if "meals" not in existing:
+        op.create_table(
+            "meals",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), _user_fk(), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("meal_type", sa.Enum("BREAKFAST", "LUNCH", "DINNER", "SNACK", name="mealtype"), nullable=False),
+            sa.Column("datetime", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("calories", sa.Float()),
+            sa.Column("carbs", sa.Float()),
+            sa.Column("protein", sa.Float()),
+            sa.Column("fat", sa.Float()),
+            sa.Column("raw_nutrition_data", sa.JSON()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        )
+        op.create_index("ix_meals_id", "meals", ["id"])
+        op.create_index("ix_meals_user_id", "meals", ["user_id"])
+        op.create_index("ix_meals_datetime", "meals", ["datetime"])
+
+    if "activities" not in existing:
+        op.create_table(
+            "activities",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), _user_fk(), nullable=False),
+            sa.Column(
+                "type",
+                sa.Enum("RUN", "WALK", "CYCLE", "GYM", "SWIM", "YOGA", "OTHER", name="activitytype"),
+                nullable=False
+            ),
+            sa.Column("duration_minutes", sa.Float(), nullable=False),
+            sa.Column("distance_km", sa.Float()),
+            sa.Column("calories_burned", sa.Float()),
+            sa.Column("datetime", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("notes", sa.String()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        )
+        op.create_index("ix_activities_id", "activities", ["id"])
+        op.create_index("ix_activities_user_id", "activities", ["user_id"])
+        op.create_index("ix_activities_datetime", "activities", ["datetime"])
+
+    if "step_summaries" not in existing:
+        op.create_table(
+            "step_summaries",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), _user_fk(), nullable=False),
+            sa.Column("date", sa.Date(), nullable=False),
+            sa.Column("step_count", sa.Integer(), nullable=False),
+            sa.Column("source", sa.String()),
+            sqlite_autoincrement=True,
+        )
+        op.create_index("ix_step_summaries_id", "step_summaries", ["id"])
+        op.create_index("ix_step_summaries_user_id", "step_summaries", ["user_id"])
+        op.create_index("ix_step_summaries_date", "step_summaries", ["date"])
+
+    if "vitals" not in existing:
+        op.create_table(
+            "vitals",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), _user_fk(), nullable=False),
+            sa.Column("type", sa.String(), nullable=False),
+            sa.Column("value", sa.Float(), nullable=False),
+            sa.Column("unit", sa.String(), nullable=False),
+            sa.Column("recorded_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        )
+        op.create_index("ix_vitals_id", "vitals", ["id"])
+        op.create_index("ix_vitals_user_id", "vitals", ["user_id"])
+        op.create_index("ix_vitals_type", "vitals", ["type"])
+        op.create_index("ix_vitals_recorded_at", "vitals", ["recorded_at"])
+
+    if "insights" not in existing:
+        op.create_table(
+            "insights",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), _user_fk(), nullable=False),
+            sa.Column(
+                "category",
+                sa.Enum("MOVEMENT", "DIET", "SLEEP", "OUTDOOR", "GENERAL", name="insightcategory"),
+                nullable=False
+            ),
+            sa.Column("message", sa.Text(), nullable=False),
+            sa.Column("is_dismissed", sa.Boolean(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        )
+        op.create_index("ix_insights_id", "insights", ["id"])
+        op.create_index("ix_insights_user_id", "insights", ["user_id"])
+        op.create_index("ix_insights_created_at", "insights", ["created_at"])
+
+    if "goals" not in existing:
+        op.create_table(
+            "goals",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), _user_fk(), nullable=False),
+            sa.Column("daily_step_goal", sa.Integer()),
+            sa.Column("daily_calorie_goal", sa.Float()),
+            sa.Column("daily_protein_goal", sa.Float()),
+            sa.Column("daily_carbs_goal", sa.Float()),
+            sa.Column("daily_fat_goal", sa.Float()),
+            sa.Column("sleep_hours_goal", sa.Float()),
+            sa.Column("apple_health_connected", sa.Boolean()),
+            sa.Column("nutrition_api_connected", sa.Boolean()),
+        )
+        op.create_index("ix_goals_id", "goals", ["id"])
+        op.create_index("ix_goals_user_id", "goals", ["user_id"], unique=True)
+
+
+def downgrade() -> None:
+    for table in (
+        "goals", "insights", "vitals", "step_summaries", "activities",
+        "meals", "events", "tasks", "users",
+    ):
+        op.drop_table(table)
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        for enum_name in ("taskstatus", "tasktag", "mealtype", "activitytype", "insightcategory"):
+            sa.Enum(name=enum_name).drop(bind, checkfirst=True)
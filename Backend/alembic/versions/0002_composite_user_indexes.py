@@ -0,0 +1,125 @@
+"""Composite per-user indexes and unique step summaries
+
+Every list, summary and insight query filters on user_id plus a time
+column, so single-column indexes are replaced with composite ones that
+match those predicates. step_summaries gets the one-row-per-user-per-day
+constraint its model always described; existing duplicates are removed
+first, keeping the most recently inserted row.
+
+Safe on populated databases: on PostgreSQL indexes are built
+CONCURRENTLY outside the migration transaction, and every step checks
+what already exists so databases created with create_all() can be
+upgraded as well.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:01
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COMPOSITE_INDEXES = [
+    ("ix_tasks_user_id_due_datetime", "tasks", ["user_id", "due_datetime"]),
+    ("ix_events_user_id_start_datetime", "events", ["user_id", "start_datetime"]),
+    ("ix_meals_user_id_datetime", "meals", ["user_id", "datetime"]),
+    ("ix_activities_user_id_datetime", "activities", ["user_id", "datetime"]),
+    ("ix_vitals_user_id_type_recorded_at", "vitals", ["user_id", "type", "recorded_at"]),
+    ("ix_insights_user_id_is_dismissed_created_at", "insights", ["user_id", "is_dismissed", "created_at"]),
+]
+
+# Covered by the composite indexes above (user_id is their leading column)
+# or never used without a user_id filter
+REDUNDANT_INDEXES = [
+    ("ix_tasks_user_id", "tasks", ["user_id"]),
+    ("ix_events_user_id", "events", ["user_id"]),
+    ("ix_events_start_datetime", "events", ["start_datetime"]),
+    ("ix_meals_user_id", "meals", ["user_id"]),
+    ("ix_meals_datetime", "meals", ["datetime"]),
+    ("ix_activities_user_id", "activities", ["user_id"]),
+    ("ix_activities_datetime", "activities", ["datetime"]),
+    ("ix_vitals_user_id", "vitals", ["user_id"]),
+    ("ix_vitals_type", "vitals", ["type"]),
+    ("ix_vitals_recorded_at", "vitals", ["recorded_at"]),
+    ("ix_insights_user_id", "insights", ["user_id"]),
+    ("ix_insights_created_at", "insights", ["created_at"]),
+    ("ix_step_summaries_user_id", "step_summaries", ["user_id"]),
+    ("ix_step_summaries_date", "step_summaries", ["date"]),
+]
+
+STEP_UNIQUE = "uq_step_summaries_user_id_date"
+
+
+def _is_postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def _has_step_unique() -> bool:
+    inspector = sa.inspect(op.get_bind())
+    names = {c["name"] for c in inspector.get_unique_constraints("step_summaries")}
+    names.update(i["name"] for i in inspector.get_indexes("step_summaries") if i.get("unique"))
+    return STEP_UNIQUE in names
+
+
+def upgrade() -> None:
+    postgresql = _is_postgresql()
+
+    # Keep only the latest row per (user_id, date) before enforcing uniqueness
+    op.execute(
+        "DELETE FROM step_summaries WHERE id NOT IN ("
+        "SELECT MAX(id) FROM step_summaries GROUP BY user_id, date)"
+    )
+
+    if postgresql:
+        with op.get_context().autocommit_block():
+            for name, table, columns in COMPOSITE_INDEXES:
+                op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+            if not _has_step_unique():
+                op.create_index(
+                    STEP_UNIQUE, "step_summaries", ["user_id", "date"],
+                    unique=True, postgresql_concurrently=True
+                )
+                op.execute(
+                    f"ALTER TABLE step_summaries ADD CONSTRAINT {STEP_UNIQUE} "
+                    f"UNIQUE USING INDEX {STEP_UNIQUE}"
+                )
+            for name, table, _ in REDUNDANT_INDEXES:
+                op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+        return
+
+    for name, table, columns in COMPOSITE_INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+    if not _has_step_unique():
+        # SQLite cannot add a constraint in place; batch mode copies the table
+        with op.batch_alter_table(
+            "step_summaries", recreate="always", table_kwargs={"sqlite_autoincrement": True}
+        ) as batch_op:
+            batch_op.create_unique_constraint(STEP_UNIQUE, ["user_id", "date"])
+    for name, table, _ in REDUNDANT_INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
+
+
+def downgrade() -> None:
+    postgresql = _is_postgresql()
+
+    for name, table, columns in REDUNDANT_INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+    if postgresql:
+        op.drop_constraint(STEP_UNIQUE, "step_summaries", type_="unique")
+    else:
+        with op.batch_alter_table(
+            "step_summaries", recreate="always", table_kwargs={"sqlite_autoincrement": True}
+        ) as batch_op:
+            batch_op.drop_constraint(STEP_UNIQUE, type_="unique")
+    for name, table, _ in COMPOSITE_INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,61 @@
+"""Client sample IDs on vitals and activities
+
+Bulk HealthKit sync sends each sample with its client-side identifier;
+a unique (user_id, client_sample_id) index lets retried batches skip
+rows that were already stored. Rows without an identifier (manual
+entries, older clients) are unaffected since NULLs never conflict.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:02
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = [
+    ("vitals", "uq_vitals_user_id_client_sample_id"),
+    ("activities", "uq_activities_user_id_client_sample_id"),
+]
+
+
+def _has_column(table: str, column: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return column in {c["name"] for c in inspector.get_columns(table)}
+
+
+def upgrade() -> None:
+    postgresql = op.get_bind().dialect.name == "postgresql"
+
+    for table, _ in TABLES:
+        if not _has_column(table, "client_sample_id"):
+            op.add_column(table, sa.Column("client_sample_id", sa.String(), nullable=True))
+
+    if postgresql:
+        with op.get_context().autocommit_block():
+            for table, index in TABLES:
+                op.create_index(
+                    index, table, ["user_id", "client_sample_id"],
+                    unique=True, if_not_exists=True, postgresql_concurrently=True
+                )
+        return
+
+    for table, index in TABLES:
+        op.create_index(index, table, ["user_id", "client_sample_id"], unique=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for table, index in TABLES:
+        op.drop_index(index, table_name=table, if_exists=True)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("client_sample_id")
@@ -0,0 +1,108 @@
+"""Minute, hour and day vitals rollups
+
+Charts read pre-aggregated buckets (count, min, max, sum, last) instead
+of every raw sample. The API keeps the rollups up to date as vitals are
+written; existing vitals are folded in here, one user and type at a time.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:03
+
+"""
+from datetime import timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BUCKETS = ["minute", "hour", "day"]
+
+
+def _bucket_start(recorded_at, bucket):
+    if recorded_at.tzinfo is not None:
+        recorded_at = recorded_at.astimezone(timezone.utc).replace(tzinfo=None)
+    start = recorded_at.replace(second=0, microsecond=0)
+    if bucket in ("hour", "day"):
+        start = start.replace(minute=0)
+    if bucket == "day":
+        start = start.replace(hour=0)
+    return start, recorded_at
+
+
+def _backfill(tables):
+    bind = op.get_bind()
+    vitals = sa.table(
+        "vitals",
+        sa.column("user_id", sa.Integer()),
+        sa.column("type", sa.String()),
+        sa.column("value", sa.Float()),
+        sa.column("recorded_at", sa.DateTime()),
+    )
+    series = bind.execute(sa.select(vitals.c.user_id, vitals.c.type).distinct()).all()
+    for user_id, vital_type in series:
+        rows = {bucket: {} for bucket in BUCKETS}
+        samples = bind.execute(
+            sa.select(vitals.c.value, vitals.c.recorded_at)
+            .where(vitals.c.user_id == user_id, vitals.c.type == vital_type)
+            .order_by(vitals.c.recorded_at)
+        )
+        for value, recorded_at in samples:
+            for bucket in BUCKETS:
+                start, recorded_at = _bucket_start(recorded_at, bucket)
+                row = rows[bucket].get(start)
+                if row is None:
+                    rows[bucket][start] = {
+                        "user_id": user_id, "type": vital_type, "bucket_start": start,
+                        "count": 1, "min": value, "max": value, "sum": value,
+                        "last_value": value, "last_recorded_at": recorded_at,
+                    }
+                    continue
+                row["count"] += 1
+                row["min"] = min(row["min"], value)
+                row["max"] = max(row["max"], value)
+                row["sum"] += value
+                row["last_value"] = value
+                row["last_recorded_at"] = recorded_at
+        for bucket in BUCKETS:
+            if rows[bucket]:
+                op.bulk_insert(tables[bucket], list(rows[bucket].values()))
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    if existing.issuperset(f"vital_rollups_{bucket}" for bucket in BUCKETS):
+        # Created by create_all() and maintained by the API already
+        return
+
+    tables = {}
+    for bucket in BUCKETS:
+        name = f"vital_rollups_{bucket}"
+        columns = [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("type", sa.String(), nullable=False),
+            sa.Column("bucket_start", sa.DateTime(), nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.Column("min", sa.Float(), nullable=False),
+            sa.Column("max", sa.Float(), nullable=False),
+            sa.Column("sum", sa.Float(), nullable=False),
+            sa.Column("last_value", sa.Float(), nullable=False),
+            sa.Column("last_recorded_at", sa.DateTime(), nullable=False),
+            sa.UniqueConstraint("user_id", "type", "bucket_start", name=f"uq_{name}_user_id_type_bucket_start"),
+        ]
+        tables[bucket] = op.create_table(name, *columns)
+
+    _backfill(tables)
+
+
+def downgrade() -> None:
+    for bucket in BUCKETS:
+        op.drop_table(f"vital_rollups_{bucket}")
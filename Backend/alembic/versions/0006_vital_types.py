@@ -0,0 +1,344 @@
+"""Dictionary-encoded vital types and canonical units
+
+vitals, vital_chunks and the rollup tables reference a small integer
+vital_types.id instead of repeating the type (and unit) string on every
+row. Existing values are converted to the canonical unit of their type
+where a conversion is known; types not in the seed list are registered
+with their most common unit. Rollups are rebuilt from the converted
+samples since they could mix units before.
+
+The seed types, unit table, chunk codec and rollup fold are frozen copies
+of the app's at this revision, so later changes to the app cannot change
+what this migration writes.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:05
+
+"""
+import struct
+import sys
+import zlib
+from array import array
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from itertools import accumulate
+from operator import xor
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEED_VITAL_TYPES = [
+    (1, "heart_rate", "bpm"),
+    (2, "resting_heart_rate", "bpm"),
+    (3, "heart_rate_variability", "ms"),
+    (4, "blood_glucose", "mg/dL"),
+    (5, "sleep_duration", "hours"),
+    (6, "weight", "kg"),
+    (7, "body_temperature", "°C"),
+    (8, "blood_oxygen", "%"),
+    (9, "respiratory_rate", "breaths/min"),
+    (10, "blood_pressure_systolic", "mmHg"),
+    (11, "blood_pressure_diastolic", "mmHg"),
+]
+
+UNIT_ALIASES = {
+    "bpm": "bpm",
+    "beats/min": "bpm",
+    "count/min": "bpm",
+    "beats per minute": "bpm",
+    "ms": "ms",
+    "mg/dl": "mg/dL",
+    "mmol/l": "mmol/L",
+    "hours": "hours",
+    "hour": "hours",
+    "hr": "hours",
+    "h": "hours",
+    "minutes": "minutes",
+    "minute": "minutes",
+    "min": "minutes",
+    "seconds": "seconds",
+    "second": "seconds",
+    "sec": "seconds",
+    "s": "seconds",
+    "kg": "kg",
+    "lb": "lb",
+    "lbs": "lb",
+    "°c": "°C",
+    "degc": "°C",
+    "c": "°C",
+    "°f": "°F",
+    "degf": "°F",
+    "f": "°F",
+    "%": "%",
+    "percent": "%",
+    "breaths/min": "breaths/min",
+    "mmhg": "mmHg",
+}
+
+# (from, to) -> (scale, offset): converted = value * scale + offset
+UNIT_CONVERSIONS = {
+    ("mmol/L", "mg/dL"): (18.0156, 0.0),
+    ("mg/dL", "mmol/L"): (1 / 18.0156, 0.0),
+    ("minutes", "hours"): (1 / 60, 0.0),
+    ("seconds", "hours"): (1 / 3600, 0.0),
+    ("hours", "minutes"): (60.0, 0.0),
+    ("seconds", "minutes"): (1 / 60, 0.0),
+    ("lb", "kg"): (0.45359237, 0.0),
+    ("kg", "lb"): (1 / 0.45359237, 0.0),
+    ("°F", "°C"): (5 / 9, -32 * 5 / 9),
+    ("°C", "°F"): (9 / 5, 32.0),
+}
+
+# Vital chunk blob format 1: header, then zlib-compressed timestamp deltas and value XORs
+CHUNK_HEADER = struct.Struct("<BI")  # format version, sample count
+EPOCH = datetime(1970, 1, 1)
+
+BUCKETS = ["minute", "hour", "day"]
+
+
+def canonical_unit(unit):
+    unit = unit.strip()
+    return UNIT_ALIASES.get(unit.lower(), unit)
+
+
+def _conversion(unit, canonical):
+    unit = canonical_unit(unit)
+    if unit == canonical:
+        return 1.0, 0.0
+    # Unknown unit: keep the value as recorded
+    return UNIT_CONVERSIONS.get((unit, canonical), (1.0, 0.0))
+
+
+def encode_samples(samples):
+    timestamps = array("q", (ts for ts, _ in samples))
+    value_bits = array("Q", array("d", (value for _, value in samples)).tobytes())
+    deltas = array("q", (b - a for a, b in zip([0] + timestamps[:-1].tolist(), timestamps)))
+    xors = array("Q", (b ^ a for a, b in zip([0] + value_bits[:-1].tolist(), value_bits)))
+    if sys.byteorder == "big":
+        deltas.byteswap()
+        xors.byteswap()
+    return CHUNK_HEADER.pack(1, len(samples)) + zlib.compress(deltas.tobytes() + xors.tobytes())
+
+
+def decode_samples(data):
+    version, count = CHUNK_HEADER.unpack_from(data)
+    if version != 1:
+        raise ValueError(f"Unsupported vital chunk format {version}")
+    payload = zlib.decompress(data[CHUNK_HEADER.size:])
+    deltas = array("q", payload[:8 * count])
+    xors = array("Q", payload[8 * count:])
+    if sys.byteorder == "big":
+        deltas.byteswap()
+        xors.byteswap()
+    values = array("d", array("Q", accumulate(xors, xor)).tobytes())
+    return list(zip(accumulate(deltas), values))
+
+
+def aggregate_samples(samples, bucket):
+    # One rollup row per bucket of (value, recorded_at) samples sorted by time
+    rows = {}
+    for value, recorded_at in samples:
+        start = recorded_at.replace(second=0, microsecond=0)
+        if bucket in ("hour", "day"):
+            start = start.replace(minute=0)
+        if bucket == "day":
+            start = start.replace(hour=0)
+        row = rows.get(start)
+        if row is None:
+            rows[start] = {
+                "bucket_start": start, "count": 1, "min": value, "max": value, "sum": value,
+                "last_value": value, "last_recorded_at": recorded_at,
+            }
+            continue
+        row["count"] += 1
+        row["min"] = min(row["min"], value)
+        row["max"] = max(row["max"], value)
+        row["sum"] += value
+        row["last_value"] = value
+        row["last_recorded_at"] = recorded_at
+    return list(rows.values())
+
+
+def _register_types(bind):
+    vital_types = op.create_table(
+        "vital_types",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False, unique=True),
+        sa.Column("unit", sa.String(), nullable=False),
+    )
+    op.bulk_insert(vital_types, [{"id": i, "name": n, "unit": u} for i, n, u in SEED_VITAL_TYPES])
+    
+    units = defaultdict(Counter)
+    for table in ("vitals", "vital_chunks"):
+        for name, unit, count in bind.execute(sa.text(
+            f"SELECT type, unit, COUNT(*) FROM {table} GROUP BY type, unit"
+        )):
+            units[name][canonical_unit(unit)] += count
+    known = {name for _, name, _ in SEED_VITAL_TYPES}
+    new_types = [
+        {"name": name, "unit": counts.most_common(1)[0][0]}
+        for name, counts in sorted(units.items()) if name not in known
+    ]
+    if bind.dialect.name == "postgresql":
+        bind.exec_driver_sql(
+            "SELECT setval(pg_get_serial_sequence('vital_types', 'id'), (SELECT MAX(id) FROM vital_types))"
+        )
+    if new_types:
+        op.bulk_insert(vital_types, new_types)
+    return {name: (id_, unit) for id_, name, unit in bind.execute(sa.text("SELECT id, name, unit FROM vital_types"))}
+
+
+def _convert_vitals(bind, types):
+    op.add_column("vitals", sa.Column("type_id", sa.Integer(), nullable=True))
+    for name, unit in bind.execute(sa.text("SELECT DISTINCT type, unit FROM vitals")).all():
+        type_id, canonical = types[name]
+        scale, offset = _conversion(unit, canonical)
+        bind.execute(
+            sa.text(
+                "UPDATE vitals SET type_id = :type_id, value = value * :scale + :offset "
+                "WHERE type = :name AND unit = :unit"
+            ),
+            {"type_id": type_id, "scale": scale, "offset": offset, "name": name, "unit": unit}
+        )
+    
+    op.drop_index("ix_vitals_user_id_type_recorded_at", table_name="vitals", if_exists=True)
+    with op.batch_alter_table("vitals") as batch_op:
+        batch_op.alter_column("type_id", existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key("fk_vitals_type_id_vital_types", "vital_types", ["type_id"], ["id"])
+        batch_op.drop_column("type")
+        batch_op.drop_column("unit")
+    op.create_index("ix_vitals_user_id_type_id_recorded_at", "vitals", ["user_id", "type_id", "recorded_at"])
+
+
+def _convert_chunks(bind, types):
+    op.add_column("vital_chunks", sa.Column("type_id", sa.Integer(), nullable=True))
+    chunks = bind.execute(sa.text("SELECT id, type, unit, data FROM vital_chunks")).all()
+    for chunk_id, name, unit, data in chunks:
+        type_id, canonical = types[name]
+        scale, offset = _conversion(unit, canonical)
+        if (scale, offset) != (1.0, 0.0):
+            data = encode_samples([(ts, value * scale + offset) for ts, value in decode_samples(data)])
+        bind.execute(
+            sa.text("UPDATE vital_chunks SET type_id = :type_id, data = :data WHERE id = :id"),
+            {"type_id": type_id, "data": data, "id": chunk_id}
+        )
+    
+    with op.batch_alter_table("vital_chunks") as batch_op:
+        batch_op.drop_constraint("uq_vital_chunks_user_id_type_day", type_="unique")
+        batch_op.alter_column("type_id", existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key("fk_vital_chunks_type_id_vital_types", "vital_types", ["type_id"], ["id"])
+        batch_op.drop_column("type")
+        batch_op.drop_column("unit")
+        batch_op.create_unique_constraint("uq_vital_chunks_user_id_type_id_day", ["user_id", "type_id", "day"])
+
+
+def _rebuild_rollups(bind):
+    tables = {}
+    for bucket in BUCKETS:
+        name = f"vital_rollups_{bucket}"
+        op.drop_table(name)
+        tables[bucket] = op.create_table(
+            name,
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("type_id", sa.Integer(), sa.ForeignKey("vital_types.id"), nullable=False),
+            sa.Column("bucket_start", sa.DateTime(), nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.Column("min", sa.Float(), nullable=False),
+            sa.Column("max", sa.Float(), nullable=False),
+            sa.Column("sum", sa.Float(), nullable=False),
+            sa.Column("last_value", sa.Float(), nullable=False),
+            sa.Column("last_recorded_at", sa.DateTime(), nullable=False),
+            sa.UniqueConstraint("user_id", "type_id", "bucket_start", name=f"uq_{name}_user_id_type_id_bucket_start"),
+        )
+    
+    vitals = sa.table(
+        "vitals",
+        sa.column("user_id", sa.Integer()),
+        sa.column("type_id", sa.Integer()),
+        sa.column("value", sa.Float()),
+        sa.column("recorded_at", sa.DateTime()),
+    )
+    chunks = sa.table("vital_chunks", sa.column("user_id", sa.Integer()), sa.column("type_id", sa.Integer()),
+                      sa.column("data", sa.LargeBinary()))
+    series = set(bind.execute(sa.select(vitals.c.user_id, vitals.c.type_id).distinct()).all())
+    series.update(bind.execute(sa.select(chunks.c.user_id, chunks.c.type_id).distinct()).all())
+    for user_id, type_id in sorted(series):
+        samples = list(bind.execute(
+            sa.select(vitals.c.value, vitals.c.recorded_at)
+            .where(vitals.c.user_id == user_id, vitals.c.type_id == type_id)
+        ))
+        for (data,) in bind.execute(
+            sa.select(chunks.c.data).where(chunks.c.user_id == user_id, chunks.c.type_id == type_id)
+        ):
+            samples.extend((value, EPOCH + timedelta(microseconds=ts)) for ts, value in decode_samples(data))
+        samples.sort(key=lambda sample: sample[1])
+        for bucket in BUCKETS:
+            rows = [{**row, "user_id": user_id, "type_id": type_id} for row in aggregate_samples(samples, bucket)]
+            if rows:
+                op.bulk_insert(tables[bucket], rows)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table("vital_types"):
+        # Created by create_all() with the current models
+        return
+    
+    types = _register_types(bind)
+    _convert_vitals(bind, types)
+    _convert_chunks(bind, types)
+    _rebuild_rollups(bind)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    
+    for table in ("vitals", "vital_chunks"):
+        op.add_column(table, sa.Column("type", sa.String(), nullable=True))
+        op.add_column(table, sa.Column("unit", sa.String(), nullable=True))
+        bind.execute(sa.text(
+            f"UPDATE {table} SET "
+            f"type = (SELECT name FROM vital_types WHERE vital_types.id = {table}.type_id), "
+            f"unit = (SELECT unit FROM vital_types WHERE vital_types.id = {table}.type_id)"
+        ))
+    
+    op.drop_index("ix_vitals_user_id_type_id_recorded_at", table_name="vitals")
+    with op.batch_alter_table("vitals") as batch_op:
+        batch_op.alter_column("type", existing_type=sa.String(), nullable=False)
+        batch_op.alter_column("unit", existing_type=sa.String(), nullable=False)
+        batch_op.drop_constraint("fk_vitals_type_id_vital_types", type_="foreignkey")
+        batch_op.drop_column("type_id")
+    op.create_index("ix_vitals_user_id_type_recorded_at", "vitals", ["user_id", "type", "recorded_at"])
+    
+    with op.batch_alter_table("vital_chunks") as batch_op:
+        batch_op.drop_constraint("uq_vital_chunks_user_id_type_id_day", type_="unique")
+        batch_op.alter_column("type", existing_type=sa.String(), nullable=False)
+        batch_op.alter_column("unit", existing_type=sa.String(), nullable=False)
+        batch_op.drop_constraint("fk_vital_chunks_type_id_vital_types", type_="foreignkey")
+        batch_op.drop_column("type_id")
+        batch_op.create_unique_constraint("uq_vital_chunks_user_id_type_day", ["user_id", "type", "day"])
+    
+    for bucket in BUCKETS:
+        name = f"vital_rollups_{bucket}"
+        op.add_column(name, sa.Column("type", sa.String(), nullable=True))
+        bind.execute(sa.text(
+            f"UPDATE {name} SET type = (SELECT name FROM vital_types WHERE vital_types.id = {name}.type_id)"
+        ))
+        with op.batch_alter_table(name) as batch_op:
+            batch_op.drop_constraint(f"uq_{name}_user_id_type_id_bucket_start", type_="unique")
+            batch_op.alter_column("type", existing_type=sa.String(), nullable=False)
+            batch_op.drop_column("type_id")
+            batch_op.create_unique_constraint(f"uq_{name}_user_id_type_bucket_start", ["user_id", "type", "bucket_start"])
+    
+    op.drop_table("vital_types")
@@ -0,0 +1,69 @@
+"""Change log for delta sync
+
+One entry per user record (its latest change, or a tombstone once it is
+deleted) with an ever-increasing id that serves as the delta sync token.
+Existing records are backfilled so the first sync returns them all.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 00:00:07
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# change_log collection -> table
+BACKFILL = {
+    "tasks": "tasks",
+    "events": "events",
+    "meals": "meals",
+    "steps": "step_summaries",
+    "vitals": "vitals",
+    "vital_chunks": "vital_chunks",
+    "activities": "activities",
+    "goals": "goals",
+}
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("change_log"):
+        return
+
+    op.create_table(
+        "change_log",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("collection", sa.String(), nullable=False),
+        sa.Column("record_id", sa.Integer(), nullable=False),
+        sa.Column("deleted", sa.Boolean(), nullable=False),
+        sa.Column("changed_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sqlite_autoincrement=True,
+    )
+    op.create_index("ix_change_log_user_id_id", "change_log", ["user_id", "id"])
+    op.create_index(
+        "ix_change_log_user_id_collection_record_id",
+        "change_log",
+        ["user_id", "collection", "record_id"],
+        unique=True,
+    )
+
+    for collection, table in BACKFILL.items():
+        op.execute(
+            f"INSERT INTO change_log (user_id, collection, record_id, deleted) "
+            f"SELECT user_id, '{collection}', id, false FROM {table} ORDER BY id"
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_change_log_user_id_collection_record_id", table_name="change_log")
+    op.drop_index("ix_change_log_user_id_id", table_name="change_log")
+    op.drop_table("change_log")
@@ -0,0 +1,100 @@
+"""Daily stats
+
+Per-user totals of each day (meals, steps, activities, sleep and heart
+rate), maintained by every write so summaries and insights read a few
+rows instead of re-aggregating records. Existing data is backfilled.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 00:00:08
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SUM_COLUMNS = [
+    ("calories", sa.Float()),
+    ("carbs", sa.Float()),
+    ("protein", sa.Float()),
+    ("fat", sa.Float()),
+    ("meal_count", sa.Integer()),
+    ("activity_minutes", sa.Float()),
+    ("activity_count", sa.Integer()),
+    ("calories_burned", sa.Float()),
+    ("sleep_sum", sa.Float()),
+    ("sleep_count", sa.Integer()),
+    ("heart_rate_sum", sa.Float()),
+    ("heart_rate_count", sa.Integer()),
+]
+
+MEALS = "FROM meals WHERE meals.user_id = daily_stats.user_id AND date(meals.datetime) = daily_stats.day"
+ACTIVITIES = (
+    "FROM activities WHERE activities.user_id = daily_stats.user_id "
+    "AND date(activities.datetime) = daily_stats.day"
+)
+VITALS = (
+    "FROM vital_rollups_day JOIN vital_types ON vital_types.id = vital_rollups_day.type_id "
+    "WHERE vital_rollups_day.user_id = daily_stats.user_id "
+    "AND date(vital_rollups_day.bucket_start) = daily_stats.day AND vital_types.name = '{}'"
+)
+
+# daily_stats column -> subquery computing it from the records
+BACKFILL = {
+    "calories": f"SELECT SUM(calories) {MEALS}",
+    "carbs": f"SELECT SUM(carbs) {MEALS}",
+    "protein": f"SELECT SUM(protein) {MEALS}",
+    "fat": f"SELECT SUM(fat) {MEALS}",
+    "meal_count": f"SELECT COUNT(*) {MEALS}",
+    "activity_minutes": f"SELECT SUM(duration_minutes) {ACTIVITIES}",
+    "activity_count": f"SELECT COUNT(*) {ACTIVITIES}",
+    "calories_burned": f"SELECT SUM(calories_burned) {ACTIVITIES}",
+    "sleep_sum": f"SELECT SUM(vital_rollups_day.sum) {VITALS.format('sleep_duration')}",
+    "sleep_count": f"SELECT SUM(vital_rollups_day.count) {VITALS.format('sleep_duration')}",
+    "heart_rate_sum": f"SELECT SUM(vital_rollups_day.sum) {VITALS.format('heart_rate')}",
+    "heart_rate_count": f"SELECT SUM(vital_rollups_day.count) {VITALS.format('heart_rate')}",
+}
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("daily_stats"):
+        return
+
+    op.create_table(
+        "daily_stats",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        *[sa.Column(name, type_, nullable=False, server_default="0") for name, type_ in SUM_COLUMNS],
+        sa.Column("steps", sa.Integer()),
+        sa.UniqueConstraint("user_id", "day", name="uq_daily_stats_user_id_day"),
+    )
+
+    # One row per day with any records, then fill in the totals
+    op.execute(
+        "INSERT INTO daily_stats (user_id, day) "
+        "SELECT user_id, date(datetime) FROM meals "
+        "UNION SELECT user_id, date FROM step_summaries "
+        "UNION SELECT user_id, date(datetime) FROM activities "
+        "UNION SELECT vital_rollups_day.user_id, date(vital_rollups_day.bucket_start) FROM vital_rollups_day "
+        "JOIN vital_types ON vital_types.id = vital_rollups_day.type_id "
+        "WHERE vital_types.name IN ('sleep_duration', 'heart_rate')"
+    )
+    assignments = [f"{column} = COALESCE(({query}), 0)" for column, query in BACKFILL.items()]
+    assignments.append(
+        "steps = (SELECT step_count FROM step_summaries "
+        "WHERE step_summaries.user_id = daily_stats.user_id AND step_summaries.date = daily_stats.day)"
+    )
+    op.execute(f"UPDATE daily_stats SET {', '.join(assignments)}")
+
+
+def downgrade() -> None:
+    op.drop_table("daily_stats")
@@ -0,0 +1,38 @@
+"""Nutrition lookup cache
+
+Persistent cache of upstream nutrition lookups (including foods the
+upstream API did not find), keyed by normalized quantity and food name.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 00:00:09
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("nutrition_cache"):
+        return
+
+    op.create_table(
+        "nutrition_cache",
+        sa.Column("key", sa.String(), primary_key=True),
+        sa.Column("found", sa.Boolean(), nullable=False),
+        sa.Column("data", sa.JSON()),
+        sa.Column("fetched_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("nutrition_cache")
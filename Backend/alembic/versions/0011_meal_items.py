@@ -0,0 +1,46 @@
+"""Meal line items
+
+Foods of meals logged as a list of items, each with its own quantity and
+macros; the meal row keeps the totals.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 00:00:10
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("meal_items"):
+        return
+
+    op.create_table(
+        "meal_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("meal_id", sa.Integer(), sa.ForeignKey("meals.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("food_name", sa.String(), nullable=False),
+        sa.Column("quantity", sa.String()),
+        sa.Column("calories", sa.Float(), nullable=False),
+        sa.Column("carbs", sa.Float(), nullable=False),
+        sa.Column("protein", sa.Float(), nullable=False),
+        sa.Column("fat", sa.Float(), nullable=False),
+        sa.Column("raw_nutrition_data", sa.JSON()),
+    )
+    op.create_index("ix_meal_items_meal_id", "meal_items", ["meal_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_meal_items_meal_id", table_name="meal_items")
+    op.drop_table("meal_items")
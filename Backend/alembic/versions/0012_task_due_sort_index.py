@@ -0,0 +1,48 @@
+"""Task list index on the due date sort key
+
+The task list pages by due date with tasks without one last. It orders
+and seeks by coalesce(due_datetime, 'infinity') and id, which the plain
+(user_id, due_datetime) index cannot serve, so that index is replaced
+with one on the same expression.
+
+Safe on populated databases: on PostgreSQL the index is built
+CONCURRENTLY outside the migration transaction.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18 00:00:11
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0012"
+down_revision: Union[str, None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+OLD_INDEX = ("ix_tasks_user_id_due_datetime", ["user_id", "due_datetime"])
+NEW_INDEX = ("ix_tasks_user_id_due_datetime_id", ["user_id", sa.text("coalesce(due_datetime, 'infinity')"), "id"])
+
+
+def _replace_index(old, new) -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(new[0], "tasks", new[1], if_not_exists=True, postgresql_concurrently=True)
+            op.drop_index(old[0], table_name="tasks", if_exists=True, postgresql_concurrently=True)
+        return
+    op.create_index(new[0], "tasks", new[1], if_not_exists=True)
+    op.drop_index(old[0], table_name="tasks", if_exists=True)
+
+
+def upgrade() -> None:
+    _replace_index(OLD_INDEX, NEW_INDEX)
+
+
+def downgrade() -> None:
+    _replace_index(NEW_INDEX, OLD_INDEX)
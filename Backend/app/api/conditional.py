@@ -0,0 +1,70 @@
+from datetime import date, datetime
+from typing import Callable
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.negotiation import current_format
+from app.core.config import settings
+from app.core.security import get_current_user
+from app.db.session import get_async_db
+from app.models.user import User
+from app.services.collection_versions import get_version
+
+NO_CACHE = "private, no-cache"
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an ETag against an If-None-Match header value."""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag.removeprefix("W/") in (tag.removeprefix("W/") for tag in candidates)
+
+
+def _past_range(request: Request) -> bool:
+    # Summaries ending before today no longer change through the day
+    to_date = request.query_params.get("to")
+    if not to_date:
+        return False
+    try:
+        return datetime.fromisoformat(to_date).date() < date.today()
+    except ValueError:
+        return False
+
+
+def conditional_get(collection: str, summary: bool = False) -> Callable:
+    """
+    Dependency for list and summary endpoints of collection: sets an ETag
+    derived from the user's collection version and answers a matching
+    If-None-Match with 304 before the endpoint runs its query.
+    
+    The ETag names the negotiated representation (json, msgpack, cbor).
+    Summary ETags also carry today's date, since their default range moves
+    with it; summaries ending before today get a long-lived Cache-Control.
+    """
+    async def dependency(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: User = Depends(get_current_user)
+    ) -> None:
+        version = await get_version(db, current_user.id, collection)
+        tag = f"{collection}.{current_user.id}.{version}.{current_format().name}"
+        if summary:
+            tag += f".{date.today().isoformat()}"
+        headers = {
+            "ETag": f'"{tag}"',
+            "Cache-Control": (
+                f"private, max-age={settings.PAST_DAY_CACHE_MAX_AGE_SECONDS}"
+                if summary and _past_range(request) else NO_CACHE
+            ),
+            "Vary": "Accept"
+        }
+    
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, headers["ETag"]):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+    
+    return dependency
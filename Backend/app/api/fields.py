@@ -0,0 +1,117 @@
+import json
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type, get_args
+
+from fastapi import HTTPException, Query, Response
+from pydantic import BaseModel, TypeAdapter, ValidationError, create_model
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from app.api.negotiation import BodyFormat, current_format
+
+Fields = Optional[Tuple[str, ...]]
+
+
+def field_selection(response_model: Type[BaseModel]) -> Callable[..., Fields]:
+    """
+    Dependency parsing `?fields=a,b` against the fields of response_model.
+    Resolves to None (full response) when the parameter is absent.
+    """
+    def dependency(
+        fields: Optional[str] = Query(None, description="Comma-separated response fields to return")
+    ) -> Fields:
+        if fields is None:
+            return None
+        names = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+        unknown = [name for name in names if name not in response_model.model_fields]
+        if unknown or not names:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown) or fields!r}")
+        return names
+    
+    return dependency
+
+
+def select_fields(model, response_model: Type[BaseModel], fields: Fields, *required) -> Select:
+    """
+    Select the columns of model that response_model (or just the selected
+    fields) renders, plus the required ones (e.g. id and sort column for
+    pagination).
+    """
+    columns = model.__table__.columns
+    names = fields or tuple(response_model.model_fields)
+    keys = dict.fromkeys([*(name for name in names if name in columns), *(column.key for column in required)])
+    return select(*(columns[key] for key in keys))
+
+
+async def fetch_rows(db: AsyncSession, query: Select) -> List[Dict[str, Any]]:
+    """
+    Run a column select on the session's connection and return plain dicts,
+    skipping ORM loading and the identity map.
+    """
+    result = await (await db.connection()).execute(query)
+    keys = tuple(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+def _renders_floats(annotation) -> bool:
+    if annotation is float or annotation is Any:
+        return True
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return any(_renders_floats(field.annotation) for field in annotation.model_fields.values())
+    return any(_renders_floats(arg) for arg in get_args(annotation))
+
+
+@lru_cache(maxsize=256)
+def _list_adapter(response_model: Type[BaseModel], fields: Fields) -> Tuple[TypeAdapter, bool]:
+    if fields is not None and fields != tuple(response_model.model_fields):
+        response_model = create_model(
+            f"{response_model.__name__}Fields",
+            **{name: (response_model.model_fields[name].annotation, response_model.model_fields[name])
+               for name in fields}
+        )
+    return TypeAdapter(List[response_model]), _renders_floats(response_model)
+
+
+def render_list(
+    items: Sequence[Dict[str, Any]],
+    response_model: Type[BaseModel],
+    fields: Fields,
+    response: Response,
+    body_format: Optional[BodyFormat] = None
+) -> Response:
+    """
+    Render rows from fetch_rows() exactly as FastAPI would through
+    `response_model=List[response_model]`, narrowed to fields if given.
+    Headers already set on `response` (e.g. the pagination cursor) are kept.
+    A msgpack or CBOR response (body_format, by default the negotiated one)
+    is encoded straight from the validated rows.
+    
+    Rows straight from the database already have the right types, so they
+    are validated in strict mode first (no per-value coercion). pydantic's
+    JSON writer formats exponent floats differently from the json module
+    (1e16 vs 1e+16), so it is only used for models without float values.
+    """
+    adapter, renders_floats = _list_adapter(response_model, fields)
+    try:
+        value = adapter.validate_python(items, strict=True)
+    except ValidationError:
+        value = adapter.validate_python(items)
+    headers = {name: header for name, header in response.headers.items() if name not in ("content-length", "content-type")}
+    body_format = body_format or current_format()
+    if body_format.encode is not None:
+        body = body_format.encode(adapter.dump_python(value))
+        return Response(body, media_type=body_format.media_type, headers=headers)
+    
+    if renders_floats:
+        # Same settings as starlette's JSONResponse
+        body = json.dumps(
+            adapter.dump_python(value, mode="json"),
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":")
+        ).encode("utf-8")
+    else:
+        body = adapter.dump_json(value)
+    return Response(body, media_type="application/json", headers=headers)
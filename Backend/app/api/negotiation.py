@@ -0,0 +1,213 @@
+from contextvars import ContextVar
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+import cbor2
+import msgpack
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute, get_request_handler
+from pydantic import TypeAdapter
+
+
+class BodyFormat(NamedTuple):
+    name: str
+    media_type: str
+    encode: Optional[Callable[[Any], bytes]]  # None for JSON, which FastAPI renders itself
+    decode: Optional[Callable[[bytes], Any]]
+
+
+def _naive_utc(value: Any) -> Any:
+    # Binary timestamps decode as aware UTC datetimes; the API stores naive UTC
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    if isinstance(value, dict):
+        return {key: _naive_utc(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_naive_utc(item) for item in value]
+    return value
+
+
+def _msgpack_default(value: Any) -> Any:
+    # Naive datetimes are UTC; msgpack has no date type, so dates stay ISO strings
+    if isinstance(value, datetime):
+        return msgpack.Timestamp.from_datetime(value if value.tzinfo else value.replace(tzinfo=timezone.utc))
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Cannot encode {type(value).__name__} as msgpack")
+
+
+def _cbor_default(encoder, value: Any) -> None:
+    if not isinstance(value, Enum):
+        raise TypeError(f"Cannot encode {type(value).__name__} as CBOR")
+    encoder.encode(value.value)
+
+
+def _encode_msgpack(content: Any) -> bytes:
+    return msgpack.packb(content, default=_msgpack_default)
+
+
+def _decode_msgpack(body: bytes) -> Any:
+    return _naive_utc(msgpack.unpackb(body, timestamp=3))
+
+
+def _encode_cbor(content: Any) -> bytes:
+    # Datetimes as numeric epoch timestamps (tag 1), dates as tag 100
+    return cbor2.dumps(content, datetime_as_timestamp=True, timezone=timezone.utc, default=_cbor_default)
+
+
+def _decode_cbor(body: bytes) -> Any:
+    return _naive_utc(cbor2.loads(body))
+
+
+JSON = BodyFormat("json", "application/json", None, None)
+MSGPACK = BodyFormat("msgpack", "application/msgpack", _encode_msgpack, _decode_msgpack)
+CBOR = BodyFormat("cbor", "application/cbor", _encode_cbor, _decode_cbor)
+
+MEDIA_TYPES: Dict[str, BodyFormat] = {
+    "application/json": JSON,
+    "application/*": JSON,
+    "*/*": JSON,
+    "application/msgpack": MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+    "application/cbor": CBOR,
+}
+
+_current_format: ContextVar[BodyFormat] = ContextVar("response_format", default=JSON)
+
+
+def negotiate(accept: Optional[str]) -> BodyFormat:
+    """
+    Pick the response format for an Accept header: the supported media type
+    with the highest q-value (earliest on ties), JSON if none is supported.
+    """
+    best, best_q = JSON, 0.0
+    for entry in (accept or "").split(","):
+        media_type, *params = entry.split(";")
+        body_format = MEDIA_TYPES.get(media_type.strip().lower())
+        if body_format is None:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = body_format, q
+    return best
+
+
+def current_format() -> BodyFormat:
+    """Response format negotiated for the request being handled (JSON outside NegotiatedRoute)."""
+    return _current_format.get()
+
+
+class DecodedRequest(Request):
+    """
+    Request with a msgpack or CBOR body. FastAPI sees it as JSON; json()
+    returns the decoded body, so body parameters validate as usual.
+    """
+    
+    def __init__(self, scope, receive, body_format: BodyFormat):
+        headers = [(key, value) for key, value in scope["headers"] if key != b"content-type"]
+        headers.append((b"content-type", JSON.media_type.encode()))
+        super().__init__({**scope, "headers": headers}, receive)
+        self.body_format = body_format
+    
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            try:
+                self._json = self.body_format.decode(await self.body())
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid {self.body_format.name} body")
+        return self._json
+
+
+async def validate_body(request: Request, adapter: TypeAdapter) -> Any:
+    """Validate a raw request body (JSON, msgpack or CBOR) with adapter."""
+    if isinstance(request, DecodedRequest):
+        return adapter.validate_python(await request.json())
+    return adapter.validate_json(await request.body())
+
+
+class MsgpackResponse(Response):
+    media_type = MSGPACK.media_type
+    
+    def render(self, content: Any) -> bytes:
+        return MSGPACK.encode(content)
+
+
+class CBORResponse(Response):
+    media_type = CBOR.media_type
+    
+    def render(self, content: Any) -> bytes:
+        return CBOR.encode(content)
+
+
+RESPONSE_CLASSES = {MSGPACK.name: MsgpackResponse, CBOR.name: CBORResponse}
+
+
+class NativeResponseField:
+    """
+    Response field serializing to Python values instead of JSON-compatible
+    ones, so datetimes reach the binary encoders as datetimes.
+    """
+    
+    def __init__(self, field):
+        self.field = field
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.field, name)
+    
+    def serialize(self, value: Any, **kwargs) -> Any:
+        return self.field.serialize(value, mode="python", **kwargs)
+
+
+class NegotiatedRoute(APIRoute):
+    """
+    Route honoring `Accept: application/msgpack` or `application/cbor` (JSON
+    otherwise) and accepting request bodies in the same formats. Error
+    responses stay JSON.
+    """
+    
+    def get_route_handler(self) -> Callable:
+        handlers = {JSON.name: super().get_route_handler()}
+        response_field = self.secure_cloned_response_field
+        for name, response_class in RESPONSE_CLASSES.items():
+            handlers[name] = get_request_handler(
+                dependant=self.dependant,
+                body_field=self.body_field,
+                status_code=self.status_code,
+                response_class=response_class,
+                response_field=NativeResponseField(response_field) if response_field else None,
+                response_model_include=self.response_model_include,
+                response_model_exclude=self.response_model_exclude,
+                response_model_by_alias=self.response_model_by_alias,
+                response_model_exclude_unset=self.response_model_exclude_unset,
+                response_model_exclude_defaults=self.response_model_exclude_defaults,
+                response_model_exclude_none=self.response_model_exclude_none,
+                dependency_overrides_provider=self.dependency_overrides_provider,
+            )
+    
+        async def negotiated_handler(request: Request) -> Response:
+            content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+            body_format = MEDIA_TYPES.get(content_type)
+            if body_format is not None and body_format.decode is not None:
+                request = DecodedRequest(request.scope, request.receive, body_format)
+    
+            response_format = negotiate(request.headers.get("accept"))
+            token = _current_format.set(response_format)
+            try:
+                response = await handlers[response_format.name](request)
+            finally:
+                _current_format.reset(token)
+            response.headers["Vary"] = "Accept"
+            return response
+    
+        return negotiated_handler
@@ -0,0 +1,111 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime, timezone
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import Date, DateTime, or_, tuple_
+from sqlalchemy.sql import Select
+from sqlalchemy.types import TypeDecorator
+
+from app.core.config import settings
+from app.db.dialect import null_sort_value, nulls_last
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """
+    Opt-in keyset pagination (`?limit=` and/or `?cursor=`).
+    Without either parameter list endpoints return every row, as before.
+    """
+    
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} header"),
+        limit: Optional[int] = Query(None, ge=1, le=settings.PAGINATION_MAX_LIMIT, description="Page size")
+    ):
+        self.cursor = cursor
+        self.limit = limit
+        if cursor is not None and limit is None:
+            self.limit = settings.PAGINATION_DEFAULT_LIMIT
+    
+    @property
+    def enabled(self) -> bool:
+        return self.limit is not None
+
+
+def encode_cursor(value: Any, row_id: Optional[int]) -> str:
+    """Opaque cursor for the position just after (sort value, id)."""
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    payload = json.dumps([value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, column) -> Tuple[Any, Optional[int]]:
+    """Inverse of encode_cursor, typed for the sort column; raises HTTPException 400 if malformed."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, row_id = json.loads(payload)
+        if value is not None:
+            # Decorated types (e.g. UTCDateTime) parse like the type they wrap
+            column_type = column.type.impl if isinstance(column.type, TypeDecorator) else column.type
+            if isinstance(column_type, DateTime):
+                value = datetime.fromisoformat(value)
+                if column_type.timezone and value.tzinfo is None:
+                    # Naive cursor values are UTC; drivers would read them as local time
+                    value = value.replace(tzinfo=timezone.utc)
+            elif isinstance(column_type, Date):
+                value = date.fromisoformat(value)
+        if row_id is not None and not isinstance(row_id, int):
+            raise ValueError(row_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, row_id
+
+
+def keyset(query: Select, page: PageParams, column, id_column, descending: bool = False) -> Select:
+    """
+    Order query by column (and id as tie-breaker) and, when paginating, seek
+    past the cursor with a row-value comparison so every page is an index
+    range scan regardless of depth (no OFFSET). Fetches one extra row to
+    detect whether another page follows.
+    
+    NULL sort values come last: a nullable column is ordered and compared by
+    its nulls_last() key, so it needs an index on that expression (and id)
+    rather than on the column.
+    """
+    key = nulls_last(column, descending) if column.nullable else column
+    if not page.enabled:
+        return query.order_by(key.desc() if descending else key.asc())
+    
+    if page.cursor is not None:
+        value, row_id = decode_cursor(page.cursor, column)
+        after = (lambda a, b: a < b) if descending else (lambda a, b: a > b)
+        if not column.nullable:
+            query = query.where(after(tuple_(column, id_column), tuple_(value, row_id)))
+        else:
+            # Spelled out: SQLite seeks an expression index by range, not by row value
+            if value is None:
+                value = null_sort_value(descending)
+            not_before = key <= value if descending else key >= value
+            query = query.where(not_before, or_(after(key, value), after(id_column, row_id)))
+    
+    order = [key.desc(), id_column.desc()] if descending else [key.asc(), id_column.asc()]
+    return query.order_by(*order).limit(page.limit + 1)
+
+
+def finish_page(
+    items: Sequence,
+    page: PageParams,
+    response: Response,
+    key: Callable[[Any], Tuple[Any, Optional[int]]]
+) -> List:
+    """Trim the extra row fetched by keyset() and set the next-page cursor header."""
+    items = list(items)
+    if page.enabled and len(items) > page.limit:
+        items = items[:page.limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*key(items[-1]))
+    return items
@@ -1,26 +1,31 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.api.negotiation import NegotiatedRoute
+from app.db.session import get_async_db
 from app.core.security import (
-    verify_password,
-    get_password_hash,
+    get_password_hash_async,
+    verify_and_update_password_async,
     create_access_token,
     get_current_user
 )
+from app.core.user_cache import user_cache
 from app.models.user import User
 from app.models.goal import Goal
 from app.schemas.user import UserCreate, UserResponse, Token
+from app.services.change_log import record_changes
+from app.services.collection_versions import GOALS
 
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user."""
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -28,7 +33,7 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     new_user = User(
         name=user_data.name,
         email=user_data.email,
@@ -36,22 +41,24 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     # Create default goals for the user
     default_goals = Goal(user_id=new_user.id)
     db.add(default_goals)
-    db.commit()
+    await db.flush()
+    await record_changes(db, new_user.id, GOALS, [default_goals.id])
+    await db.commit()
     
     return new_user
 
 
 @router.post("/login", response_model=Token)
-def login(email: str, password: str, db: Session = Depends(get_db)):
+async def login(email: str, password: str, db: AsyncSession = Depends(get_async_db)):
     """Login and get access token."""
     # Find user
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -59,12 +66,19 @@ def login(email: str, password: str, db: Session = Depends(get_db)):
         )
     
     # Verify password
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
     
+    # Transparently rehash if the bcrypt cost has changed
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+        user_cache.invalidate(user.id)
+    
     # Create access token
     access_token = create_access_token(data={"sub": user.id})
     
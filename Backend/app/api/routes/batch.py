@@ -0,0 +1,151 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Tuple
+from urllib.parse import urlencode
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+from app.api.negotiation import NegotiatedRoute
+from app.db.session import SHARED_SESSION_KEY, get_async_db
+from app.core.security import (
+    USER_CONTEXT_CHANGED_KEY, USER_CONTEXT_KEY, get_current_goal, get_current_user, load_user_context
+)
+from app.core.user_cache import user_cache
+from app.models.goal import Goal
+from app.models.user import User
+from app.schemas.batch import BatchRequest, BatchResponse, BatchSubRequest, BatchSubResponse
+
+
+logger = logging.getLogger("app.batch")
+
+router = APIRouter(route_class=NegotiatedRoute)
+
+API_PREFIX = "/api/v1/"
+BATCH_PATH = "/api/v1/batch"
+
+# Headers a sub-request may not set itself
+_RESERVED_HEADERS = {"authorization", "content-type", "content-length", "accept", "host"}
+
+# Sub-response headers that describe the transport rather than the result
+_DROPPED_HEADERS = {"content-length", "content-type", "vary"}
+
+
+def _sub_scope(request: Request, sub: BatchSubRequest, body: bytes) -> Dict[str, Any]:
+    path, _, query = sub.path.partition("?")
+    if sub.params:
+        query = "&".join(filter(None, [query, urlencode(sub.params, doseq=True)]))
+    
+    headers = [
+        (name.lower().encode("latin-1"), value.encode("latin-1"))
+        for name, value in sub.headers.items() if name.lower() not in _RESERVED_HEADERS
+    ]
+    headers.append((b"accept", b"application/json"))
+    authorization = request.headers.get("authorization")
+    if authorization:
+        headers.append((b"authorization", authorization.encode("latin-1")))
+    if body:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    
+    scope = {key: value for key, value in request.scope.items() if key not in ("route", "endpoint", "path_params")}
+    scope.update(
+        method=sub.method,
+        path=path,
+        raw_path=path.encode(),
+        query_string=query.encode(),
+        headers=headers
+    )
+    return scope
+
+
+async def _dispatch(request: Request, scope: Dict[str, Any], body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+    """Run one sub-request through the router in-process and collect its response."""
+    status = 500
+    headers: Dict[str, str] = {}
+    chunks: List[bytes] = []
+    received = False
+    
+    async def receive() -> Dict[str, Any]:
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # The client stays connected until the sub-request is done
+        await asyncio.Event().wait()
+    
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            headers.update((name.decode("latin-1"), value.decode("latin-1")) for name, value in message["headers"])
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+    
+    try:
+        await request.app.router(scope, receive, send)
+    except StarletteHTTPException as e:
+        # Raised by the router itself for unknown paths (404) and methods (405)
+        return e.status_code, {}, json.dumps({"detail": e.detail}).encode()
+    except Exception:
+        # Fails this sub-request only; the caller rolls back its writes
+        logger.exception("Batch sub-request %s %s failed", scope["method"], scope["path"])
+        return 500, {}, json.dumps({"detail": "Internal Server Error"}).encode()
+    return status, headers, b"".join(chunks)
+
+
+def _decode_body(headers: Dict[str, str], content: bytes) -> Any:
+    if not content:
+        return None
+    if headers.get("content-type", "application/json").startswith("application/json"):
+        return json.loads(content)
+    return content.decode("utf-8", errors="replace")
+
+
+@router.post("", response_model=BatchResponse)
+async def batch(
+    batch_request: BatchRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+    current_goal: Goal = Depends(get_current_goal)
+):
+    """
+    Run several API requests in one round trip, e.g. the home screen's tasks,
+    events, step and diet summaries and insights. Sub-requests are handled
+    in-process, in order, as the authenticated user and on one database
+    session, and each gets its own status, headers and body in the response.
+    A failed sub-request (including one that raises an unexpected error,
+    reported as 500) is rolled back without affecting the others.
+    """
+    for sub in batch_request.requests:
+        if not sub.path.startswith(API_PREFIX) or sub.path.partition("?")[0].rstrip("/") == BATCH_PATH:
+            raise HTTPException(status_code=400, detail=f"Invalid batch path: {sub.path}")
+    
+    request.scope[SHARED_SESSION_KEY] = db
+    request.scope[USER_CONTEXT_KEY] = (current_user, current_goal)
+    
+    responses = []
+    for sub in batch_request.requests:
+        body = json.dumps(sub.body).encode() if sub.body is not None else b""
+        scope = _sub_scope(request, sub, body)
+        status, headers, content = await _dispatch(request, scope, body)
+        if status >= 400:
+            await db.rollback()
+        elif scope.get(USER_CONTEXT_CHANGED_KEY):
+            # The sub-request changed the profile or goals; later ones must see it
+            context = await load_user_context(db, current_user.id)
+            if context is None:
+                # Gone: later sub-requests authenticate (and fail) on their own
+                request.scope.pop(USER_CONTEXT_KEY, None)
+            else:
+                user_cache.set(current_user.id, *context)
+                request.scope[USER_CONTEXT_KEY] = context
+        responses.append(BatchSubResponse(
+            id=sub.id,
+            status=status,
+            headers={name: value for name, value in headers.items() if name not in _DROPPED_HEADERS},
+            body=_decode_body(headers, content)
+        ))
+    return BatchResponse(responses=responses)
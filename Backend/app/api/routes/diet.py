@@ -1,59 +1,128 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.orm import undefer
 from typing import List, Optional
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, time, timedelta
 from collections import defaultdict
 
-from app.db.session import get_db
+from app.api.conditional import conditional_get
+from app.api.fields import Fields, fetch_rows, field_selection, render_list, select_fields
+from app.api.negotiation import NegotiatedRoute
+from app.api.pagination import PageParams, finish_page, keyset
+from app.db.session import get_async_db
 from app.core.security import get_current_user
 from app.models.user import User
-from app.models.meal import Meal
-from app.schemas.meal import MealCreate, MealUpdate, MealResponse, DailySummary
+from app.models.meal import Meal, MealItem
+from app.schemas.meal import (
+    NUTRITION_SOURCE_FIELDS,
+    MealCreate, MealUpdate, MealListResponse, MealResponse, MealDetailResponse, MealItemResponse, DailySummary
+)
+from app.services.change_log import record_changes
+from app.services.collection_versions import MEALS
+from app.services.daily_stats import apply_deltas, get_daily_stats, meal_delta
 from app.services.nutrition_api import nutrition_client
 
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
 
 
-@router.get("/meals", response_model=List[MealResponse])
-def get_meals(
+async def _meal_items(db: AsyncSession, meal: Meal) -> List[MealItem]:
+    items = await db.scalars(select(MealItem).where(
+        MealItem.meal_id == meal.id
+    ).order_by(MealItem.position).options(undefer(MealItem.raw_nutrition_data)))
+    return items.all()
+
+
+def _meal_detail(meal: Meal, items: List[MealItem]) -> MealDetailResponse:
+    return MealDetailResponse(
+        **MealResponse.model_validate(meal).model_dump(),
+        items=[MealItemResponse.model_validate(item) for item in items]
+    )
+
+
+@router.get(
+    "/meals",
+    response_model=List[MealListResponse],
+    dependencies=[Depends(conditional_get(MEALS))]
+)
+async def get_meals(
+    response: Response,
     date: Optional[str] = Query(None, description="Filter by date (YYYY-MM-DD)"),
-    db: Session = Depends(get_db),
+    page: PageParams = Depends(),
+    fields: Fields = Depends(field_selection(MealResponse)),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get meals for the current user."""
-    query = db.query(Meal).filter(Meal.user_id == current_user.id)
+    """
+    Get meals for the current user.
+    raw_nutrition_data is only included when requested through ?fields=.
+    """
+    response_model = MealResponse if fields else MealListResponse
+    query = select_fields(Meal, response_model, fields, Meal.id, Meal.datetime).where(
+        Meal.user_id == current_user.id
+    )
     
     if date:
         try:
             filter_date = datetime.fromisoformat(date).date()
             next_day = filter_date + timedelta(days=1)
-            query = query.filter(
+            query = query.where(
                 Meal.datetime >= filter_date,
                 Meal.datetime < next_day
             )
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date format")
     
-    meals = query.order_by(Meal.datetime.desc()).all()
-    return meals
+    meals = await fetch_rows(db, keyset(query, page, Meal.datetime, Meal.id, descending=True))
+    meals = finish_page(meals, page, response, lambda m: (m["datetime"], m["id"]))
+    return render_list(meals, response_model, fields, response)
 
 
-@router.post("/meals", response_model=MealResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/meals", response_model=MealDetailResponse, status_code=status.HTTP_201_CREATED)
 async def create_meal(
     meal_data: MealCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Create a new meal entry."""
+    """
+    Create a new meal entry. A meal with items stores each as a line item
+    (looked up concurrently) and their sums as its totals.
+    """
+    items: List[MealItem] = []
+    if meal_data.items:
+        results = await nutrition_client.get_nutrition_data_many(
+            [(item.food_name, item.quantity) for item in meal_data.items]
+        )
+        items = [
+            MealItem(
+                position=position,
+                food_name=item.food_name,
+                quantity=item.quantity,
+                calories=nutrition_data["calories"],
+                carbs=nutrition_data["carbs"],
+                protein=nutrition_data["protein"],
+                fat=nutrition_data["fat"],
+                raw_nutrition_data=nutrition_data.get("raw_data")
+            )
+            for position, (item, nutrition_data) in enumerate(zip(meal_data.items, results))
+        ]
+        meal = Meal(
+            user_id=current_user.id,
+            name=meal_data.name,
+            meal_type=meal_data.meal_type,
+            datetime=meal_data.datetime,
+            calories=sum(item.calories for item in items),
+            carbs=sum(item.carbs for item in items),
+            protein=sum(item.protein for item in items),
+            fat=sum(item.fat for item in items)
+        )
     # If food_name is provided, fetch nutrition data from API
-    if meal_data.food_name:
+    elif meal_data.food_name:
         nutrition_data = await nutrition_client.get_nutrition_data(
             meal_data.food_name,
             meal_data.quantity
         )
-        
         meal = Meal(
             user_id=current_user.id,
             name=meal_data.name,
@@ -79,83 +148,113 @@ async def create_meal(
         )
     
     db.add(meal)
-    db.commit()
-    db.refresh(meal)
-    return meal
+    await db.flush()
+    for item in items:
+        item.meal_id = meal.id
+    db.add_all(items)
+    await record_changes(db, current_user.id, MEALS, [meal.id])
+    await apply_deltas(db, current_user.id, [meal_delta(meal)])
+    await db.commit()
+    await db.refresh(meal, ["created_at", "raw_nutrition_data"])
+    return _meal_detail(meal, items)
 
 
-@router.get("/meals/{meal_id}", response_model=MealResponse)
-def get_meal(
+@router.get("/meals/{meal_id}", response_model=MealDetailResponse)
+async def get_meal(
     meal_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get a specific meal."""
-    meal = db.query(Meal).filter(
+    """Get a specific meal with its line items."""
+    meal = await db.scalar(select(Meal).where(
         Meal.id == meal_id,
         Meal.user_id == current_user.id
-    ).first()
+    ).options(undefer(Meal.raw_nutrition_data)))
     
     if not meal:
         raise HTTPException(status_code=404, detail="Meal not found")
     
-    return meal
+    return _meal_detail(meal, await _meal_items(db, meal))
 
 
-@router.patch("/meals/{meal_id}", response_model=MealResponse)
-def update_meal(
+@router.patch("/meals/{meal_id}", response_model=MealDetailResponse)
+async def update_meal(
     meal_id: int,
     meal_data: MealUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Update a meal."""
-    meal = db.query(Meal).filter(
+    """
+    Update a meal. The nutrition of a meal logged with items is the sum of
+    its items and cannot be changed directly.
+    """
+    meal = await db.scalar(select(Meal).where(
         Meal.id == meal_id,
         Meal.user_id == current_user.id
-    ).first()
+    ).options(undefer(Meal.raw_nutrition_data)))
     
     if not meal:
         raise HTTPException(status_code=404, detail="Meal not found")
     
-    # Update fields
+    items = await _meal_items(db, meal)
     update_data = meal_data.model_dump(exclude_unset=True)
+    if items and any(field in update_data for field in NUTRITION_SOURCE_FIELDS):
+        raise HTTPException(
+            status_code=409,
+            detail="Nutrition of a meal with items is the sum of its items and cannot be updated"
+        )
+    
+    # Update fields
+    before = meal_delta(meal, -1)
     for field, value in update_data.items():
         setattr(meal, field, value)
     
-    db.commit()
-    db.refresh(meal)
-    return meal
+    await record_changes(db, current_user.id, MEALS, [meal.id])
+    await apply_deltas(db, current_user.id, [before, meal_delta(meal)])
+    await db.commit()
+    await db.refresh(meal, ["created_at", "raw_nutrition_data"])
+    return _meal_detail(meal, items)
 
 
 @router.delete("/meals/{meal_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_meal(
+async def delete_meal(
     meal_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a meal."""
-    meal = db.query(Meal).filter(
+    meal = await db.scalar(select(Meal).where(
         Meal.id == meal_id,
         Meal.user_id == current_user.id
-    ).first()
+    ))
     
     if not meal:
         raise HTTPException(status_code=404, detail="Meal not found")
     
-    db.delete(meal)
-    db.commit()
+    await db.delete(meal)
+    await record_changes(db, current_user.id, MEALS, [meal.id], deleted=True)
+    await apply_deltas(db, current_user.id, [meal_delta(meal, -1)])
+    await db.commit()
     return None
 
 
-@router.get("/summary", response_model=List[DailySummary])
-def get_diet_summary(
+@router.get(
+    "/summary",
+    response_model=List[DailySummary],
+    response_model_exclude_unset=True,
+    dependencies=[Depends(conditional_get(MEALS, summary=True))]
+)
+async def get_diet_summary(
     from_date: Optional[str] = Query(None, alias="from", description="Start date (YYYY-MM-DD)"),
     to_date: Optional[str] = Query(None, alias="to", description="End date (YYYY-MM-DD)"),
-    db: Session = Depends(get_db),
+    include_meals: bool = Query(True, description="Include each day's meals (false: totals only)"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get daily nutrition summary."""
+    """
+    Get daily nutrition summary. Totals are read from the daily stats; with
+    include_meals=false the meals are not loaded at all.
+    """
     # Default to last 7 days
     if not from_date:
         start = date.today() - timedelta(days=7)
@@ -173,44 +272,34 @@ def get_diet_summary(
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid to date format")
     
-    # Query meals in date range
-    meals = db.query(Meal).filter(
-        Meal.user_id == current_user.id,
-        func.date(Meal.datetime) >= start,
-        func.date(Meal.datetime) <= end
-    ).order_by(Meal.datetime.asc()).all()
-    
-    # Group by date
-    daily_data = defaultdict(lambda: {
-        "total_calories": 0,
-        "total_carbs": 0,
-        "total_protein": 0,
-        "total_fat": 0,
-        "meals": []
-    })
-    
-    for meal in meals:
-        meal_date = meal.datetime.date().isoformat()
-        daily_data[meal_date]["total_calories"] += meal.calories
-        daily_data[meal_date]["total_carbs"] += meal.carbs
-        daily_data[meal_date]["total_protein"] += meal.protein
-        daily_data[meal_date]["total_fat"] += meal.fat
-        daily_data[meal_date]["meals"].append(meal)
+    totals = {stat.day: stat for stat in await get_daily_stats(db, current_user.id, start, end)}
+    
+    daily_meals = defaultdict(list)
+    if include_meals:
+        # Range on the raw column so that ix_meals_user_id_datetime is used
+        meals = await fetch_rows(db, select_fields(Meal, MealListResponse, None).where(
+            Meal.user_id == current_user.id,
+            Meal.datetime >= datetime.combine(start, time.min),
+            Meal.datetime < datetime.combine(end + timedelta(days=1), time.min)
+        ).order_by(Meal.datetime.asc()))
+        for meal in meals:
+            daily_meals[meal["datetime"].date()].append(meal)
     
     # Convert to response format
     summaries = []
     current_date = start
     while current_date <= end:
-        date_str = current_date.isoformat()
-        data = daily_data.get(date_str, {
-            "total_calories": 0,
-            "total_carbs": 0,
-            "total_protein": 0,
-            "total_fat": 0,
-            "meals": []
-        })
-        summaries.append(DailySummary(date=date_str, **data))
+        stat = totals.get(current_date)
+        summary = {
+            "date": current_date.isoformat(),
+            "total_calories": stat.calories if stat else 0,
+            "total_carbs": stat.carbs if stat else 0,
+            "total_protein": stat.protein if stat else 0,
+            "total_fat": stat.fat if stat else 0,
+        }
+        if include_meals:
+            summary["meals"] = daily_meals.get(current_date, [])
+        summaries.append(DailySummary(**summary))
         current_date += timedelta(days=1)
     
     return summaries
-
@@ -1,50 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from app.db.session import get_db
+from app.api.conditional import conditional_get
+from app.api.fields import Fields, fetch_rows, field_selection, render_list, select_fields
+from app.api.negotiation import NegotiatedRoute
+from app.api.pagination import PageParams, finish_page, keyset
+from app.db.session import get_async_db
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.event import Event
 from app.schemas.event import EventCreate, EventUpdate, EventResponse
+from app.services.change_log import record_changes
+from app.services.collection_versions import EVENTS
 
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
 
 
-@router.get("", response_model=List[EventResponse])
-def get_events(
+@router.get("", response_model=List[EventResponse], dependencies=[Depends(conditional_get(EVENTS))])
+async def get_events(
+    response: Response,
     from_date: Optional[str] = Query(None, alias="from", description="Start date (ISO format)"),
     to_date: Optional[str] = Query(None, alias="to", description="End date (ISO format)"),
-    db: Session = Depends(get_db),
+    page: PageParams = Depends(),
+    fields: Fields = Depends(field_selection(EventResponse)),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get events for the current user."""
-    query = db.query(Event).filter(Event.user_id == current_user.id)
+    query = select_fields(Event, EventResponse, fields, Event.id, Event.start_datetime).where(
+        Event.user_id == current_user.id
+    )
     
     if from_date:
         try:
             start = datetime.fromisoformat(from_date)
-            query = query.filter(Event.start_datetime >= start)
+            query = query.where(Event.start_datetime >= start)
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid from date format")
     
     if to_date:
         try:
             end = datetime.fromisoformat(to_date)
-            query = query.filter(Event.end_datetime <= end)
+            query = query.where(Event.end_datetime <= end)
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid to date format")
     
-    events = query.order_by(Event.start_datetime.asc()).all()
-    return events
+    events = await fetch_rows(db, keyset(query, page, Event.start_datetime, Event.id))
+    events = finish_page(events, page, response, lambda e: (e["start_datetime"], e["id"]))
+    return render_list(events, EventResponse, fields, response)
 
 
 @router.post("", response_model=EventResponse, status_code=status.HTTP_201_CREATED)
-def create_event(
+async def create_event(
     event_data: EventCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new event."""
@@ -57,22 +70,24 @@ def create_event(
     
     event = Event(**event_data.model_dump(), user_id=current_user.id)
     db.add(event)
-    db.commit()
-    db.refresh(event)
+    await db.flush()
+    await record_changes(db, current_user.id, EVENTS, [event.id])
+    await db.commit()
+    await db.refresh(event)
     return event
 
 
 @router.get("/{event_id}", response_model=EventResponse)
-def get_event(
+async def get_event(
     event_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific event."""
-    event = db.query(Event).filter(
+    event = await db.scalar(select(Event).where(
         Event.id == event_id,
         Event.user_id == current_user.id
-    ).first()
+    ))
     
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
@@ -81,17 +96,17 @@ def get_event(
 
 
 @router.patch("/{event_id}", response_model=EventResponse)
-def update_event(
+async def update_event(
     event_id: int,
     event_data: EventUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update an event."""
-    event = db.query(Event).filter(
+    event = await db.scalar(select(Event).where(
         Event.id == event_id,
         Event.user_id == current_user.id
-    ).first()
+    ))
     
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
@@ -108,27 +123,28 @@ def update_event(
             detail="Start datetime must be before end datetime"
         )
     
-    db.commit()
-    db.refresh(event)
+    await record_changes(db, current_user.id, EVENTS, [event.id])
+    await db.commit()
+    await db.refresh(event)
     return event
 
 
 @router.delete("/{event_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_event(
+async def delete_event(
     event_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete an event."""
-    event = db.query(Event).filter(
+    event = await db.scalar(select(Event).where(
         Event.id == event_id,
         Event.user_id == current_user.id
-    ).first()
+    ))
     
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    db.delete(event)
-    db.commit()
+    await db.delete(event)
+    await record_changes(db, current_user.id, EVENTS, [event.id], deleted=True)
+    await db.commit()
     return None
-
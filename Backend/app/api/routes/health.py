@@ -1,216 +1,413 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 from typing import List, Optional
 from datetime import datetime, date, timedelta
 
-from app.db.session import get_db
+from app.core.config import settings
+from app.api.conditional import conditional_get
+from app.api.fields import Fields, fetch_rows, field_selection, render_list, select_fields
+from app.api.negotiation import NegotiatedRoute, validate_body
+from app.api.pagination import PageParams, decode_cursor, finish_page, keyset
+from app.db.session import get_async_db
+from app.db.dialect import insert
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.step_summary import StepSummary
 from app.models.vital import Vital
 from app.models.activity import Activity
 from app.schemas.step_summary import StepSummaryCreate, StepSummaryResponse
-from app.schemas.vital import VitalCreate, VitalResponse
+from app.schemas.vital import VitalCreate, VitalResponse, VitalRollupResponse
 from app.schemas.activity import ActivityCreate, ActivityResponse, ActivityUpdate
+from app.schemas.health_sync import HealthSyncResponse, VitalStreamResponse, health_sync_adapter
+from app.services.change_log import record_changes
+from app.services.collection_versions import ACTIVITIES, STEPS, VITALS
+from app.services.daily_stats import activity_delta, apply_deltas, set_steps, vital_deltas
+from app.services.health_sync import LineTooLongError, ingest_vitals_stream, store_vital_samples, sync_health_data
+from app.services.vital_chunks import read_chunked_vitals
+from app.services.vital_rollups import ROLLUP_MODELS, get_vital_rollups, to_utc_naive, update_vital_rollups
+from app.services.vital_types import UnitConversionError, vital_types
 
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
+
+
+# Bulk sync endpoint
+@router.post("/sync", response_model=HealthSyncResponse)
+async def sync_health(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Bulk-sync a mixed batch of steps, vitals and activities (e.g. from HealthKit).
+    The body is a JSON, msgpack or CBOR array.
+    Each item has a "kind" of "steps", "vital" or "activity". Vitals and
+    activities with a client_sample_id that is already stored are skipped,
+    so retrying a batch is safe.
+    """
+    try:
+        items = await validate_body(request, health_sync_adapter)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    
+    if len(items) > settings.HEALTH_SYNC_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many items, at most {settings.HEALTH_SYNC_MAX_ITEMS} per request"
+        )
+    
+    try:
+        return await sync_health_data(db, current_user.id, items)
+    except UnitConversionError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 
 # Step endpoints
 @router.post("/steps", response_model=StepSummaryResponse, status_code=status.HTTP_201_CREATED)
-def create_or_update_steps(
+async def create_or_update_steps(
     step_data: StepSummaryCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create or update step summary for a date."""
-    # Check if entry already exists for this date
-    existing = db.query(StepSummary).filter(
-        StepSummary.user_id == current_user.id,
-        StepSummary.date == step_data.date
-    ).first()
-    
-    if existing:
-        # Update existing
-        existing.step_count = step_data.step_count
-        existing.source = step_data.source
-        db.commit()
-        db.refresh(existing)
-        return existing
-    else:
-        # Create new
-        step_summary = StepSummary(
-            **step_data.model_dump(),
-            user_id=current_user.id
-        )
-        db.add(step_summary)
-        db.commit()
-        db.refresh(step_summary)
-        return step_summary
+    # Upsert on the (user_id, date) unique constraint
+    stmt = insert(db, StepSummary).values(**step_data.model_dump(), user_id=current_user.id)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StepSummary.user_id, StepSummary.date],
+        set_={"step_count": stmt.excluded.step_count, "source": stmt.excluded.source}
+    ).returning(StepSummary)
+    
+    step_summary = await db.scalar(stmt, execution_options={"populate_existing": True})
+    await record_changes(db, current_user.id, STEPS, [step_summary.id])
+    await set_steps(db, current_user.id, {step_summary.date: step_summary.step_count})
+    await db.commit()
+    return step_summary
 
 
-@router.get("/steps/summary", response_model=List[StepSummaryResponse])
-def get_step_summary(
+@router.get(
+    "/steps/summary",
+    response_model=List[StepSummaryResponse],
+    dependencies=[Depends(conditional_get(STEPS, summary=True))]
+)
+async def get_step_summary(
+    response: Response,
     from_date: Optional[str] = Query(None, alias="from", description="Start date (YYYY-MM-DD)"),
     to_date: Optional[str] = Query(None, alias="to", description="End date (YYYY-MM-DD)"),
-    db: Session = Depends(get_db),
+    page: PageParams = Depends(),
+    fields: Fields = Depends(field_selection(StepSummaryResponse)),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get step summary over a date range."""
-    query = db.query(StepSummary).filter(StepSummary.user_id == current_user.id)
+    query = select_fields(StepSummary, StepSummaryResponse, fields, StepSummary.id, StepSummary.date).where(
+        StepSummary.user_id == current_user.id
+    )
     
     if from_date:
         try:
             start = datetime.fromisoformat(from_date).date()
-            query = query.filter(StepSummary.date >= start)
+            query = query.where(StepSummary.date >= start)
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid from date format")
     
     if to_date:
         try:
             end = datetime.fromisoformat(to_date).date()
-            query = query.filter(StepSummary.date <= end)
+            query = query.where(StepSummary.date <= end)
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid to date format")
     
-    steps = query.order_by(StepSummary.date.asc()).all()
-    return steps
+    steps = await fetch_rows(db, keyset(query, page, StepSummary.date, StepSummary.id))
+    steps = finish_page(steps, page, response, lambda s: (s["date"], s["id"]))
+    return render_list(steps, StepSummaryResponse, fields, response)
 
 
 # Vitals endpoints
 @router.post("/vitals", response_model=VitalResponse, status_code=status.HTTP_201_CREATED)
-def create_vital(
+async def create_vital(
     vital_data: VitalCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Create a new vital record."""
-    vital = Vital(**vital_data.model_dump(), user_id=current_user.id)
+    """Create a new vital record. The value is stored in the canonical unit of its type."""
+    info = await vital_types.resolve(db, vital_data.type, vital_data.unit)
+    try:
+        sample = await vital_types.normalize(db, vital_data, {info.name: info})
+    except UnitConversionError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    if settings.VITALS_STORAGE_MODE == "chunked":
+        await store_vital_samples(db, current_user.id, [sample])
+        await db.commit()
+        return VitalResponse(
+            user_id=current_user.id,
+            type=info.name,
+            value=sample.value,
+            unit=info.unit,
+            recorded_at=sample.recorded_at,
+            client_sample_id=sample.client_sample_id,
+            created_at=datetime.utcnow()
+        )
+    
+    vital = Vital(**sample._asdict(), user_id=current_user.id)
     db.add(vital)
-    db.commit()
-    db.refresh(vital)
-    return vital
+    stored = [(vital.type_id, vital.value, vital.recorded_at)]
+    await update_vital_rollups(db, current_user.id, stored)
+    await apply_deltas(db, current_user.id, await vital_deltas(db, stored))
+    await db.flush()
+    await record_changes(db, current_user.id, VITALS, [vital.id])
+    await db.commit()
+    await db.refresh(vital)
+    return VitalResponse(
+        id=vital.id,
+        user_id=vital.user_id,
+        type=info.name,
+        value=vital.value,
+        unit=info.unit,
+        recorded_at=vital.recorded_at,
+        client_sample_id=vital.client_sample_id,
+        created_at=vital.created_at
+    )
+
+
+@router.post("/vitals/stream", response_model=VitalStreamResponse)
+async def stream_vitals(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream vitals as NDJSON (application/x-ndjson), one vital object per line.
+    Samples are committed in batches while the body is still arriving; the
+    response reports accepted, duplicate and rejected lines.
+    """
+    try:
+        return await ingest_vitals_stream(
+            db,
+            current_user.id,
+            request.stream(),
+            batch_size=settings.VITALS_STREAM_BATCH_SIZE,
+            flush_seconds=settings.VITALS_STREAM_FLUSH_SECONDS,
+            max_line_bytes=settings.VITALS_STREAM_MAX_LINE_BYTES
+        )
+    except LineTooLongError as e:
+        raise HTTPException(status_code=413, detail=str(e))
 
 
-@router.get("/vitals/{vital_type}", response_model=List[VitalResponse])
-def get_vitals_by_type(
+@router.get(
+    "/vitals/{vital_type}/rollup",
+    response_model=List[VitalRollupResponse],
+    dependencies=[Depends(conditional_get(VITALS))]
+)
+async def get_vital_rollup(
     vital_type: str,
+    bucket: str = Query("hour", description="Bucket size: minute, hour or day"),
     from_date: Optional[str] = Query(None, alias="from", description="Start date (ISO format)"),
     to_date: Optional[str] = Query(None, alias="to", description="End date (ISO format)"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get bucketed vitals (count, min, max, avg, sum, last) from the rollup tables."""
+    if bucket not in ROLLUP_MODELS:
+        raise HTTPException(status_code=400, detail="Invalid bucket, use minute, hour or day")
+    
+    try:
+        start = datetime.fromisoformat(from_date) if from_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid from date format")
+    try:
+        end = datetime.fromisoformat(to_date) if to_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid to date format")
+    
+    info = await vital_types.get(db, vital_type)
+    if info is None:
+        return []
+    
+    rollups = await get_vital_rollups(db, current_user.id, info.id, bucket, start, end)
+    return [
+        VitalRollupResponse(
+            bucket_start=r.bucket_start,
+            count=r.count,
+            min=r.min,
+            max=r.max,
+            avg=r.sum / r.count,
+            sum=r.sum,
+            last=r.last_value
+        )
+        for r in rollups
+    ]
+
+
+def _vital_position(vital: dict):
+    # Chunked samples have no id; they sort (and page) as id 0. Their times are
+    # naive UTC, while PostgreSQL returns rows' as aware UTC
+    return to_utc_naive(vital["recorded_at"]), vital["id"] or 0
+
+
+@router.get(
+    "/vitals/{vital_type}",
+    response_model=List[VitalResponse],
+    dependencies=[Depends(conditional_get(VITALS))]
+)
+async def get_vitals_by_type(
+    response: Response,
+    vital_type: str,
+    from_date: Optional[str] = Query(None, alias="from", description="Start date (ISO format)"),
+    to_date: Optional[str] = Query(None, alias="to", description="End date (ISO format)"),
+    page: PageParams = Depends(),
+    fields: Fields = Depends(field_selection(VitalResponse)),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get vitals of a specific type over a date range."""
-    query = db.query(Vital).filter(
+    try:
+        start = datetime.fromisoformat(from_date) if from_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid from date format")
+    try:
+        end = datetime.fromisoformat(to_date) if to_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid to date format")
+    
+    info = await vital_types.get(db, vital_type)
+    if info is None:
+        return []
+    
+    # type and unit come from the registry
+    query = select_fields(Vital, VitalResponse, fields, Vital.id, Vital.recorded_at).where(
         Vital.user_id == current_user.id,
-        Vital.type == vital_type
+        Vital.type_id == info.id
     )
+    if start:
+        query = query.where(Vital.recorded_at >= start)
+    if end:
+        query = query.where(Vital.recorded_at <= end)
     
-    if from_date:
-        try:
-            start = datetime.fromisoformat(from_date)
-            query = query.filter(Vital.recorded_at >= start)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid from date format")
+    vitals = await fetch_rows(db, keyset(query, page, Vital.recorded_at, Vital.id))
+    for vital in vitals:
+        vital["type"] = info.name
+        vital["unit"] = info.unit
     
-    if to_date:
-        try:
-            end = datetime.fromisoformat(to_date)
-            query = query.filter(Vital.recorded_at <= end)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid to date format")
+    if settings.VITALS_STORAGE_MODE == "chunked":
+        # Rows written before switching to chunked storage are still served
+        after = decode_cursor(page.cursor, Vital.recorded_at)[0] if page.cursor else None
+        chunked = await read_chunked_vitals(
+            db, current_user.id, info, start, end,
+            after=after, limit=page.limit + 1 if page.enabled else None
+        )
+        vitals = sorted(vitals + chunked, key=_vital_position) if vitals else chunked
     
-    vitals = query.order_by(Vital.recorded_at.asc()).all()
-    return vitals
+    vitals = finish_page(vitals, page, response, _vital_position)
+    return render_list(vitals, VitalResponse, fields, response)
 
 
 # Activity endpoints
 @router.post("/activities", response_model=ActivityResponse, status_code=status.HTTP_201_CREATED)
-def create_activity(
+async def create_activity(
     activity_data: ActivityCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new activity record."""
     activity = Activity(**activity_data.model_dump(), user_id=current_user.id)
     db.add(activity)
-    db.commit()
-    db.refresh(activity)
+    await db.flush()
+    await record_changes(db, current_user.id, ACTIVITIES, [activity.id])
+    await apply_deltas(db, current_user.id, [activity_delta(activity)])
+    await db.commit()
+    await db.refresh(activity)
     return activity
 
 
-@router.get("/activities", response_model=List[ActivityResponse])
-def get_activities(
+@router.get(
+    "/activities",
+    response_model=List[ActivityResponse],
+    dependencies=[Depends(conditional_get(ACTIVITIES))]
+)
+async def get_activities(
+    response: Response,
     from_date: Optional[str] = Query(None, alias="from", description="Start date (ISO format)"),
     to_date: Optional[str] = Query(None, alias="to", description="End date (ISO format)"),
-    db: Session = Depends(get_db),
+    page: PageParams = Depends(),
+    fields: Fields = Depends(field_selection(ActivityResponse)),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get activities over a date range."""
-    query = db.query(Activity).filter(Activity.user_id == current_user.id)
+    query = select_fields(Activity, ActivityResponse, fields, Activity.id, Activity.datetime).where(
+        Activity.user_id == current_user.id
+    )
     
     if from_date:
         try:
             start = datetime.fromisoformat(from_date)
-            query = query.filter(Activity.datetime >= start)
+            query = query.where(Activity.datetime >= start)
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid from date format")
     
     if to_date:
         try:
             end = datetime.fromisoformat(to_date)
-            query = query.filter(Activity.datetime <= end)
+            query = query.where(Activity.datetime <= end)
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid to date format")
     
-    activities = query.order_by(Activity.datetime.desc()).all()
-    return activities
+    activities = await fetch_rows(db, keyset(query, page, Activity.datetime, Activity.id, descending=True))
+    activities = finish_page(activities, page, response, lambda a: (a["datetime"], a["id"]))
+    return render_list(activities, ActivityResponse, fields, response)
 
 
 @router.patch("/activities/{activity_id}", response_model=ActivityResponse)
-def update_activity(
+async def update_activity(
     activity_id: int,
     activity_data: ActivityUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update an activity."""
-    activity = db.query(Activity).filter(
+    activity = await db.scalar(select(Activity).where(
         Activity.id == activity_id,
         Activity.user_id == current_user.id
-    ).first()
+    ))
     
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
     
     # Update fields
+    before = activity_delta(activity, -1)
     update_data = activity_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(activity, field, value)
     
-    db.commit()
-    db.refresh(activity)
+    await record_changes(db, current_user.id, ACTIVITIES, [activity.id])
+    await apply_deltas(db, current_user.id, [before, activity_delta(activity)])
+    await db.commit()
+    await db.refresh(activity)
     return activity
 
 
 @router.delete("/activities/{activity_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_activity(
+async def delete_activity(
     activity_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete an activity."""
-    activity = db.query(Activity).filter(
+    activity = await db.scalar(select(Activity).where(
         Activity.id == activity_id,
         Activity.user_id == current_user.id
-    ).first()
+    ))
     
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
     
-    db.delete(activity)
-    db.commit()
+    await db.delete(activity)
+    await record_changes(db, current_user.id, ACTIVITIES, [activity.id], deleted=True)
+    await apply_deltas(db, current_user.id, [activity_delta(activity, -1)])
+    await db.commit()
     return None
 
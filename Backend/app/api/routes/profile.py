@@ -1,75 +1,73 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
-from app.core.security import get_current_user
+from app.api.negotiation import NegotiatedRoute
+from app.db.session import get_async_db
+from app.core.security import get_current_user, get_current_goal, invalidate_user_context
 from app.models.user import User
 from app.models.goal import Goal
 from app.schemas.user import UserResponse, UserUpdate
 from app.schemas.goal import GoalResponse, GoalUpdate, ConnectionUpdate, ConnectionResponse
+from app.services.change_log import record_changes
+from app.services.collection_versions import GOALS
 
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
 
 
 @router.get("", response_model=UserResponse)
-def get_profile(current_user: User = Depends(get_current_user)):
+async def get_profile(current_user: User = Depends(get_current_user)):
     """Get user profile."""
     return current_user
 
 
 @router.patch("", response_model=UserResponse)
-def update_profile(
+async def update_profile(
     profile_data: UserUpdate,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update user profile."""
     # Check if email is being changed and if it's already taken
     if profile_data.email and profile_data.email != current_user.email:
-        existing = db.query(User).filter(User.email == profile_data.email).first()
+        existing = await db.scalar(select(User).where(User.email == profile_data.email))
         if existing:
             raise HTTPException(
                 status_code=400,
                 detail="Email already in use"
             )
     
+    # The cached current_user is shared, so update an attached copy
+    user = await db.scalar(select(User).where(User.id == current_user.id))
+    
     # Update fields
     update_data = profile_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
-        setattr(current_user, field, value)
+        setattr(user, field, value)
     
-    db.commit()
-    db.refresh(current_user)
-    return current_user
+    await db.commit()
+    await db.refresh(user)
+    invalidate_user_context(request, user.id)
+    return user
 
 
 @router.get("/goals", response_model=GoalResponse)
-def get_goals(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
+async def get_goals(current_goal: Goal = Depends(get_current_goal)):
     """Get user goals."""
-    goal = db.query(Goal).filter(Goal.user_id == current_user.id).first()
-    
-    if not goal:
-        # Create default goals
-        goal = Goal(user_id=current_user.id)
-        db.add(goal)
-        db.commit()
-        db.refresh(goal)
-    
-    return goal
+    return current_goal
 
 
 @router.patch("/goals", response_model=GoalResponse)
-def update_goals(
+async def update_goals(
     goal_data: GoalUpdate,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update user goals."""
-    goal = db.query(Goal).filter(Goal.user_id == current_user.id).first()
+    goal = await db.scalar(select(Goal).where(Goal.user_id == current_user.id))
     
     if not goal:
         # Create goals if they don't exist
@@ -81,40 +79,32 @@ def update_goals(
     for field, value in update_data.items():
         setattr(goal, field, value)
     
-    db.commit()
-    db.refresh(goal)
+    await db.flush()
+    await record_changes(db, current_user.id, GOALS, [goal.id])
+    await db.commit()
+    await db.refresh(goal)
+    invalidate_user_context(request, current_user.id)
     return goal
 
 
 @router.get("/connections", response_model=ConnectionResponse)
-def get_connections(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
+async def get_connections(current_goal: Goal = Depends(get_current_goal)):
     """Get connection status for integrated services."""
-    goal = db.query(Goal).filter(Goal.user_id == current_user.id).first()
-    
-    if not goal:
-        # Create default goals
-        goal = Goal(user_id=current_user.id)
-        db.add(goal)
-        db.commit()
-        db.refresh(goal)
-    
     return ConnectionResponse(
-        apple_health_connected=goal.apple_health_connected,
-        nutrition_api_connected=goal.nutrition_api_connected
+        apple_health_connected=current_goal.apple_health_connected,
+        nutrition_api_connected=current_goal.nutrition_api_connected
     )
 
 
 @router.patch("/connections", response_model=ConnectionResponse)
-def update_connections(
+async def update_connections(
     connection_data: ConnectionUpdate,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update connection status for integrated services."""
-    goal = db.query(Goal).filter(Goal.user_id == current_user.id).first()
+    goal = await db.scalar(select(Goal).where(Goal.user_id == current_user.id))
     
     if not goal:
         goal = Goal(user_id=current_user.id)
@@ -126,8 +116,11 @@ def update_connections(
     if connection_data.nutrition_api_connected is not None:
         goal.nutrition_api_connected = connection_data.nutrition_api_connected
     
-    db.commit()
-    db.refresh(goal)
+    await db.flush()
+    await record_changes(db, current_user.id, GOALS, [goal.id])
+    await db.commit()
+    await db.refresh(goal)
+    invalidate_user_context(request, current_user.id)
     
     return ConnectionResponse(
         apple_health_connected=goal.apple_health_connected,
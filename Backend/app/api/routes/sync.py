@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.api.negotiation import NegotiatedRoute
+from app.core.config import settings
+from app.db.session import get_async_db
+from app.core.security import get_current_user
+from app.models.user import User
+from app.schemas.sync import SyncResponse
+from app.services.delta_sync import read_changes
+
+
+router = APIRouter(route_class=NegotiatedRoute)
+
+
+@router.get("", response_model=SyncResponse)
+async def delta_sync(
+    since: Optional[str] = Query(None, description="next_token of the previous sync; omit for a full sync"),
+    limit: int = Query(settings.SYNC_DEFAULT_LIMIT, ge=1, le=settings.SYNC_MAX_LIMIT, description="Changes per page"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get tasks, events, meals, steps, vitals, activities and goals changed since
+    a sync token, plus IDs of deleted records. While has_more is true, call
+    again with since=next_token; store the last next_token for the next sync.
+    """
+    try:
+        token = int(since) if since else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    if token < 0:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    
+    return await read_changes(db, current_user.id, token, limit)
@@ -1,67 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from app.db.session import get_db
+from app.api.conditional import conditional_get
+from app.api.fields import Fields, fetch_rows, field_selection, render_list, select_fields
+from app.api.negotiation import NegotiatedRoute
+from app.api.pagination import PageParams, finish_page, keyset
+from app.db.session import get_async_db
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.task import Task, TaskStatus
 from app.schemas.task import TaskCreate, TaskUpdate, TaskResponse
+from app.services.change_log import record_changes
+from app.services.collection_versions import TASKS
 
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
 
 
-@router.get("", response_model=List[TaskResponse])
-def get_tasks(
+@router.get("", response_model=List[TaskResponse], dependencies=[Depends(conditional_get(TASKS))])
+async def get_tasks(
+    response: Response,
     date: Optional[str] = Query(None, description="Filter by due date (YYYY-MM-DD)"),
     status: Optional[TaskStatus] = Query(None, description="Filter by status"),
-    db: Session = Depends(get_db),
+    page: PageParams = Depends(),
+    fields: Fields = Depends(field_selection(TaskResponse)),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get tasks for the current user."""
-    query = db.query(Task).filter(Task.user_id == current_user.id)
+    query = select_fields(Task, TaskResponse, fields, Task.id, Task.due_datetime).where(
+        Task.user_id == current_user.id
+    )
     
     if date:
         try:
             filter_date = datetime.fromisoformat(date).date()
-            query = query.filter(Task.due_datetime >= filter_date)
+            query = query.where(Task.due_datetime >= filter_date)
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date format")
     
     if status:
-        query = query.filter(Task.status == status)
+        query = query.where(Task.status == status)
     
-    tasks = query.order_by(Task.due_datetime.asc()).all()
-    return tasks
+    tasks = await fetch_rows(db, keyset(query, page, Task.due_datetime, Task.id))
+    tasks = finish_page(tasks, page, response, lambda t: (t["due_datetime"], t["id"]))
+    return render_list(tasks, TaskResponse, fields, response)
 
 
 @router.post("", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
-def create_task(
+async def create_task(
     task_data: TaskCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new task."""
     task = Task(**task_data.model_dump(), user_id=current_user.id)
     db.add(task)
-    db.commit()
-    db.refresh(task)
+    await db.flush()
+    await record_changes(db, current_user.id, TASKS, [task.id])
+    await db.commit()
+    await db.refresh(task)
     return task
 
 
 @router.get("/{task_id}", response_model=TaskResponse)
-def get_task(
+async def get_task(
     task_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific task."""
-    task = db.query(Task).filter(
+    task = await db.scalar(select(Task).where(
         Task.id == task_id,
         Task.user_id == current_user.id
-    ).first()
+    ))
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
@@ -70,17 +85,17 @@ def get_task(
 
 
 @router.patch("/{task_id}", response_model=TaskResponse)
-def update_task(
+async def update_task(
     task_id: int,
     task_data: TaskUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update a task."""
-    task = db.query(Task).filter(
+    task = await db.scalar(select(Task).where(
         Task.id == task_id,
         Task.user_id == current_user.id
-    ).first()
+    ))
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
@@ -90,27 +105,28 @@ def update_task(
     for field, value in update_data.items():
         setattr(task, field, value)
     
-    db.commit()
-    db.refresh(task)
+    await record_changes(db, current_user.id, TASKS, [task.id])
+    await db.commit()
+    await db.refresh(task)
     return task
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(
+async def delete_task(
     task_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a task."""
-    task = db.query(Task).filter(
+    task = await db.scalar(select(Task).where(
         Task.id == task_id,
         Task.user_id == current_user.id
-    ).first()
+    ))
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    db.delete(task)
-    db.commit()
+    await db.delete(task)
+    await record_changes(db, current_user.id, TASKS, [task.id], deleted=True)
+    await db.commit()
     return None
-
@@ -0,0 +1,25 @@
+"""
+Build the food database index from the bundled food composition data.
+
+Writes the index to FOOD_DB_PATH (app/data/foods.db by default). The app
+only opens an existing index, so run this when deploying and after editing
+app/data/foods.csv; without it food lookups fall back to the nutrition API
+or generic values.
+
+Usage (from the Backend directory):
+    python -m app.commands.build_food_db
+"""
+import argparse
+
+from app.services.food_db import build_food_db, food_db
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args()
+    count = build_food_db(food_db.source, food_db.path)
+    print(f"Built {food_db.path} with {count} foods")
+
+
+if __name__ == "__main__":
+    main()
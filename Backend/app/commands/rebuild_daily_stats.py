@@ -0,0 +1,38 @@
+"""
+Rebuild daily stats from the records they summarize.
+
+Meals, step summaries, activities and the daily vital rollups are
+re-aggregated and replace the stored daily_stats rows. Writes keep them
+up to date; run this after records were changed outside the API, or to
+repair drift.
+
+Usage (from the Backend directory):
+    python -m app.commands.rebuild_daily_stats [--user-id 42]
+"""
+import argparse
+import asyncio
+from typing import Optional
+
+from app.db.session import dispose_engines, get_async_session_factory
+from app.services.daily_stats import rebuild_daily_stats
+
+
+async def run(user_id: Optional[int]) -> None:
+    try:
+        async with get_async_session_factory()() as db:
+            rows = await rebuild_daily_stats(db, user_id)
+            await db.commit()
+    finally:
+        await dispose_engines()
+    print(f"Rebuilt {rows} daily stats rows")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--user-id", type=int, help="Only rebuild this user's days")
+    args = parser.parse_args()
+    asyncio.run(run(args.user_id))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,16 +10,95 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./trackme.db"
+    AUTO_CREATE_TABLES: bool = False  # create missing tables on startup (dev only; use Alembic)
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    
+    # SQLite production profile (WAL, busy timeout, foreign keys, caches)
+    SQLITE_PRODUCTION_PROFILE: bool = True
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MiB
+    
+    # SQL instrumentation (Server-Timing header, per-request log line, N+1 warnings)
+    SQL_INSTRUMENTATION: bool = True
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5  # identical statements per request; 0 disables
     
     # JWT
     JWT_SECRET: str = "change-this-secret-key-in-production"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 10080  # 7 days
     
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 64
+    
+    # Authenticated user context cache
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 60
+    
+    # Keyset pagination of list endpoints (opt-in with ?limit= / ?cursor=)
+    PAGINATION_DEFAULT_LIMIT: int = 100
+    PAGINATION_MAX_LIMIT: int = 1000
+    
+    # Conditional GET: max-age of summaries that end before today
+    PAST_DAY_CACHE_MAX_AGE_SECONDS: int = 86400
+    
+    # Delta sync (GET /api/v1/sync): change log entries per page
+    SYNC_DEFAULT_LIMIT: int = 1000
+    SYNC_MAX_LIMIT: int = 10000
+    
+    # Batch requests (POST /api/v1/batch)
+    BATCH_MAX_REQUESTS: int = 20
+    
+    # Bulk health sync
+    HEALTH_SYNC_MAX_ITEMS: int = 20000
+    
+    # Vitals storage: "rows" (one vitals row per sample) or "chunked"
+    # (compressed columnar chunks per user, type and UTC day)
+    VITALS_STORAGE_MODE: str = "rows"
+    
+    # Minimum interval between reloads of the vital type cache on lookups of unknown names
+    VITAL_TYPES_RELOAD_SECONDS: float = 5.0
+    
+    # Streaming vitals ingestion (NDJSON)
+    VITALS_STREAM_BATCH_SIZE: int = 500
+    VITALS_STREAM_FLUSH_SECONDS: float = 1.0
+    VITALS_STREAM_MAX_LINE_BYTES: int = 65536
+    
     # Nutrition API
     NUTRITION_API_KEY: str = ""
     NUTRITION_API_URL: str = "https://api.nutritionix.com/v1_1"
     
+    # Shared HTTP client of the nutrition API (created by the application lifespan)
+    NUTRITION_HTTP_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    NUTRITION_HTTP_READ_TIMEOUT_SECONDS: float = 10.0  # also used for writes
+    NUTRITION_HTTP_POOL_TIMEOUT_SECONDS: float = 5.0  # waiting for a free connection
+    NUTRITION_HTTP_MAX_CONNECTIONS: int = 20
+    NUTRITION_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    NUTRITION_HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    NUTRITION_HTTP2: bool = True  # when the h2 package is installed
+    
+    # Nutrition lookup cache (in-memory LRU in front of the nutrition_cache table)
+    NUTRITION_CACHE_MAX_SIZE: int = 2048
+    NUTRITION_CACHE_TTL_SECONDS: float = 30 * 86400
+    NUTRITION_CACHE_NEGATIVE_TTL_SECONDS: float = 86400  # foods the API did not find
+    NUTRITION_CACHE_STALE_SECONDS: float = 30 * 86400  # served while refreshing in the background
+    
+    # Bundled food database (app/data/foods.csv), indexed in SQLite FTS5
+    FOOD_DB_PATH: str = ""  # built index; app/data/foods.db by default
+    FOOD_DB_MMAP_SIZE: int = 64 * 1024 * 1024
+    FOOD_DB_MATCH_SCORE: float = 0.9  # answered locally, without calling the API
+    FOOD_DB_FALLBACK_SCORE: float = 0.4  # used when the API is unavailable or does not know the food
+    
+    # Meals logged as a list of items
+    MEAL_MAX_ITEMS: int = 50
+    MEAL_ITEM_MAX_CONCURRENT_LOOKUPS: int = 5  # per meal
+    
     # CORS
     CORS_ORIGINS: List[str] = [
         "http://localhost:8081",
@@ -1,43 +1,154 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import HTTPException, Security, Depends
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Optional, Tuple
+from fastapi import HTTPException, Request, Security, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.models.user import User
+from app.models.goal import Goal
+from app.core.user_cache import user_cache
+from app.services.change_log import record_changes
+from app.services.collection_versions import GOALS
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+
+def build_password_context(rounds: int) -> "CryptContext":
+    """
+    Build the password hashing context.
+    Hashes made with a different bcrypt cost are reported as needing an update.
+    """
+    # passlib (and bcrypt) are only loaded once a password is actually hashed
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+@lru_cache
+def get_password_context() -> "CryptContext":
+    """Shared password hashing context, built on first use."""
+    return build_password_context(settings.BCRYPT_ROUNDS)
+
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+# Scope key under which POST /api/v1/batch passes its (user, goal) context to sub-requests
+USER_CONTEXT_KEY = "trackme.user_context"
+
+# Scope key set by requests that changed the user or its goals, so a batch reloads its context
+USER_CONTEXT_CHANGED_KEY = "trackme.user_context_changed"
+
+
+class PasswordHashExecutor:
+    """
+    Dedicated, bounded thread pool for bcrypt work.
+    Keeps hashing CPU off the event loop and out of the shared request threadpool.
+    Once all workers are busy and the queue is full, new work is rejected with 503.
+    """
+    
+    def __init__(self, max_workers: int, max_queue: int):
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Start the worker threads on first use (and again after shutdown)."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers,
+                thread_name_prefix="password-hash"
+            )
+        return self._executor
+    
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run fn(*args) on the hashing pool and await its result."""
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(
+                status_code=503,
+                detail="Authentication service is busy, please retry",
+                headers={"Retry-After": "1"}
+            )
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+    
+    def shutdown(self) -> None:
+        """Stop the worker threads once queued work is done."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_hasher = PasswordHashExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_QUEUE_SIZE
+)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_password_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password."""
-    return pwd_context.hash(password)
+    return get_password_context().hash(password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and rehash it if the stored hash uses outdated settings.
+    Returns (valid, new_hash); new_hash is None when no rehash is needed.
+    """
+    return get_password_context().verify_and_update(plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the dedicated hashing pool."""
+    return await password_hasher.run(get_password_hash, password)
+
+
+async def verify_and_update_password_async(
+    plain_password: str,
+    hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify (and possibly rehash) a password on the dedicated hashing pool."""
+    return await password_hasher.run(verify_and_update_password, plain_password, hashed_password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
+    # JWT requires the subject claim to be a string
+    if "sub" in to_encode:
+        to_encode["sub"] = str(to_encode["sub"])
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
+    from jose import jwt
+
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
 
 def decode_token(token: str) -> dict:
     """Decode and verify a JWT token."""
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
         return payload
@@ -45,20 +156,83 @@ def decode_token(token: str) -> dict:
         raise HTTPException(status_code=401, detail="Could not validate credentials")
 
 
-def get_current_user(
+async def load_user_context(db: AsyncSession, user_id: int) -> Optional[Tuple[User, Goal]]:
+    """
+    Load a user and its goals in one query, creating default goals if missing.
+    The returned instances are detached from the session and safe to cache.
+    """
+    result = await db.execute(
+        select(User, Goal).outerjoin(Goal, Goal.user_id == User.id).where(User.id == user_id)
+    )
+    row = result.first()
+    if row is None:
+        return None
+
+    user, goal = row
+    if goal is None:
+        # Create default goals
+        goal = Goal(user_id=user.id)
+        db.add(goal)
+        await db.flush()
+        await record_changes(db, user.id, GOALS, [goal.id])
+        await db.commit()
+        await db.refresh(goal)
+
+    db.expunge(user)
+    db.expunge(goal)
+    return user, goal
+
+
+def invalidate_user_context(request: Request, user_id: int) -> None:
+    """Drop the cached context of a user whose profile or goals were changed."""
+    user_cache.invalidate(user_id)
+    request.scope[USER_CONTEXT_CHANGED_KEY] = True
+
+
+async def _get_user_context(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Security(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get the current authenticated user from JWT token."""
+    db: AsyncSession = Depends(get_async_db)
+) -> Tuple[User, Goal]:
+    """
+    Resolve the (user, goal) context for the JWT token, using the cache.
+    Sub-requests of a batch use the context the batch was authenticated with.
+    """
+    context = request.scope.get(USER_CONTEXT_KEY)
+    if context is not None:
+        return context
+
     token = credentials.credentials
     payload = decode_token(token)
-    user_id: int = payload.get("sub")
-    if user_id is None:
+    sub = payload.get("sub")
+    if sub is None:
         raise HTTPException(status_code=401, detail="Could not validate credentials")
-    
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
-    
-    return user
+    try:
+        user_id = int(sub)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+
+    context = user_cache.get(user_id)
+    if context is None:
+        context = await load_user_context(db, user_id)
+        if context is None:
+            raise HTTPException(status_code=401, detail="User not found")
+        user_cache.set(user_id, *context)
+
+    return context
+
+
+def get_current_user(context: Tuple[User, Goal] = Depends(_get_user_context)) -> User:
+    """
+    Get the current authenticated user from JWT token.
+    The returned instance is shared through the user cache and must not be modified.
+    """
+    return context[0]
+
 
+def get_current_goal(context: Tuple[User, Goal] = Depends(_get_user_context)) -> Goal:
+    """
+    Get the goals of the current authenticated user.
+    The returned instance is shared through the user cache and must not be modified.
+    """
+    return context[1]
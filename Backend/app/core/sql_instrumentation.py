@@ -0,0 +1,137 @@
+import json
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("app.sql")
+
+_current_stats: ContextVar[Optional["QueryStats"]] = ContextVar("sql_query_stats", default=None)
+
+
+class QueryStats:
+    """SQL statistics collected for a single request."""
+    
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.shapes: Counter = Counter()
+    
+    def record(self, statement: str, duration_ms: float) -> None:
+        """Record one executed statement."""
+        self.count += 1
+        self.total_ms += duration_ms
+        # Statements are already parameterized, so the SQL text is the shape
+        self.shapes[statement] += 1
+        if duration_ms >= self.slowest_ms:
+            self.slowest_ms = duration_ms
+            self.slowest_statement = statement
+    
+    def repeated_statements(self, threshold: int) -> Dict[str, int]:
+        """Statement shapes executed at least threshold times (likely N+1 queries)."""
+        if threshold <= 0:
+            return {}
+        return {statement: n for statement, n in self.shapes.items() if n >= threshold}
+    
+    def server_timing(self) -> str:
+        """Format the statistics as a Server-Timing header value."""
+        return (
+            f'db;dur={self.total_ms:.2f};desc="{self.count} queries", '
+            f"db-slowest;dur={self.slowest_ms:.2f}"
+        )
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Statistics of the request being handled, if any."""
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    started = conn.info.get("query_started")
+    if stats is None or not started:
+        return
+    stats.record(statement, (time.perf_counter() - started.pop()) * 1000)
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def install_sql_hooks() -> None:
+    """Register the cursor execute hooks on every engine (idempotent)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+
+class SQLInstrumentationMiddleware:
+    """
+    ASGI middleware that collects SQL statistics per HTTP request.
+    Adds a Server-Timing header, logs one structured line per request and
+    warns about repeated identical statements (N+1 queries).
+    """
+    
+    def __init__(self, app, n_plus_one_threshold: int = 5):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+        install_sql_hooks()
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+    
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        status_code: List[int] = []
+    
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status_code.append(message["status"])
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+    
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            self._report(scope, stats, status_code[0] if status_code else None)
+    
+    def _report(self, scope, stats: QueryStats, status_code: Optional[int]) -> None:
+        path = scope.get("path", "")
+        logger.info(json.dumps({
+            "event": "sql_stats",
+            "method": scope.get("method"),
+            "path": path,
+            "status": status_code,
+            "queries": stats.count,
+            "db_ms": round(stats.total_ms, 2),
+            "slowest_ms": round(stats.slowest_ms, 2),
+            "slowest_statement": stats.slowest_statement,
+        }))
+        repeated = stats.repeated_statements(self.n_plus_one_threshold)
+        for statement, count in repeated.items():
+            logger.warning(json.dumps({
+                "event": "sql_n_plus_one",
+                "method": scope.get("method"),
+                "path": path,
+                "count": count,
+                "statement": statement,
+            }))
@@ -0,0 +1,57 @@
+from datetime import timezone
+
+from sqlalchemy import DateTime, func, literal_column
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.types import TypeDecorator
+
+
+def insert(db: AsyncSession, model):
+    """
+    Build a dialect-specific INSERT for the session's database.
+    Unlike sqlalchemy.insert(), the result supports on_conflict_do_update()
+    and on_conflict_do_nothing() on both SQLite and PostgreSQL.
+    """
+    if db.bind.dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def null_sort_value(descending: bool = False):
+    """The sort key nulls_last() gives NULLs: 'infinity', or '-infinity' when descending."""
+    return literal_column("'-infinity'" if descending else "'infinity'")
+
+
+def nulls_last(column, descending: bool = False):
+    """
+    Non-null sort key of a nullable date or datetime column that orders NULLs
+    last on both SQLite and PostgreSQL: the column coalesced to
+    null_sort_value(), which PostgreSQL reads as a timestamp after (before)
+    every other and SQLite compares as text after (before) any ISO date.
+    Index the same expression to back queries ordered by it.
+    """
+    return func.coalesce(column, null_sort_value(descending))
+
+
+class UTCDateTime(TypeDecorator):
+    """
+    DateTime(timezone=True) that converts aware values to UTC before storing.
+    PostgreSQL does so itself; SQLite would keep the wall clock and drop the
+    offset, so a value's day would depend on the offset it was sent with.
+    Naive values are assumed to be UTC already.
+    """
+    impl = DateTime(timezone=True)
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value
+
+
+def utc_date(db: AsyncSession, column):
+    """The UTC calendar day of a UTCDateTime column, matching to_utc_naive(value).date()."""
+    if db.bind.dialect.name == "postgresql":
+        # date() of a timestamptz would use the session's time zone
+        return func.date(func.timezone("UTC", column))
+    return func.date(column)
@@ -1,23 +1,170 @@
-from sqlalchemy import create_engine
+from functools import lru_cache
+from typing import Any, Dict
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
 
-# Create engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
-    echo=settings.DEBUG
-)
+# Scope key under which POST /api/v1/batch passes its session to sub-requests
+SHARED_SESSION_KEY = "trackme.db_session"
+
+
+def get_async_database_url(database_url: str) -> str:
+    """
+    Map a database URL onto its asyncio driver.
+    SQLite uses aiosqlite and PostgreSQL uses asyncpg; URLs that already
+    name an async driver are returned unchanged.
+    """
+    scheme, sep, rest = database_url.partition("://")
+    if scheme == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    if scheme in ("postgres", "postgresql", "postgresql+psycopg2"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    return database_url
+
+
+def _is_sqlite(database_url: str) -> bool:
+    return make_url(database_url).get_backend_name() == "sqlite"
+
+
+def _is_sqlite_memory(database_url: str) -> bool:
+    database = make_url(database_url).database
+    return not database or database == ":memory:" or "mode=memory" in database_url
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """
+    Connect hook for the SQLite production profile.
+    WAL lets readers run alongside a writer, busy_timeout makes concurrent
+    writers wait instead of failing with "database is locked", and
+    foreign_keys enables the ON DELETE CASCADE rules declared on the models.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        # Negative cache_size is in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA foreign_keys=ON")
+    finally:
+        cursor.close()
+
+
+def _engine_options(database_url: str, is_async: bool) -> Dict[str, Any]:
+    """Build create_engine keyword arguments for a database URL."""
+    options: Dict[str, Any] = {"echo": settings.DB_ECHO}
+    if _is_sqlite(database_url):
+        options["connect_args"] = {"check_same_thread": False}
+        if _is_sqlite_memory(database_url):
+            # In-memory databases keep SQLAlchemy's default single-connection pools
+            return options
+        if is_async:
+            # aiosqlite defaults to NullPool, which opens a connection (and a
+            # thread) per session and re-runs the connect pragmas every time
+            options["poolclass"] = AsyncAdaptedQueuePool
+    else:
+        options["pool_pre_ping"] = True
+        options["pool_recycle"] = settings.DB_POOL_RECYCLE_SECONDS
+    options["pool_size"] = settings.DB_POOL_SIZE
+    options["max_overflow"] = settings.DB_MAX_OVERFLOW
+    options["pool_timeout"] = settings.DB_POOL_TIMEOUT_SECONDS
+    return options
+
+
+def build_engine(database_url: str, sqlite_production_profile: bool = True) -> Engine:
+    """Create a sync engine, applying the SQLite production profile if enabled."""
+    sync_engine = create_engine(database_url, **_engine_options(database_url, is_async=False))
+    if sqlite_production_profile and _is_sqlite(database_url) and not _is_sqlite_memory(database_url):
+        event.listen(sync_engine, "connect", apply_sqlite_pragmas)
+    return sync_engine
+
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def build_async_engine(database_url: str, sqlite_production_profile: bool = True) -> AsyncEngine:
+    """Create an async engine, applying the SQLite production profile if enabled."""
+    async_url = get_async_database_url(database_url)
+    new_engine = create_async_engine(async_url, **_engine_options(async_url, is_async=True))
+    if sqlite_production_profile and _is_sqlite(async_url) and not _is_sqlite_memory(async_url):
+        event.listen(new_engine.sync_engine, "connect", apply_sqlite_pragmas)
+    return new_engine
+
+
+@lru_cache
+def get_engine() -> Engine:
+    """Sync engine (schema management and scripts), created on first use."""
+    return build_engine(settings.DATABASE_URL, settings.SQLITE_PRODUCTION_PROFILE)
+
+
+@lru_cache
+def get_session_factory() -> sessionmaker:
+    """Sync session factory, created on first use."""
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+
+@lru_cache
+def get_async_engine() -> AsyncEngine:
+    """Async engine used by the API, created on first use."""
+    return build_async_engine(settings.DATABASE_URL, settings.SQLITE_PRODUCTION_PROFILE)
+
+
+@lru_cache
+def get_async_session_factory() -> async_sessionmaker:
+    """
+    Async session factory, created on first use. Objects stay loaded after
+    commit so that handlers can return them without lazy loads outside the
+    event loop.
+    """
+    return async_sessionmaker(
+        bind=get_async_engine(),
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False
+    )
+
+
+async def create_tables() -> None:
+    """
+    Create missing tables from the models.
+    A development convenience (AUTO_CREATE_TABLES); use Alembic migrations in production.
+    """
+    import app.models  # noqa: F401 - registers every model on Base
+    from app.db.base import Base
+
+    async with get_async_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def dispose_engines() -> None:
+    """Close pooled connections of any engines that have been created."""
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
+    if get_engine.cache_info().currsize:
+        get_engine().dispose()
 
 
 def get_db():
     """Dependency to get database session."""
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
     finally:
         db.close()
 
+
+async def get_async_db(request: Request):
+    """
+    Dependency to get an async database session.
+    Sub-requests of a batch reuse the batch's session instead.
+    """
+    shared = request.scope.get(SHARED_SESSION_KEY)
+    if shared is not None:
+        yield shared
+        return
+    async with get_async_session_factory()() as db:
+        yield db
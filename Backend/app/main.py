@@ -1,40 +1,40 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.db.base import Base
-from app.db.session import engine
-from app.api.routes import auth, tasks, events, diet, health, insights, profile
+from app.core.security import password_hasher
+from app.core.sql_instrumentation import SQLInstrumentationMiddleware
+from app.db.session import create_tables, dispose_engines
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.services.food_db import food_db
+from app.services.nutrition_api import nutrition_client
+from app.services.nutrition_cache import nutrition_cache
+from app.api.routes import auth, batch, tasks, events, diet, health, insights, profile, sync
+
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    """
+    Startup and shutdown hook.
+    Importing the app has no side effects; the schema is managed by Alembic
+    (or created here when AUTO_CREATE_TABLES is set) and pooled resources
+    are released on shutdown.
+    """
+    if settings.AUTO_CREATE_TABLES:
+        await create_tables()
+    # Opens the prebuilt food database index (see app.commands.build_food_db)
+    food_db.open()
+    if nutrition_client.api_key:
+        nutrition_client.open()
+    yield
+    await nutrition_cache.close()
+    await nutrition_client.close()
+    food_db.close()
+    password_hasher.shutdown()
+    await dispose_engines()
 
-# Create tables
-Base.metadata.create_all(bind=engine)
 
-# Create FastAPI app
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    version=settings.VERSION,
-    debug=settings.DEBUG
-)
-
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS if not settings.DEBUG else ["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers
-app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
-app.include_router(tasks.router, prefix="/api/v1/tasks", tags=["tasks"])
-app.include_router(events.router, prefix="/api/v1/events", tags=["events"])
-app.include_router(diet.router, prefix="/api/v1/diet", tags=["diet"])
-app.include_router(health.router, prefix="/api/v1/health", tags=["health"])
-app.include_router(insights.router, prefix="/api/v1/insights", tags=["insights"])
-app.include_router(profile.router, prefix="/api/v1/profile", tags=["profile"])
-
-
-@app.get("/")
 def root():
     """Root endpoint."""
     return {
@@ -44,8 +44,59 @@ def root():
     }
 
 
-@app.get("/health")
 def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
 
+
+def nutrition_health():
+    """Nutrition API connection pool utilization, lookup cache and food database counters."""
+    return {"http": nutrition_client.pool_stats(), "cache": nutrition_cache.stats(), "food_db": food_db.stats()}
+
+
+def create_app() -> FastAPI:
+    """Create and configure the FastAPI application."""
+    application = FastAPI(
+        title=settings.PROJECT_NAME,
+        version=settings.VERSION,
+        debug=settings.DEBUG,
+        lifespan=lifespan
+    )
+    
+    # Configure CORS
+    application.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.CORS_ORIGINS if not settings.DEBUG else ["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
+    )
+    
+    # Per-request SQL statistics
+    if settings.SQL_INSTRUMENTATION:
+        application.add_middleware(
+            SQLInstrumentationMiddleware,
+            n_plus_one_threshold=settings.SQL_N_PLUS_ONE_THRESHOLD
+        )
+    
+    # Include routers
+    application.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
+    application.include_router(tasks.router, prefix="/api/v1/tasks", tags=["tasks"])
+    application.include_router(events.router, prefix="/api/v1/events", tags=["events"])
+    application.include_router(diet.router, prefix="/api/v1/diet", tags=["diet"])
+    application.include_router(health.router, prefix="/api/v1/health", tags=["health"])
+    application.include_router(insights.router, prefix="/api/v1/insights", tags=["insights"])
+    application.include_router(profile.router, prefix="/api/v1/profile", tags=["profile"])
+    application.include_router(sync.router, prefix="/api/v1/sync", tags=["sync"])
+    application.include_router(batch.router, prefix="/api/v1/batch", tags=["batch"])
+    
+    application.add_api_route("/", root, methods=["GET"])
+    application.add_api_route("/health", health_check, methods=["GET"])
+    application.add_api_route("/health/nutrition", nutrition_health, methods=["GET"])
+    
+    return application
+
+
+# Create FastAPI app
+app = create_app()
@@ -0,0 +1,17 @@
+# Import all models here so that Base.metadata is complete for Alembic and create_all
+from app.models.user import User
+from app.models.task import Task
+from app.models.event import Event
+from app.models.meal import Meal, MealItem
+from app.models.activity import Activity
+from app.models.step_summary import StepSummary
+from app.models.vital_type import VitalType
+from app.models.vital import Vital
+from app.models.insight import Insight
+from app.models.goal import Goal
+from app.models.vital_rollup import VitalRollupMinute, VitalRollupHour, VitalRollupDay
+from app.models.vital_chunk import VitalChunk
+from app.models.collection_version import CollectionVersion
+from app.models.change_log import ChangeLogEntry
+from app.models.daily_stat import DailyStat
+from app.models.nutrition_cache import NutritionCacheEntry
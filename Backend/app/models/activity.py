@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Enum, Index
 from sqlalchemy.sql import func
 import enum
 from app.db.base import Base
+from app.db.dialect import UTCDateTime
 
 
 class ActivityType(str, enum.Enum):
@@ -18,12 +19,20 @@ class Activity(Base):
     __tablename__ = "activities"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     type = Column(Enum(ActivityType), nullable=False)
     duration_minutes = Column(Float, nullable=False)
     distance_km = Column(Float)
     calories_burned = Column(Float)
-    datetime = Column(DateTime(timezone=True), nullable=False, index=True)
+    datetime = Column(UTCDateTime, nullable=False)
     notes = Column(String)
+    client_sample_id = Column(String)  # e.g. HealthKit sample UUID
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        # Activity history and activity insights per user and time range
+        Index("ix_activities_user_id_datetime", "user_id", "datetime"),
+        # Client-side sample identifier (e.g. HealthKit UUID) makes sync retries idempotent
+        Index("uq_activities_user_id_client_sample_id", "user_id", "client_sample_id", unique=True),
+    )
 
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, Boolean, DateTime, ForeignKey, Index, String
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class ChangeLogEntry(Base):
+    """
+    Latest change of one record (tasks, meals, ..., or a vitals chunk), written
+    in the same transaction as the change. A record has at most one entry:
+    changing it again replaces the entry with one at a higher id, so the id
+    doubles as the delta sync token (record_changes() keeps a user's ids in
+    commit order). Deletions leave a tombstone entry.
+    """
+    __tablename__ = "change_log"
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    collection = Column(String, nullable=False)
+    record_id = Column(Integer, nullable=False)
+    deleted = Column(Boolean, nullable=False, default=False)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        # Delta sync reads a user's entries after a token
+        Index("ix_change_log_user_id_id", "user_id", "id"),
+        Index("ix_change_log_user_id_collection_record_id", "user_id", "collection", "record_id", unique=True),
+        # Ids of replaced entries must never be reused
+        {"sqlite_autoincrement": True},
+    )
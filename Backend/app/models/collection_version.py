@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, ForeignKey, String
+from app.db.base import Base
+
+
+class CollectionVersion(Base):
+    """
+    Per-user change counter of a collection (tasks, meals, ...), bumped in the
+    same transaction as every write to it. List ETags are derived from it.
+    """
+    __tablename__ = "collection_versions"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    collection = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
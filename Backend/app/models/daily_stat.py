@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, Date, Float, ForeignKey, UniqueConstraint
+from app.db.base import Base
+
+
+class DailyStat(Base):
+    """
+    Per-user totals of one day (meals, steps, activities, sleep and heart
+    rate), updated in the same transaction as every write to those records.
+    Averages are kept as sum and count so that writes can apply deltas.
+    """
+    __tablename__ = "daily_stats"
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+    calories = Column(Float, nullable=False, default=0, server_default="0")
+    carbs = Column(Float, nullable=False, default=0, server_default="0")
+    protein = Column(Float, nullable=False, default=0, server_default="0")
+    fat = Column(Float, nullable=False, default=0, server_default="0")
+    meal_count = Column(Integer, nullable=False, default=0, server_default="0")
+    steps = Column(Integer)  # NULL until a step summary exists for the day
+    activity_minutes = Column(Float, nullable=False, default=0, server_default="0")
+    activity_count = Column(Integer, nullable=False, default=0, server_default="0")
+    calories_burned = Column(Float, nullable=False, default=0, server_default="0")
+    sleep_sum = Column(Float, nullable=False, default=0, server_default="0")
+    sleep_count = Column(Integer, nullable=False, default=0, server_default="0")
+    heart_rate_sum = Column(Float, nullable=False, default=0, server_default="0")
+    heart_rate_count = Column(Integer, nullable=False, default=0, server_default="0")
+    
+    __table_args__ = (
+        # One row per day; also serves range reads per user
+        UniqueConstraint("user_id", "day", name="uq_daily_stats_user_id_day"),
+    )
@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Enum, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Enum, JSON, Index
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 import enum
 from app.db.base import Base
+from app.db.dialect import UTCDateTime
 
 
 class MealType(str, enum.Enum):
@@ -13,16 +15,39 @@ class MealType(str, enum.Enum):
 
 class Meal(Base):
     __tablename__ = "meals"
-
+    
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     name = Column(String, nullable=False)
     meal_type = Column(Enum(MealType), nullable=False)
-    datetime = Column(DateTime(timezone=True), nullable=False, index=True)
+    datetime = Column(UTCDateTime, nullable=False)
     calories = Column(Float, default=0)
     carbs = Column(Float, default=0)  # grams
     protein = Column(Float, default=0)  # grams
     fat = Column(Float, default=0)  # grams
-    raw_nutrition_data = Column(JSON)  # Store raw API response
+    # Store raw API response; large and only shown on the meal detail, so it is
+    # not loaded unless asked for (undefer), and never lazily
+    raw_nutrition_data = deferred(Column(JSON), raiseload=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        # Meal lists, diet summaries and diet insights per user and time range
+        Index("ix_meals_user_id_datetime", "user_id", "datetime"),
+    )
+
 
+class MealItem(Base):
+    """One food of a meal logged as a list of items; the meal holds the totals."""
+    __tablename__ = "meal_items"
+    
+    id = Column(Integer, primary_key=True)
+    meal_id = Column(Integer, ForeignKey("meals.id", ondelete="CASCADE"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)  # order within the meal
+    food_name = Column(String, nullable=False)
+    quantity = Column(String)
+    calories = Column(Float, nullable=False, default=0)
+    carbs = Column(Float, nullable=False, default=0)  # grams
+    protein = Column(Float, nullable=False, default=0)  # grams
+    fat = Column(Float, nullable=False, default=0)  # grams
+    # Raw lookup result, only shown on the meal detail like the meal's own
+    raw_nutrition_data = deferred(Column(JSON), raiseload=True)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, Boolean, DateTime, JSON
+from app.db.base import Base
+
+
+class NutritionCacheEntry(Base):
+    """
+    Persisted upstream nutrition lookup, keyed by normalized quantity and
+    food name. found is false (and data empty) for foods upstream did not
+    know, so those are not looked up again until the entry expires.
+    """
+    __tablename__ = "nutrition_cache"
+    
+    key = Column(String, primary_key=True)
+    found = Column(Boolean, nullable=False)
+    data = Column(JSON)
+    fetched_at = Column(DateTime, nullable=False)  # naive UTC
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Date, ForeignKey, String
+from sqlalchemy import Column, Integer, Date, ForeignKey, String, UniqueConstraint
 from sqlalchemy.sql import func
 from app.db.base import Base
 
@@ -7,13 +7,14 @@ class StepSummary(Base):
     __tablename__ = "step_summaries"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    date = Column(Date, nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    date = Column(Date, nullable=False)
     step_count = Column(Integer, nullable=False, default=0)
     source = Column(String, default="manual")  # e.g., "apple_healthkit", "manual"
     
     __table_args__ = (
         # Ensure one entry per user per day
+        UniqueConstraint("user_id", "date", name="uq_step_summaries_user_id_date"),
         {"sqlite_autoincrement": True},
     )
 
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.sql import func
 import enum
 from app.db.base import Base
+from app.db.dialect import nulls_last
 
 
 class TaskStatus(str, enum.Enum):
@@ -19,9 +20,9 @@ class TaskTag(str, enum.Enum):
 
 class Task(Base):
     __tablename__ = "tasks"
-
+    
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     title = Column(String, nullable=False)
     description = Column(Text)
     status = Column(Enum(TaskStatus), default=TaskStatus.TODO, nullable=False)
@@ -29,4 +30,10 @@ class Task(Base):
     due_datetime = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        # Task list: user_id filter, then due date with undated tasks sorted last
+        # (see nulls_last) and id as tie-breaker, so keyset pages are range scans
+        Index("ix_tasks_user_id_due_datetime_id", "user_id", nulls_last(due_datetime), "id"),
+    )
 
@@ -1,16 +1,24 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Index
 from sqlalchemy.sql import func
 from app.db.base import Base
+from app.db.dialect import UTCDateTime
 
 
 class Vital(Base):
     __tablename__ = "vitals"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    type = Column(String, nullable=False, index=True)  # e.g., "heart_rate", "blood_glucose", "sleep_duration"
-    value = Column(Float, nullable=False)
-    unit = Column(String, nullable=False)  # e.g., "bpm", "mg/dL", "hours"
-    recorded_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    type_id = Column(Integer, ForeignKey("vital_types.id"), nullable=False)  # foreign key to vital_types
+    value = Column(Float, nullable=False)  # in the canonical unit of the type
+    recorded_at = Column(UTCDateTime, nullable=False)
+    client_sample_id = Column(String)  # e.g. HealthKit sample UUID
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        # Vitals by type over a time range, per user
+        Index("ix_vitals_user_id_type_id_recorded_at", "user_id", "type_id", "recorded_at"),
+        # Client-side sample identifier (e.g. HealthKit UUID) makes sync retries idempotent
+        Index("uq_vitals_user_id_client_sample_id", "user_id", "client_sample_id", unique=True),
+    )
 
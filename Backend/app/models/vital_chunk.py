@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, LargeBinary, UniqueConstraint
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class VitalChunk(Base):
+    """
+    All samples of one vital type for one user and UTC day, packed into a
+    compressed columnar blob (see app/services/vital_chunks.py).
+    Used instead of per-sample vitals rows when VITALS_STORAGE_MODE is "chunked".
+    """
+    __tablename__ = "vital_chunks"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    type_id = Column(Integer, ForeignKey("vital_types.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    sample_count = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    __table_args__ = (
+        # One chunk per series and day; also serves range reads per user and type
+        UniqueConstraint("user_id", "type_id", "day", name="uq_vital_chunks_user_id_type_id_day"),
+    )
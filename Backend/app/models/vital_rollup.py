@@ -0,0 +1,49 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Float, UniqueConstraint
+from sqlalchemy.orm import declared_attr
+from app.db.base import Base
+
+
+class VitalRollupMixin:
+    """
+    Pre-aggregated vitals per (user, type, bucket), maintained as vitals are written.
+    bucket_start is the naive UTC start of the bucket.
+    """
+    
+    id = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime, nullable=False)
+    count = Column(Integer, nullable=False)
+    min = Column(Float, nullable=False)
+    max = Column(Float, nullable=False)
+    sum = Column(Float, nullable=False)
+    last_value = Column(Float, nullable=False)
+    last_recorded_at = Column(DateTime, nullable=False)
+    
+    @declared_attr
+    def user_id(cls):
+        return Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    
+    @declared_attr
+    def type_id(cls):
+        return Column(Integer, ForeignKey("vital_types.id"), nullable=False)
+    
+    @declared_attr
+    def __table_args__(cls):
+        # One row per bucket; also serves range queries per user and type
+        return (
+            UniqueConstraint(
+                "user_id", "type_id", "bucket_start",
+                name=f"uq_{cls.__tablename__}_user_id_type_id_bucket_start"
+            ),
+        )
+
+
+class VitalRollupMinute(VitalRollupMixin, Base):
+    __tablename__ = "vital_rollups_minute"
+
+
+class VitalRollupHour(VitalRollupMixin, Base):
+    __tablename__ = "vital_rollups_hour"
+
+
+class VitalRollupDay(VitalRollupMixin, Base):
+    __tablename__ = "vital_rollups_day"
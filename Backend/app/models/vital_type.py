@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, event
+from app.db.base import Base
+
+
+# Built-in vital types (id, name, canonical unit). Ids are stable across
+# databases; types first seen through the API are added after these.
+SEED_VITAL_TYPES = [
+    (1, "heart_rate", "bpm"),
+    (2, "resting_heart_rate", "bpm"),
+    (3, "heart_rate_variability", "ms"),
+    (4, "blood_glucose", "mg/dL"),
+    (5, "sleep_duration", "hours"),
+    (6, "weight", "kg"),
+    (7, "body_temperature", "°C"),
+    (8, "blood_oxygen", "%"),
+    (9, "respiratory_rate", "breaths/min"),
+    (10, "blood_pressure_systolic", "mmHg"),
+    (11, "blood_pressure_diastolic", "mmHg"),
+]
+
+
+class VitalType(Base):
+    """Dictionary of vital types; vitals, rollups and chunks reference the small integer id."""
+    __tablename__ = "vital_types"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+    unit = Column(String, nullable=False)  # canonical unit; values are converted to it on ingest
+
+
+@event.listens_for(VitalType.__table__, "after_create")
+def _seed_vital_types(target, connection, **kw):
+    connection.execute(
+        target.insert(),
+        [{"id": id_, "name": name, "unit": unit} for id_, name, unit in SEED_VITAL_TYPES]
+    )
+    if connection.dialect.name == "postgresql":
+        # Explicit ids do not advance the serial sequence
+        connection.exec_driver_sql(
+            "SELECT setval(pg_get_serial_sequence('vital_types', 'id'), (SELECT MAX(id) FROM vital_types))"
+        )
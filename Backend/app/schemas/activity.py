@@ -11,6 +11,7 @@ class ActivityBase(BaseModel):
     calories_burned: Optional[float] = None
     datetime: datetime
     notes: Optional[str] = None
+    client_sample_id: Optional[str] = None
 
 
 class ActivityCreate(ActivityBase):
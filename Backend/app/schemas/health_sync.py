@@ -0,0 +1,47 @@
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import Annotated, List, Literal, Union
+
+from app.schemas.step_summary import StepSummaryCreate
+from app.schemas.vital import VitalCreate
+from app.schemas.activity import ActivityCreate
+
+
+class StepSyncItem(StepSummaryCreate):
+    kind: Literal["steps"]
+
+
+class VitalSyncItem(VitalCreate):
+    kind: Literal["vital"]
+
+
+class ActivitySyncItem(ActivityCreate):
+    kind: Literal["activity"]
+
+
+HealthSyncItem = Annotated[
+    Union[StepSyncItem, VitalSyncItem, ActivitySyncItem],
+    Field(discriminator="kind")
+]
+
+# Validates a whole sync batch straight from the request body in one pass
+health_sync_adapter = TypeAdapter(List[HealthSyncItem])
+
+
+class HealthSyncResponse(BaseModel):
+    steps: int = 0
+    vitals: int = 0
+    activities: int = 0
+    duplicates: int = 0
+
+
+class VitalStreamError(BaseModel):
+    line: int
+    detail: str
+
+
+class VitalStreamResponse(BaseModel):
+    accepted: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    batches: int = 0
+    errors: List[VitalStreamError] = []
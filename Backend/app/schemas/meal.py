@@ -1,6 +1,7 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from app.core.config import settings
 from app.models.meal import MealType
 
 
@@ -14,11 +15,23 @@ class MealBase(BaseModel):
     fat: float = 0
 
 
+# Fields of MealCreate and MealUpdate that set a meal's nutrition, which
+# for a meal with items is the sum of the items instead
+NUTRITION_SOURCE_FIELDS = ("food_name", "quantity", "calories", "carbs", "protein", "fat")
+
+
+class MealItemCreate(BaseModel):
+    food_name: str
+    quantity: Optional[str] = None
+
+
 class MealCreate(BaseModel):
     name: str
     meal_type: MealType
     datetime: datetime
-    # Either provide food_name for API lookup, or provide manual nutrition data
+    # Either provide items (looked up concurrently and stored as line items),
+    # food_name for API lookup, or provide manual nutrition data
+    items: Optional[List[MealItemCreate]] = Field(None, min_length=1, max_length=settings.MEAL_MAX_ITEMS)
     food_name: Optional[str] = None
     quantity: Optional[str] = None
     # Or manual nutrition data
@@ -26,6 +39,15 @@ class MealCreate(BaseModel):
     carbs: Optional[float] = None
     protein: Optional[float] = None
     fat: Optional[float] = None
+    
+    @model_validator(mode="after")
+    def check_items_alone(self) -> "MealCreate":
+        """Items replace food_name and manual nutrition data rather than adding to them."""
+        if self.items is not None:
+            mixed = [field for field in NUTRITION_SOURCE_FIELDS if getattr(self, field) is not None]
+            if mixed:
+                raise ValueError(f"items cannot be combined with {', '.join(mixed)}")
+        return self
 
 
 class MealUpdate(BaseModel):
@@ -38,20 +60,39 @@ class MealUpdate(BaseModel):
     fat: Optional[float] = None
 
 
-class MealResponse(MealBase):
+class MealListResponse(MealBase):
     id: int
     user_id: int
-    raw_nutrition_data: Optional[Dict[str, Any]] = None
     created_at: datetime
     
     model_config = ConfigDict(from_attributes=True)
 
 
+class MealResponse(MealListResponse):
+    raw_nutrition_data: Optional[Dict[str, Any]] = None
+
+
+class MealItemResponse(BaseModel):
+    food_name: str
+    quantity: Optional[str] = None
+    calories: float
+    carbs: float
+    protein: float
+    fat: float
+    raw_nutrition_data: Optional[Dict[str, Any]] = None
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
+class MealDetailResponse(MealResponse):
+    items: List[MealItemResponse] = []  # empty for meals logged without items
+
+
 class DailySummary(BaseModel):
     date: str
     total_calories: float
     total_carbs: float
     total_protein: float
     total_fat: float
-    meals: list[MealResponse]
+    meals: Optional[list[MealListResponse]] = None  # left out with include_meals=false
 
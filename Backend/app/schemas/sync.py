@@ -0,0 +1,42 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+from app.schemas.activity import ActivityResponse
+from app.schemas.event import EventResponse
+from app.schemas.goal import GoalResponse
+from app.schemas.meal import MealListResponse
+from app.schemas.step_summary import StepSummaryResponse
+from app.schemas.task import TaskResponse
+from app.schemas.vital import VitalResponse
+
+
+class SyncChanges(BaseModel):
+    """Current state of every record created or updated since the token."""
+    tasks: List[TaskResponse] = []
+    events: List[EventResponse] = []
+    meals: List[MealListResponse] = []
+    steps: List[StepSummaryResponse] = []
+    vitals: List[VitalResponse] = []
+    activities: List[ActivityResponse] = []
+    goals: List[GoalResponse] = []
+
+
+class SyncDeleted(BaseModel):
+    """
+    IDs of records deleted since the token (tombstones), for every collection
+    of SyncChanges. Vitals chunks have no tombstones: they are never deleted.
+    """
+    tasks: List[int] = []
+    events: List[int] = []
+    meals: List[int] = []
+    steps: List[int] = []
+    vitals: List[int] = []
+    activities: List[int] = []
+    goals: List[int] = []
+
+
+class SyncResponse(BaseModel):
+    changes: SyncChanges = Field(default_factory=SyncChanges)
+    deleted: SyncDeleted = Field(default_factory=SyncDeleted)
+    next_token: str
+    has_more: bool = False
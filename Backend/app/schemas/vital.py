@@ -8,6 +8,7 @@ class VitalBase(BaseModel):
     value: float
     unit: str
     recorded_at: datetime
+    client_sample_id: Optional[str] = None
 
 
 class VitalCreate(VitalBase):
@@ -21,9 +22,18 @@ class VitalUpdate(BaseModel):
 
 
 class VitalResponse(VitalBase):
-    id: int
+    id: Optional[int] = None  # None for samples kept in chunked storage
     user_id: int
     created_at: datetime
     
     model_config = ConfigDict(from_attributes=True)
 
+
+class VitalRollupResponse(BaseModel):
+    bucket_start: datetime
+    count: int
+    min: float
+    max: float
+    avg: float
+    sum: float
+    last: float
@@ -0,0 +1,54 @@
+from typing import Iterable
+
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.change_log import ChangeLogEntry
+from app.services.collection_versions import VITALS, bump_versions
+
+# Vitals in "chunked" storage are logged per (user, type, day) chunk
+VITAL_CHUNKS = "vital_chunks"
+
+# Per-user counter of change log writes (in collection_versions), locked by
+# every write before it takes change log ids
+CHANGE_LOG = "change_log"
+
+# Bound parameters per statement, well below SQLite's limit
+_BATCH_SIZE = 500
+
+
+async def record_changes(
+    db: AsyncSession,
+    user_id: int,
+    collection: str,
+    record_ids: Iterable[int],
+    deleted: bool = False
+) -> None:
+    """
+    Log records of a collection as changed (or, with deleted, as removed)
+    for delta sync and bump the collection version. Call before committing
+    the write so the log commits (or rolls back) with it.
+    
+    Entry ids are the sync tokens but are taken when the entry is inserted,
+    not when it commits. Bumping the user's CHANGE_LOG counter first locks
+    it until the transaction ends, so a user's concurrent writes take ids
+    one transaction after the other: a client that synced up to a token
+    never misses an entry with a lower id that committed later.
+    """
+    ids = list(dict.fromkeys(record_ids))
+    if not ids:
+        return
+    # Alone and first, so every transaction takes its locks in the same order
+    await bump_versions(db, user_id, CHANGE_LOG)
+    for start in range(0, len(ids), _BATCH_SIZE):
+        batch = ids[start:start + _BATCH_SIZE]
+        await db.execute(delete(ChangeLogEntry).where(
+            ChangeLogEntry.user_id == user_id,
+            ChangeLogEntry.collection == collection,
+            ChangeLogEntry.record_id.in_(batch)
+        ))
+        await db.execute(insert(ChangeLogEntry), [
+            {"user_id": user_id, "collection": collection, "record_id": record_id, "deleted": deleted}
+            for record_id in batch
+        ])
+    await bump_versions(db, user_id, VITALS if collection == VITAL_CHUNKS else collection)
@@ -0,0 +1,38 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.dialect import insert
+from app.models.collection_version import CollectionVersion
+
+# Collections whose list and summary responses are versioned (and delta synced)
+TASKS = "tasks"
+EVENTS = "events"
+MEALS = "meals"
+STEPS = "steps"
+VITALS = "vitals"
+ACTIVITIES = "activities"
+GOALS = "goals"
+
+
+async def bump_versions(db: AsyncSession, user_id: int, *collections: str) -> None:
+    """
+    Increment the user's version of each collection.
+    Call before committing a write so the bump commits (or rolls back) with it.
+    """
+    rows = [{"user_id": user_id, "collection": collection, "version": 1} for collection in sorted(set(collections))]
+    if not rows:
+        return
+    stmt = insert(db, CollectionVersion).values(rows)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[CollectionVersion.user_id, CollectionVersion.collection],
+        set_={"version": CollectionVersion.version + 1}
+    ))
+
+
+async def get_version(db: AsyncSession, user_id: int, collection: str) -> int:
+    """Current version of a user's collection (0 if it was never written)."""
+    version = await db.scalar(select(CollectionVersion.version).where(
+        CollectionVersion.user_id == user_id,
+        CollectionVersion.collection == collection
+    ))
+    return version or 0
@@ -0,0 +1,200 @@
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.dialect import insert, utc_date
+from app.models.activity import Activity
+from app.models.daily_stat import DailyStat
+from app.models.meal import Meal
+from app.models.step_summary import StepSummary
+from app.models.vital_rollup import VitalRollupDay
+from app.services.vital_rollups import Sample, to_utc_naive
+from app.services.vital_types import vital_types
+
+# Rows per INSERT statement; keeps bound parameters well below SQLite's limit
+INSERT_CHUNK_SIZE = 500
+
+# Vital types kept per day -> (sum column, count column)
+VITAL_COLUMNS = {
+    "sleep_duration": ("sleep_sum", "sleep_count"),
+    "heart_rate": ("heart_rate_sum", "heart_rate_count"),
+}
+
+# Columns updated by adding deltas -> count column whose reaching 0 resets the
+# sum to exactly 0 (instead of leaving float rounding residue)
+ADDITIVE_COLUMNS = {
+    "calories": "meal_count",
+    "carbs": "meal_count",
+    "protein": "meal_count",
+    "fat": "meal_count",
+    "meal_count": None,
+    "activity_minutes": "activity_count",
+    "calories_burned": "activity_count",
+    "activity_count": None,
+    "sleep_sum": "sleep_count",
+    "sleep_count": None,
+    "heart_rate_sum": "heart_rate_count",
+    "heart_rate_count": None,
+}
+
+# A day and the amounts to add to its columns
+Delta = Tuple[date, Dict[str, float]]
+
+
+def meal_delta(meal: Any, sign: int = 1) -> Delta:
+    """Change of a day's totals when a meal is added (sign 1) or removed (sign -1)."""
+    return to_utc_naive(meal.datetime).date(), {
+        "calories": sign * (meal.calories or 0),
+        "carbs": sign * (meal.carbs or 0),
+        "protein": sign * (meal.protein or 0),
+        "fat": sign * (meal.fat or 0),
+        "meal_count": sign,
+    }
+
+
+def activity_delta(activity: Any, sign: int = 1) -> Delta:
+    """Change of a day's totals when an activity is added (sign 1) or removed (sign -1)."""
+    return to_utc_naive(activity.datetime).date(), {
+        "activity_minutes": sign * activity.duration_minutes,
+        "calories_burned": sign * (activity.calories_burned or 0),
+        "activity_count": sign,
+    }
+
+
+async def vital_deltas(db: AsyncSession, samples: Sequence[Sample]) -> List[Delta]:
+    """Changes of daily totals for newly stored vitals (sleep and heart rate only)."""
+    columns = {}
+    for type_id in {sample[0] for sample in samples}:
+        info = await vital_types.get_by_id(db, type_id)
+        if info.name in VITAL_COLUMNS:
+            columns[type_id] = VITAL_COLUMNS[info.name]
+    
+    deltas = []
+    for type_id, value, recorded_at in samples:
+        if type_id in columns:
+            sum_column, count_column = columns[type_id]
+            deltas.append((to_utc_naive(recorded_at).date(), {sum_column: value, count_column: 1}))
+    return deltas
+
+
+def _additive_set(new) -> Dict[str, Any]:
+    set_ = {}
+    for column, count_column in ADDITIVE_COLUMNS.items():
+        value = getattr(DailyStat, column) + getattr(new, column)
+        if count_column is not None:
+            count = getattr(DailyStat, count_column) + getattr(new, count_column)
+            value = case((count == 0, 0), else_=value)
+        set_[column] = value
+    return set_
+
+
+async def apply_deltas(db: AsyncSession, user_id: int, deltas: Iterable[Delta]) -> None:
+    """
+    Add deltas to a user's daily totals, creating missing days.
+    Runs in the caller's transaction, so totals commit together with the records.
+    """
+    days: Dict[date, Dict[str, float]] = {}
+    for day, delta in deltas:
+        totals = days.setdefault(day, dict.fromkeys(ADDITIVE_COLUMNS, 0))
+        for column, value in delta.items():
+            totals[column] += value
+    
+    rows = [{"user_id": user_id, "day": day, **totals} for day, totals in days.items()]
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        stmt = insert(db, DailyStat).values(rows[start:start + INSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DailyStat.user_id, DailyStat.day],
+            set_=_additive_set(stmt.excluded)
+        )
+        await db.execute(stmt)
+
+
+async def set_steps(db: AsyncSession, user_id: int, steps: Dict[date, int]) -> None:
+    """Store the step totals of days (step summaries are upserted, not added up)."""
+    rows = [{"user_id": user_id, "day": day, "steps": count} for day, count in steps.items()]
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        stmt = insert(db, DailyStat).values(rows[start:start + INSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DailyStat.user_id, DailyStat.day],
+            set_={"steps": stmt.excluded.steps}
+        )
+        await db.execute(stmt)
+
+
+async def get_daily_stats(db: AsyncSession, user_id: int, start: date, end: date) -> List[DailyStat]:
+    """Stored days of a user from start to end (inclusive), oldest first."""
+    return (await db.scalars(select(DailyStat).where(
+        DailyStat.user_id == user_id,
+        DailyStat.day >= start,
+        DailyStat.day <= end
+    ).order_by(DailyStat.day.asc()))).all()
+
+
+def _as_date(value: Any) -> date:
+    # SQLite's date() returns text
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+async def rebuild_daily_stats(db: AsyncSession, user_id: Optional[int] = None) -> int:
+    """
+    Recompute daily totals from meals, step summaries, activities and the
+    daily vital rollups, replacing the stored ones of one user (or of all
+    users). Repairs drift, e.g. after records were changed outside the API.
+    Returns the number of days written.
+    """
+    def for_user(query, model):
+        return query if user_id is None else query.where(model.user_id == user_id)
+    
+    days: Dict[Tuple[int, date], Dict[str, Any]] = {}
+    
+    def day(owner: int, value: Any) -> Dict[str, Any]:
+        return days.setdefault((owner, _as_date(value)), {**dict.fromkeys(ADDITIVE_COLUMNS, 0), "steps": None})
+    
+    meal_day = utc_date(db, Meal.datetime)
+    meals = await db.execute(for_user(select(
+        Meal.user_id, meal_day, func.sum(Meal.calories), func.sum(Meal.carbs), func.sum(Meal.protein),
+        func.sum(Meal.fat), func.count()
+    ), Meal).group_by(Meal.user_id, meal_day))
+    for owner, value, calories, carbs, protein, fat, count in meals:
+        day(owner, value).update(
+            calories=calories or 0, carbs=carbs or 0, protein=protein or 0, fat=fat or 0, meal_count=count
+        )
+    
+    steps = await db.execute(for_user(
+        select(StepSummary.user_id, StepSummary.date, StepSummary.step_count), StepSummary
+    ))
+    for owner, value, count in steps:
+        day(owner, value)["steps"] = count
+    
+    activity_day = utc_date(db, Activity.datetime)
+    activities = await db.execute(for_user(select(
+        Activity.user_id, activity_day, func.sum(Activity.duration_minutes),
+        func.sum(Activity.calories_burned), func.count()
+    ), Activity).group_by(Activity.user_id, activity_day))
+    for owner, value, minutes, burned, count in activities:
+        day(owner, value).update(activity_minutes=minutes, calories_burned=burned or 0, activity_count=count)
+    
+    columns = {}
+    for name, vital_columns in VITAL_COLUMNS.items():
+        info = await vital_types.get(db, name)
+        if info is not None:
+            columns[info.id] = vital_columns
+    vitals = await db.execute(for_user(select(
+        VitalRollupDay.user_id, VitalRollupDay.bucket_start, VitalRollupDay.type_id,
+        VitalRollupDay.sum, VitalRollupDay.count
+    ).where(VitalRollupDay.type_id.in_(columns)), VitalRollupDay))
+    for owner, value, type_id, total, count in vitals:
+        sum_column, count_column = columns[type_id]
+        day(owner, value).update({sum_column: total, count_column: count})
+    
+    await db.execute(for_user(delete(DailyStat), DailyStat))
+    rows = [{"user_id": owner, "day": value, **totals} for (owner, value), totals in days.items()]
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        await db.execute(insert(db, DailyStat).values(rows[start:start + INSERT_CHUNK_SIZE]))
+    return len(rows)
@@ -0,0 +1,99 @@
+from collections import defaultdict
+from typing import Dict, List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.activity import Activity
+from app.models.change_log import ChangeLogEntry
+from app.models.event import Event
+from app.models.goal import Goal
+from app.models.meal import Meal
+from app.models.step_summary import StepSummary
+from app.models.task import Task
+from app.models.vital import Vital
+from app.models.vital_chunk import VitalChunk
+from app.schemas.sync import SyncDeleted, SyncResponse
+from app.schemas.vital import VitalResponse
+from app.services.change_log import VITAL_CHUNKS
+from app.services.collection_versions import ACTIVITIES, EVENTS, GOALS, MEALS, STEPS, TASKS, VITALS
+from app.services.vital_chunks import chunk_vitals
+from app.services.vital_types import vital_types
+
+# Collections returned as their rows (SyncChanges field name -> model)
+ROW_MODELS = {
+    TASKS: Task,
+    EVENTS: Event,
+    MEALS: Meal,
+    STEPS: StepSummary,
+    ACTIVITIES: Activity,
+    GOALS: Goal,
+}
+
+# Bound parameters per IN (...) list, well below SQLite's limit
+_BATCH_SIZE = 500
+
+
+async def _load(db: AsyncSession, model, user_id: int, ids: List[int]) -> List:
+    records = []
+    for start in range(0, len(ids), _BATCH_SIZE):
+        records.extend((await db.scalars(select(model).where(
+            model.user_id == user_id,
+            model.id.in_(ids[start:start + _BATCH_SIZE])
+        ).order_by(model.id))).all())
+    return records
+
+
+async def read_changes(db: AsyncSession, user_id: int, since: int, limit: int) -> SyncResponse:
+    """
+    Records changed after the sync token `since`, at most `limit` change log
+    entries per page. Every record has one log entry (its latest change), so
+    a page holds each changed record once, in its current state, and deleted
+    records as tombstones. A changed vitals chunk returns all of its samples.
+    """
+    entries = (await db.execute(
+        select(ChangeLogEntry.id, ChangeLogEntry.collection, ChangeLogEntry.record_id, ChangeLogEntry.deleted)
+        .where(ChangeLogEntry.user_id == user_id, ChangeLogEntry.id > since)
+        .order_by(ChangeLogEntry.id)
+        .limit(limit + 1)
+    )).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    
+    changed: Dict[str, List[int]] = defaultdict(list)
+    deleted: Dict[str, List[int]] = defaultdict(list)
+    for entry in entries:
+        (deleted if entry.deleted else changed)[entry.collection].append(entry.record_id)
+    unexpected = set(deleted) - set(SyncDeleted.model_fields)
+    if unexpected:
+        # The response has nowhere to put them; a client would silently keep the records
+        raise ValueError(f"Cannot sync tombstones of {', '.join(sorted(unexpected))}")
+    
+    changes = {}
+    for collection, model in ROW_MODELS.items():
+        if changed[collection]:
+            changes[collection] = await _load(db, model, user_id, changed[collection])
+    
+    vitals = []
+    for vital in await _load(db, Vital, user_id, changed[VITALS]):
+        info = await vital_types.get_by_id(db, vital.type_id)
+        vitals.append(VitalResponse(
+            id=vital.id,
+            user_id=vital.user_id,
+            type=info.name,
+            value=vital.value,
+            unit=info.unit,
+            recorded_at=vital.recorded_at,
+            client_sample_id=vital.client_sample_id,
+            created_at=vital.created_at
+        ))
+    for chunk in await _load(db, VitalChunk, user_id, changed[VITAL_CHUNKS]):
+        vitals.extend(chunk_vitals(chunk, await vital_types.get_by_id(db, chunk.type_id)))
+    changes[VITALS] = vitals
+    
+    return SyncResponse.model_validate({
+        "changes": changes,
+        "deleted": deleted,
+        "next_token": str(entries[-1].id if entries else since),
+        "has_more": has_more
+    }, from_attributes=True)
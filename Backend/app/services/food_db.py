@@ -0,0 +1,308 @@
+import csv
+import logging
+import os
+import re
+import sqlite3
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.nutrition")
+
+# Bundled food composition data: per-serving macros of common foods
+FOODS_CSV = Path(__file__).resolve().parent.parent / "data" / "foods.csv"
+
+# Names fetched per misspelled query word and re-ranked by similarity()
+CANDIDATES = 32
+
+# Grams per unit of a quantity
+_GRAMS = {
+    "g": 1, "gram": 1, "grams": 1, "ml": 1, "kg": 1000,
+    "oz": 28.35, "ounce": 28.35, "ounces": 28.35, "lb": 453.6, "lbs": 453.6,
+}
+# Teaspoons per unit of volume (units are singular, see _unit())
+_TEASPOONS = {"tsp": 1, "tbsp": 3, "cup": 48}
+_UNIT_ALIASES = {"tablespoon": "tbsp", "tbs": "tbsp", "teaspoon": "tsp"}
+# Serving units that describe one whole item of the food ("1 medium" banana)
+_ITEM_UNITS = {"medium", "large", "small", "piece", "fruit", "serving"}
+_QUANTITY = re.compile(r"\s*(\d+(?:\.\d+)?)(?:\s*/\s*(\d+))?\s*([a-z]+)?")
+
+
+class FoodMatch(NamedTuple):
+    name: str
+    serving: str  # e.g. "1 cup cooked"
+    serving_grams: float
+    calories: float
+    carbs: float
+    protein: float
+    fat: float
+    score: float  # similarity of the query to the food's name or alias, 0 to 1
+
+
+def normalize(text: str) -> str:
+    """Lower-case text with everything but letters and digits collapsed to single spaces."""
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+def _bigrams(word: str) -> FrozenSet[str]:
+    padded = f" {word} "
+    return frozenset(padded[i:i + 2] for i in range(len(padded) - 1))
+
+
+@lru_cache(maxsize=4096)
+def _features(text: str) -> Tuple[Tuple[FrozenSet[str], ...], FrozenSet[str]]:
+    # Bigrams of each word, and of the whole text without spaces
+    return tuple(_bigrams(word) for word in text.split()), _bigrams(text.replace(" ", ""))
+
+
+def _dice(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def similarity(query: str, name: str) -> float:
+    """
+    Fuzzy match score of two normalized strings, 0 to 1. Words are compared
+    by bigram Dice coefficient (tolerating typos); the score weighs how well
+    name's words are found in the query over how much of the query they
+    explain, so "chiken salad" scores higher for "chicken salad" than for
+    "salad". Spelling variants of compound words ("cheese burger") are
+    compared without spaces, and a name found verbatim in the query gets a
+    small bonus.
+    """
+    query_words, query_compact = _features(query)
+    name_words, name_compact = _features(name)
+    if not query_words or not name_words:
+        return 0.0
+    name_found = [0.0] * len(name_words)
+    query_found = 0.0
+    for a in query_words:
+        best = 0.0
+        for j, b in enumerate(name_words):
+            score = _dice(a, b)
+            best = max(best, score)
+            name_found[j] = max(name_found[j], score)
+        query_found += best
+    score = 0.6 * sum(name_found) / len(name_words) + 0.4 * query_found / len(query_words)
+    if f" {name} " in f" {query} ":
+        score += 0.05
+    return min(1.0, max(score, _dice(query_compact, name_compact)))
+
+
+def _unit(word: str) -> str:
+    # Singular, abbreviated form of a unit: "slices" -> "slice", "tablespoons" -> "tbsp"
+    if word.endswith("ies"):
+        word = word[:-3] + "y"
+    elif word.endswith(("ches", "shes", "sses", "xes")):
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    return _UNIT_ALIASES.get(word, word)
+
+
+def _amount(text: str) -> Optional[Tuple[float, Optional[str]]]:
+    # Leading number ("2", "1/2", "0.5") and the word after it, if any
+    match = _QUANTITY.match(text.lower())
+    if match is None:
+        return None
+    return float(match[1]) / (float(match[2] or 1) or 1), match[3]
+
+
+def servings(quantity: Optional[str], serving: str, serving_grams: float) -> float:
+    """
+    Number of servings (e.g. "6 wings", "2 tbsp") in a quantity: a weight
+    ("150g") relative to the serving's weight; the serving's unit ("3 wings")
+    or a volume convertible to it ("1 cup") relative to its amount; a bare
+    count ("2") in the serving's items, or in servings if the serving is a
+    measure; other items ("2 bananas") of a serving of one item ("1 medium").
+    1 without a leading number or for units that cannot be compared.
+    """
+    parsed = _amount(quantity or "")
+    if parsed is None:
+        return 1.0
+    amount, word = parsed
+    grams = _GRAMS.get(word or "")
+    if grams is not None and serving_grams:
+        return amount * grams / serving_grams
+    
+    serving_amount, serving_word = _amount(serving) or (1.0, None)
+    serving_unit = _unit(serving_word) if serving_word else None
+    measured = serving_unit in _TEASPOONS or serving_unit in _GRAMS
+    if word is None:
+        return amount if measured or not serving_amount else amount / serving_amount
+    unit = _unit(word)
+    if unit == serving_unit and serving_amount:
+        return amount / serving_amount
+    if unit in _TEASPOONS and serving_unit in _TEASPOONS and serving_amount:
+        return amount * _TEASPOONS[unit] / (serving_amount * _TEASPOONS[serving_unit])
+    if serving_unit in _ITEM_UNITS and unit not in _TEASPOONS and serving_amount:
+        return amount / serving_amount
+    return 1.0
+
+
+def build_food_db(source: Path, path: Path) -> int:
+    """
+    Build the lookup index at path from the food composition CSV: a foods
+    table and an FTS5 trigram index over their names and aliases. The file
+    is written next to path and renamed into place, so concurrent builds and
+    open readers are safe. Returns the number of foods.
+    """
+    with open(source, newline="", encoding="utf-8") as f:
+        foods = list(csv.DictReader(f))
+    
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.unlink(missing_ok=True)
+    db = sqlite3.connect(tmp)
+    try:
+        db.executescript("""
+            CREATE TABLE foods (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                serving TEXT NOT NULL,
+                serving_grams REAL NOT NULL,
+                calories REAL NOT NULL,
+                carbs REAL NOT NULL,
+                protein REAL NOT NULL,
+                fat REAL NOT NULL
+            );
+            CREATE VIRTUAL TABLE food_names USING fts5(name, food_id UNINDEXED, tokenize='trigram');
+        """)
+        for food_id, food in enumerate(foods, 1):
+            db.execute("INSERT INTO foods VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (
+                food_id, food["name"], food["serving"], float(food["serving_grams"]), float(food["calories"]),
+                float(food["carbs"]), float(food["protein"]), float(food["fat"])
+            ))
+            names = [food["name"], *filter(None, food["aliases"].split(";"))]
+            db.executemany(
+                "INSERT INTO food_names (name, food_id) VALUES (?, ?)",
+                [(normalize(name), food_id) for name in names]
+            )
+        db.execute("INSERT INTO food_names (food_names) VALUES ('optimize')")
+        db.commit()
+        db.execute("VACUUM")
+    finally:
+        db.close()
+    os.replace(tmp, path)
+    return len(foods)
+
+
+class FoodDatabase:
+    """
+    Bundled food composition data, looked up by fuzzy name match. The index
+    is built ahead of time (python -m app.commands.build_food_db) and opened
+    read-only, immutable and memory-mapped. Lookups are synchronous and take
+    well under a millisecond.
+    
+    If the index is missing or cannot be opened (e.g. SQLite without FTS5)
+    lookups find nothing, and callers fall back to the API or generic values.
+    """
+    
+    def __init__(self, path: Optional[str] = None, source: Path = FOODS_CSV):
+        self.source = source
+        self.path = Path(path) if path else source.with_suffix(".db")
+        self.lookups = 0
+        self.matches = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._unavailable = False
+    
+    def open(self) -> None:
+        """Open the index if it exists; never builds it (that would block startup and write to the install)."""
+        if self._db is not None or self._unavailable:
+            return
+        try:
+            if not self.path.exists():
+                logger.warning(
+                    "Food database %s not found; run python -m app.commands.build_food_db to build it", self.path
+                )
+                self._unavailable = True
+                return
+            if self.source.exists() and self.path.stat().st_mtime < self.source.stat().st_mtime:
+                logger.warning("Food database %s is older than %s; rebuild it", self.path, self.source)
+            db = sqlite3.connect(f"{self.path.as_uri()}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+            db.execute(f"PRAGMA mmap_size={int(settings.FOOD_DB_MMAP_SIZE)}")
+            db.execute("SELECT 1 FROM food_names LIMIT 1")
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Food database unavailable: %s", e)
+            self._unavailable = True
+            return
+        self._db = db
+    
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+    
+    def _names(self, terms: Iterable[str], limit: Optional[int] = None) -> List[tuple]:
+        # Names (with their food) containing any of the terms; with a limit, the best ranked
+        sql = (
+            "SELECT food_names.name, foods.name, serving, serving_grams, calories, carbs, protein, fat "
+            "FROM food_names JOIN foods ON foods.id = food_names.food_id WHERE food_names MATCH ?"
+        )
+        params: list = [" OR ".join(f'"{term}"' for term in terms)]
+        if limit is not None:
+            sql += " ORDER BY rank LIMIT ?"
+            params.append(limit)
+        return self._db.execute(sql, params).fetchall()
+    
+    def match(self, food_name: str, min_score: float = 0.0) -> Optional[FoodMatch]:
+        """The food whose name or an alias is most similar to food_name, if it scores at least min_score."""
+        self.open()
+        query = normalize(food_name)
+        # The trigram index only matches terms of three or more characters
+        words = {word for word in query.split() if len(word) >= 3}
+        if self._db is None or not words:
+            return None
+    
+        # Candidates: names containing a query word, and for words no name
+        # contains (likely misspelled) the names sharing most of their trigrams
+        rows = self._names(words)
+        unmatched = [word for word in words if not any(word in row[0] for row in rows)]
+        if unmatched:
+            trigrams = {word[i:i + 3] for word in unmatched for i in range(len(word) - 2)}
+            rows += self._names(trigrams, CANDIDATES)
+    
+        best = None
+        for name, *food in rows:
+            score = similarity(query, name)
+            if best is None or score > best.score:
+                best = FoodMatch(*food, score)
+        if best is None or best.score < min_score:
+            return None
+        return best
+    
+    def lookup(self, food_name: str, quantity: Optional[str], min_score: float) -> Optional[Dict[str, Any]]:
+        """
+        Nutrition data of the best match for food_name, scaled to quantity,
+        in the format of NutritionAPIClient.get_nutrition_data(). None if no
+        food scores at least min_score.
+        """
+        self.lookups += 1
+        match = self.match(food_name, min_score)
+        if match is None:
+            return None
+        self.matches += 1
+        factor = servings(quantity, match.serving, match.serving_grams)
+        return {
+            "calories": round(match.calories * factor, 1),
+            "carbs": round(match.carbs * factor, 1),
+            "protein": round(match.protein * factor, 1),
+            "fat": round(match.fat * factor, 1),
+            "raw_data": {
+                "source": "food_db",
+                "food_name": food_name,
+                "quantity": quantity,
+                "match": match.name,
+                "match_score": round(match.score, 3),
+                "serving": match.serving,
+                "servings": round(factor, 3)
+            }
+        }
+    
+    def stats(self) -> Dict[str, Any]:
+        """Whether the index is open, and lookup counters."""
+        return {"open": self._db is not None, "lookups": self.lookups, "matches": self.matches}
+
+
+# Singleton instance
+food_db = FoodDatabase(settings.FOOD_DB_PATH or None)
@@ -0,0 +1,236 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.dialect import insert
+from app.models.activity import Activity
+from app.models.step_summary import StepSummary
+from app.models.vital import Vital
+from app.schemas.health_sync import (
+    ActivitySyncItem,
+    HealthSyncResponse,
+    StepSyncItem,
+    VitalStreamError,
+    VitalStreamResponse,
+)
+from app.schemas.vital import VitalCreate
+from app.services.change_log import record_changes
+from app.services.collection_versions import ACTIVITIES, STEPS, VITALS
+from app.services.daily_stats import activity_delta, apply_deltas, set_steps, vital_deltas
+from app.services.vital_chunks import store_chunked_vitals
+from app.services.vital_rollups import update_vital_rollups
+from app.services.vital_types import UnitConversionError, VitalSample, vital_types
+
+# Rows per INSERT statement; keeps bound parameters well below SQLite's limit
+INSERT_CHUNK_SIZE = 500
+
+# Per-line errors reported back to a streaming client
+MAX_STREAM_ERRORS = 20
+
+
+def _chunks(rows: List[Dict[str, Any]], size: int = INSERT_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _rows(items: Sequence[Any], user_id: int) -> List[Dict[str, Any]]:
+    return [{**item.model_dump(exclude={"kind"}), "user_id": user_id} for item in items]
+
+
+async def upsert_step_summaries(db: AsyncSession, user_id: int, items: Sequence[StepSyncItem]) -> int:
+    """Upsert daily step totals; the last entry wins when a batch repeats a date."""
+    latest = {item.date: item for item in items}
+    rows = _rows(list(latest.values()), user_id)
+    ids: List[int] = []
+    for chunk in _chunks(rows):
+        stmt = insert(db, StepSummary).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[StepSummary.user_id, StepSummary.date],
+            set_={"step_count": stmt.excluded.step_count, "source": stmt.excluded.source}
+        ).returning(StepSummary.id)
+        ids.extend((await db.scalars(stmt)).all())
+    await record_changes(db, user_id, STEPS, ids)
+    await set_steps(db, user_id, {item.date: item.step_count for item in latest.values()})
+    return len(rows)
+
+
+async def _insert_new(db: AsyncSession, model, rows: List[Dict[str, Any]], *returning) -> List[Any]:
+    """
+    Insert rows, skipping client sample IDs that are already stored.
+    Returns the `returning` columns of the rows actually inserted.
+    """
+    inserted: List[Any] = []
+    for chunk in _chunks(rows):
+        stmt = insert(db, model).values(chunk).on_conflict_do_nothing(
+            index_elements=[model.user_id, model.client_sample_id]
+        ).returning(*returning)
+        inserted.extend((await db.execute(stmt)).all())
+    return inserted
+
+
+async def store_vital_samples(db: AsyncSession, user_id: int, samples: Sequence[VitalSample]) -> int:
+    """
+    Store normalized vitals (multi-row inserts, or chunks in "chunked" storage
+    mode), update their rollups and daily stats and log the changes. Returns
+    samples stored.
+    """
+    if settings.VITALS_STORAGE_MODE == "chunked":
+        stored = await store_chunked_vitals(db, user_id, samples)
+    else:
+        rows = [{**sample._asdict(), "user_id": user_id} for sample in samples]
+        inserted = await _insert_new(db, Vital, rows, Vital.id, Vital.type_id, Vital.value, Vital.recorded_at)
+        await record_changes(db, user_id, VITALS, [row.id for row in inserted])
+        stored = [(row.type_id, row.value, row.recorded_at) for row in inserted]
+    await update_vital_rollups(db, user_id, stored)
+    await apply_deltas(db, user_id, await vital_deltas(db, stored))
+    return len(stored)
+
+
+async def insert_vitals(db: AsyncSession, user_id: int, items: Sequence[VitalCreate]) -> int:
+    """
+    Normalize (type id, canonical unit) and store vitals. Returns samples stored.
+    Raises UnitConversionError before writing anything if a unit is not convertible.
+    """
+    return await store_vital_samples(db, user_id, await vital_types.normalize_all(db, items))
+
+
+async def insert_activities(db: AsyncSession, user_id: int, items: Sequence[ActivitySyncItem]) -> int:
+    """Insert activities with multi-row inserts. Returns rows inserted."""
+    inserted = await _insert_new(
+        db, Activity, _rows(items, user_id),
+        Activity.id, Activity.datetime, Activity.duration_minutes, Activity.calories_burned
+    )
+    await record_changes(db, user_id, ACTIVITIES, [row.id for row in inserted])
+    await apply_deltas(db, user_id, [activity_delta(row) for row in inserted])
+    return len(inserted)
+
+
+async def sync_health_data(db: AsyncSession, user_id: int, items: Sequence[Any]) -> HealthSyncResponse:
+    """
+    Write a mixed batch of steps, vitals and activities in one transaction.
+    Samples whose client_sample_id is already stored are counted as duplicates,
+    so a retried batch is a no-op.
+    """
+    steps = [item for item in items if item.kind == "steps"]
+    vitals = [item for item in items if item.kind == "vital"]
+    activities = [item for item in items if item.kind == "activity"]
+    
+    result = HealthSyncResponse()
+    samples = await vital_types.normalize_all(db, vitals)
+    result.steps = await upsert_step_summaries(db, user_id, steps)
+    result.vitals = await store_vital_samples(db, user_id, samples)
+    result.activities = await insert_activities(db, user_id, activities)
+    await db.commit()
+    
+    result.duplicates = len(vitals) + len(activities) - result.vitals - result.activities
+    return result
+
+
+class LineTooLongError(ValueError):
+    """An NDJSON line exceeded the configured maximum size."""
+
+
+async def _ndjson_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[bytes]:
+    """Split a byte stream into lines without holding more than one partial line."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in [*lines, buffer]:
+            if len(line) > max_line_bytes:
+                raise LineTooLongError(f"Line longer than {max_line_bytes} bytes")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+async def ingest_vitals_stream(
+    db: AsyncSession,
+    user_id: int,
+    chunks: AsyncIterator[bytes],
+    batch_size: int,
+    flush_seconds: float,
+    max_line_bytes: int
+) -> VitalStreamResponse:
+    """
+    Ingest an NDJSON stream of vitals (one VitalCreate object per line).
+    Lines are parsed as they arrive and committed in batches of batch_size
+    samples or every flush_seconds, whichever comes first, also while the
+    client sends nothing. At most one chunk is read ahead while a batch is
+    written, so a client that sends faster than the database can absorb is
+    slowed down by TCP flow control. Invalid lines are rejected
+    individually; committed batches are kept.
+    """
+    result = VitalStreamResponse()
+    batch: List[VitalSample] = []
+    batch_started = time.monotonic()
+    resolved: Dict[str, Any] = {}
+    
+    async def flush() -> None:
+        inserted = await store_vital_samples(db, user_id, batch)
+        await db.commit()
+        result.accepted += inserted
+        result.duplicates += len(batch) - inserted
+        result.batches += 1
+        batch.clear()
+    
+    def reject(line_number: int, detail: str) -> None:
+        result.rejected += 1
+        if len(result.errors) < MAX_STREAM_ERRORS:
+            result.errors.append(VitalStreamError(line=line_number, detail=detail))
+    
+    async def handle(line_number: int, line: bytes) -> bool:
+        # Parse one line into the batch; True when the batch is due for writing
+        nonlocal batch_started
+        if not line.strip():
+            return False
+        try:
+            vital = VitalCreate.model_validate_json(line)
+        except ValidationError as e:
+            error = e.errors()[0]
+            location = ".".join(str(part) for part in error["loc"])
+            reject(line_number, f"{location}: {error['msg']}" if location else error["msg"])
+            return False
+        try:
+            batch.append(await vital_types.normalize(db, vital, resolved))
+        except UnitConversionError as e:
+            reject(line_number, str(e))
+            return False
+    
+        if len(batch) == 1:
+            batch_started = time.monotonic()
+        return len(batch) >= batch_size or time.monotonic() - batch_started >= flush_seconds
+    
+    lines = _ndjson_lines(chunks, max_line_bytes).__aiter__()
+    next_line: Optional[asyncio.Future] = None
+    line_number = 0
+    try:
+        while True:
+            if next_line is None:
+                next_line = asyncio.ensure_future(lines.__anext__())
+            # A partial batch is flushed when its time is up, even if no line arrives
+            timeout = max(0.0, batch_started + flush_seconds - time.monotonic()) if batch else None
+            done, _ = await asyncio.wait({next_line}, timeout=timeout)
+            if not done:
+                await flush()
+                continue
+            line_future, next_line = next_line, None
+            try:
+                line = line_future.result()
+            except StopAsyncIteration:
+                break
+            line_number += 1
+            if await handle(line_number, line):
+                await flush()
+    finally:
+        if next_line is not None:
+            next_line.cancel()
+    
+    if batch:
+        await flush()
+    return result
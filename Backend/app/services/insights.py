@@ -1,49 +1,65 @@
 from datetime import datetime, timedelta, date
-from typing import List
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, select, delete
 
 from app.models.user import User
 from app.models.step_summary import StepSummary
-from app.models.activity import Activity
-from app.models.meal import Meal
-from app.models.vital import Vital
+from app.models.daily_stat import DailyStat
 from app.models.insight import Insight, InsightCategory
 from app.models.goal import Goal
+from app.services.change_log import record_changes
+from app.services.collection_versions import GOALS
+from app.services.daily_stats import get_daily_stats
 
 
 class InsightsEngine:
     """
     Rule-based insights and suggestions engine.
     Analyzes user's health data and generates personalized insights.
+    Recent activity is read from the daily stats of the lookback window.
     """
     
-    def __init__(self, db: Session, user: User):
+    def __init__(self, db: AsyncSession, user: User, goal: Optional[Goal] = None):
         self.db = db
         self.user = user
+        self.goal = goal
         self.days_lookback = 7
+        self._stats: Optional[List[DailyStat]] = None
+    
+    async def _recent_stats(self) -> List[DailyStat]:
+        """Daily stats of the last days_lookback days and today, loaded once."""
+        if self._stats is None:
+            end_date = date.today()
+            start_date = end_date - timedelta(days=self.days_lookback)
+            self._stats = await get_daily_stats(self.db, self.user.id, start_date, end_date)
+        return self._stats
         
     async def generate_insights(self) -> List[Insight]:
         """Generate new insights for the user based on recent activity."""
         insights = []
         
-        # Get user goals
-        goal = self.db.query(Goal).filter(Goal.user_id == self.user.id).first()
+        # Get user goals (usually already loaded with the user context)
+        goal = self.goal
+        if goal is None:
+            goal = await self.db.scalar(select(Goal).where(Goal.user_id == self.user.id))
         if not goal:
             # Create default goals if none exist
             goal = Goal(user_id=self.user.id)
             self.db.add(goal)
-            self.db.commit()
+            await self.db.flush()
+            await record_changes(self.db, self.user.id, GOALS, [goal.id])
+            await self.db.commit()
         
         # Clear old undismissed insights (older than 24 hours)
         yesterday = datetime.utcnow() - timedelta(days=1)
-        self.db.query(Insight).filter(
+        await self.db.execute(delete(Insight).where(
             and_(
                 Insight.user_id == self.user.id,
                 Insight.is_dismissed == False,
                 Insight.created_at < yesterday
             )
-        ).delete()
+        ))
         
         # Generate insights
         insights.extend(await self._analyze_steps(goal))
@@ -55,7 +71,7 @@ class InsightsEngine:
         for insight in insights:
             self.db.add(insight)
         
-        self.db.commit()
+        await self.db.commit()
         
         return insights
     
@@ -65,15 +81,7 @@ class InsightsEngine:
         
         # Get last 7 days of steps
         end_date = date.today()
-        start_date = end_date - timedelta(days=self.days_lookback)
-        
-        steps = self.db.query(StepSummary).filter(
-            and_(
-                StepSummary.user_id == self.user.id,
-                StepSummary.date >= start_date,
-                StepSummary.date <= end_date
-            )
-        ).all()
+        steps = [s for s in await self._recent_stats() if s.steps is not None]
         
         if not steps:
             insights.append(Insight(
@@ -84,7 +92,7 @@ class InsightsEngine:
             return insights
         
         # Calculate average steps
-        avg_steps = sum(s.step_count for s in steps) / len(steps)
+        avg_steps = sum(s.steps for s in steps) / len(steps)
         
         # Check if below goal
         if avg_steps < goal.daily_step_goal * 0.8:
@@ -102,8 +110,8 @@ class InsightsEngine:
             ))
         
         # Check for inactivity
-        recent_steps = [s for s in steps if s.date >= end_date - timedelta(days=3)]
-        if recent_steps and all(s.step_count < 5000 for s in recent_steps):
+        recent_steps = [s for s in steps if s.day >= end_date - timedelta(days=3)]
+        if recent_steps and all(s.steps < 5000 for s in recent_steps):
             insights.append(Insight(
                 user_id=self.user.id,
                 category=InsightCategory.OUTDOOR,
@@ -117,16 +125,9 @@ class InsightsEngine:
         insights = []
         
         # Get last 7 days of meals
-        start_date = datetime.utcnow() - timedelta(days=self.days_lookback)
-        
-        meals = self.db.query(Meal).filter(
-            and_(
-                Meal.user_id == self.user.id,
-                Meal.datetime >= start_date
-            )
-        ).all()
+        meal_days = [s for s in await self._recent_stats() if s.meal_count > 0]
         
-        if not meals:
+        if not meal_days:
             insights.append(Insight(
                 user_id=self.user.id,
                 category=InsightCategory.DIET,
@@ -135,13 +136,10 @@ class InsightsEngine:
             return insights
         
         # Calculate daily averages
-        days_with_data = len(set(m.datetime.date() for m in meals))
-        if days_with_data == 0:
-            return insights
-        
-        avg_calories = sum(m.calories for m in meals) / days_with_data
-        avg_carbs = sum(m.carbs for m in meals) / days_with_data
-        avg_protein = sum(m.protein for m in meals) / days_with_data
+        days_with_data = len(meal_days)
+        avg_calories = sum(s.calories for s in meal_days) / days_with_data
+        avg_carbs = sum(s.carbs for s in meal_days) / days_with_data
+        avg_protein = sum(s.protein for s in meal_days) / days_with_data
         
         # Calorie insights
         if avg_calories > goal.daily_calorie_goal * 1.15:
@@ -174,20 +172,13 @@ class InsightsEngine:
         insights = []
         
         # Get last 7 days of activities
-        start_date = datetime.utcnow() - timedelta(days=self.days_lookback)
-        
-        activities = self.db.query(Activity).filter(
-            and_(
-                Activity.user_id == self.user.id,
-                Activity.datetime >= start_date
-            )
-        ).all()
+        activity_count = sum(s.activity_count for s in await self._recent_stats())
         
-        if not activities:
+        if not activity_count:
             # Check if they have step data but no logged activities
-            step_data = self.db.query(StepSummary).filter(
+            step_data = await self.db.scalar(select(StepSummary).where(
                 StepSummary.user_id == self.user.id
-            ).first()
+            ).limit(1))
             
             if step_data:
                 insights.append(Insight(
@@ -199,7 +190,7 @@ class InsightsEngine:
             return insights
         
         # Check workout frequency
-        if len(activities) < 3:
+        if activity_count < 3:
             insights.append(Insight(
                 user_id=self.user.id,
                 category=InsightCategory.MOVEMENT,
@@ -208,24 +199,22 @@ class InsightsEngine:
         
         return insights
     
+    async def _average_vital(self, sum_column: str, count_column: str) -> Optional[float]:
+        """Average of a vital over the lookback window, from the daily stats."""
+        stats = await self._recent_stats()
+        count = sum(getattr(s, count_column) for s in stats)
+        if not count:
+            return None
+        return sum(getattr(s, sum_column) for s in stats) / count
+    
     async def _analyze_vitals(self, goal: Goal) -> List[Insight]:
         """Analyze health vitals and generate insights."""
         insights = []
         
         # Get last 7 days of sleep data
-        start_date = datetime.utcnow() - timedelta(days=self.days_lookback)
-        
-        sleep_vitals = self.db.query(Vital).filter(
-            and_(
-                Vital.user_id == self.user.id,
-                Vital.type == "sleep_duration",
-                Vital.recorded_at >= start_date
-            )
-        ).all()
+        avg_sleep = await self._average_vital("sleep_sum", "sleep_count")
         
-        if sleep_vitals:
-            avg_sleep = sum(v.value for v in sleep_vitals) / len(sleep_vitals)
-            
+        if avg_sleep is not None:
             if avg_sleep < goal.sleep_hours_goal * 0.85:
                 insights.append(Insight(
                     user_id=self.user.id,
@@ -234,17 +223,9 @@ class InsightsEngine:
                 ))
         
         # Check heart rate (if available)
-        hr_vitals = self.db.query(Vital).filter(
-            and_(
-                Vital.user_id == self.user.id,
-                Vital.type == "heart_rate",
-                Vital.recorded_at >= start_date
-            )
-        ).all()
+        avg_hr = await self._average_vital("heart_rate_sum", "heart_rate_count")
         
-        if hr_vitals:
-            avg_hr = sum(v.value for v in hr_vitals) / len(hr_vitals)
-            
+        if avg_hr is not None:
             # Resting heart rate insights (very basic)
             if avg_hr > 80:
                 insights.append(Insight(
@@ -255,27 +236,27 @@ class InsightsEngine:
         
         return insights
     
-    def get_current_insights(self) -> List[Insight]:
+    async def get_current_insights(self) -> List[Insight]:
         """Get current undismissed insights for the user."""
-        return self.db.query(Insight).filter(
+        return (await self.db.scalars(select(Insight).where(
             and_(
                 Insight.user_id == self.user.id,
                 Insight.is_dismissed == False
             )
-        ).order_by(Insight.created_at.desc()).all()
+        ).order_by(Insight.created_at.desc()))).all()
     
-    def dismiss_insight(self, insight_id: int) -> bool:
+    async def dismiss_insight(self, insight_id: int) -> bool:
         """Mark an insight as dismissed."""
-        insight = self.db.query(Insight).filter(
+        insight = await self.db.scalar(select(Insight).where(
             and_(
                 Insight.id == insight_id,
                 Insight.user_id == self.user.id
             )
-        ).first()
+        ))
         
         if insight:
             insight.is_dismissed = True
-            self.db.commit()
+            await self.db.commit()
             return True
         
         return False
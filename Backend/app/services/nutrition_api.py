@@ -1,6 +1,12 @@
-import httpx
-from typing import Optional, Dict, Any
+import asyncio
+import importlib.util
+import logging
+from typing import Optional, Dict, Any, List, Sequence, Tuple
 from app.core.config import settings
+from app.services.food_db import food_db
+from app.services.nutrition_cache import nutrition_cache
+
+logger = logging.getLogger("app.nutrition")
 
 
 class NutritionAPIClient:
@@ -11,15 +17,84 @@ class NutritionAPIClient:
     - Edamam
     - USDA FoodData Central
     - etc.
+    
+    Requests share one pooled HTTP client (keep-alive, HTTP/2 when the h2
+    package is installed), opened by the application lifespan.
     """
     
     def __init__(self):
         self.api_key = settings.NUTRITION_API_KEY
         self.base_url = settings.NUTRITION_API_URL
+        self.http2 = False
+        self.requests = 0
+        self.errors = 0
+        self.pool_timeouts = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._http = None  # httpx.AsyncClient
+    
+    def open(self, transport=None) -> None:
+        """
+        Create the shared HTTP client with timeouts and pool limits from
+        Settings. transport replaces the network transport (e.g. a stub in tests).
+        """
+        if self._http is not None:
+            return
+        # Imported here so that the HTTP stack is only loaded when the API is used
+        import httpx
+        
+        if transport is None:
+            self.http2 = settings.NUTRITION_HTTP2 and importlib.util.find_spec("h2") is not None
+            transport = httpx.AsyncHTTPTransport(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=settings.NUTRITION_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.NUTRITION_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.NUTRITION_HTTP_KEEPALIVE_EXPIRY_SECONDS
+                )
+            )
+        # Adapt the headers based on your chosen API (these are Nutritionix's)
+        self._http = httpx.AsyncClient(
+            base_url=self.base_url,
+            transport=transport,
+            timeout=httpx.Timeout(
+                settings.NUTRITION_HTTP_READ_TIMEOUT_SECONDS,
+                connect=settings.NUTRITION_HTTP_CONNECT_TIMEOUT_SECONDS,
+                pool=settings.NUTRITION_HTTP_POOL_TIMEOUT_SECONDS
+            ),
+            headers={"x-app-id": self.api_key, "x-app-key": self.api_key}
+        )
+    
+    async def close(self) -> None:
+        """Close the shared HTTP client and its pooled connections."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Pool limit and request counters of the shared client: requests in
+        flight (several can share an HTTP/2 connection) and at peak, errors,
+        and pool_timeouts, the requests that found every connection busy for
+        the pool timeout.
+        """
+        return {
+            "open": self._http is not None,
+            "http2": self.http2,
+            "max_connections": settings.NUTRITION_HTTP_MAX_CONNECTIONS,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "pool_timeouts": self.pool_timeouts,
+        }
     
     async def get_nutrition_data(self, food_name: str, quantity: Optional[str] = None) -> Dict[str, Any]:
         """
         Fetch nutrition data for a food item.
+        Foods the bundled food database matches closely are answered without
+        calling the API. Upstream results (including unknown foods) are
+        cached, see NutritionCache.
         
         Args:
             food_name: Name or description of the food
@@ -28,40 +103,78 @@ class NutritionAPIClient:
         Returns:
             Dictionary with nutrition data including calories, carbs, protein, fat
         """
+        data = food_db.lookup(food_name, quantity, settings.FOOD_DB_MATCH_SCORE)
+        if data is not None:
+            return data
+        
         if not self.api_key:
-            # Return mock data if API key is not configured
+            # Return local estimates if API key is not configured
             return self._get_mock_nutrition_data(food_name, quantity)
         
         try:
-            # This is a generic implementation - adapt based on your chosen API
-            # Example for Nutritionix Natural Language API:
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "x-app-id": self.api_key,
-                    "x-app-key": self.api_key,
-                    "Content-Type": "application/json"
-                }
-                
-                query = f"{quantity} {food_name}" if quantity else food_name
-                
-                # Adapt this endpoint and payload based on your chosen API
-                response = await client.post(
-                    f"{self.base_url}/natural/nutrients",
-                    headers=headers,
-                    json={"query": query}
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return self._parse_nutrition_response(data)
-                else:
-                    # Fall back to mock data if API fails
-                    return self._get_mock_nutrition_data(food_name, quantity)
-                    
+            data = await nutrition_cache.get(food_name, quantity, self._fetch_nutrition_data)
         except Exception as e:
-            print(f"Error fetching nutrition data: {e}")
+            logger.warning("Error fetching nutrition data: %s", e)
             # Return mock data as fallback
             return self._get_mock_nutrition_data(food_name, quantity)
+        
+        if data is None:
+            # Unknown to the API
+            return self._get_mock_nutrition_data(food_name, quantity)
+        return data
+    
+    async def get_nutrition_data_many(self, foods: Sequence[Tuple[str, Optional[str]]]) -> List[Dict[str, Any]]:
+        """
+        Fetch nutrition data for several (food_name, quantity) pairs, in order.
+        Lookups run concurrently, at most MEAL_ITEM_MAX_CONCURRENT_LOOKUPS at a
+        time; identical ones are coalesced by the cache.
+        """
+        semaphore = asyncio.Semaphore(settings.MEAL_ITEM_MAX_CONCURRENT_LOOKUPS)
+        
+        async def lookup(food_name: str, quantity: Optional[str]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.get_nutrition_data(food_name, quantity)
+        
+        return list(await asyncio.gather(*(lookup(food_name, quantity) for food_name, quantity in foods)))
+    
+    async def _fetch_nutrition_data(self, food_name: str, quantity: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Look a food up upstream. Returns None if the API does not know it;
+        raises on failures (network errors, server errors).
+        """
+        # Imported here so that the HTTP stack is only loaded when the API is used
+        import httpx
+        
+        # Outside the application (e.g. scripts) the client is opened on first use
+        self.open()
+        
+        # This is a generic implementation - adapt based on your chosen API
+        # Example for Nutritionix Natural Language API:
+        query = f"{quantity} {food_name}" if quantity else food_name
+        
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            # Adapt this endpoint and payload based on your chosen API
+            response = await self._http.post("natural/nutrients", json={"query": query})
+            if response.status_code == 404:
+                return None
+            response.raise_for_status()
+        except httpx.PoolTimeout:
+            self.errors += 1
+            self.pool_timeouts += 1
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        
+        data = response.json()
+        if not data.get("foods"):
+            return None
+        return self._parse_nutrition_response(data)
     
     def _parse_nutrition_response(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Parse API response to standard format."""
@@ -81,37 +194,19 @@ class NutritionAPIClient:
     
     def _get_mock_nutrition_data(self, food_name: str, quantity: Optional[str] = None) -> Dict[str, Any]:
         """
-        Generate mock nutrition data when API is unavailable.
-        This provides reasonable estimates for testing/development.
+        Estimate nutrition data when API is unavailable or does not know the
+        food: the closest food of the bundled food database, scaled to the
+        quantity, or generic values if no food is close.
         """
-        # Simple mock data based on common foods
-        food_lower = food_name.lower()
-        
-        # Default values
-        calories = 200
-        carbs = 30
-        protein = 10
-        fat = 5
-        
-        # Rough estimates based on food type
-        if any(word in food_lower for word in ["salad", "vegetable", "lettuce"]):
-            calories, carbs, protein, fat = 50, 10, 2, 1
-        elif any(word in food_lower for word in ["chicken", "beef", "meat", "fish"]):
-            calories, carbs, protein, fat = 250, 0, 40, 10
-        elif any(word in food_lower for word in ["rice", "pasta", "bread", "potato"]):
-            calories, carbs, protein, fat = 300, 60, 8, 2
-        elif any(word in food_lower for word in ["burger", "pizza", "fries"]):
-            calories, carbs, protein, fat = 500, 50, 20, 25
-        elif any(word in food_lower for word in ["fruit", "apple", "banana", "orange"]):
-            calories, carbs, protein, fat = 80, 20, 1, 0
-        elif any(word in food_lower for word in ["yogurt", "milk", "cheese"]):
-            calories, carbs, protein, fat = 150, 15, 8, 5
+        data = food_db.lookup(food_name, quantity, settings.FOOD_DB_FALLBACK_SCORE)
+        if data is not None:
+            return data
         
         return {
-            "calories": calories,
-            "carbs": carbs,
-            "protein": protein,
-            "fat": fat,
+            "calories": 200,
+            "carbs": 30,
+            "protein": 10,
+            "fat": 5,
             "raw_data": {
                 "source": "mock",
                 "food_name": food_name,
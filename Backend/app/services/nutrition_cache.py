@@ -0,0 +1,184 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.db.dialect import insert
+from app.db.session import get_async_session_factory
+from app.models.nutrition_cache import NutritionCacheEntry
+
+logger = logging.getLogger("app.nutrition")
+
+# Upstream lookup of (food_name, quantity): nutrition data, or None if the
+# food is unknown upstream. Raises on transient failures, which are not cached.
+Fetch = Callable[[str, Optional[str]], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class CachedNutrition(NamedTuple):
+    fetched_at: datetime  # naive UTC
+    data: Optional[Dict[str, Any]]  # None: unknown upstream (negative entry)
+
+
+def cache_key(food_name: str, quantity: Optional[str] = None) -> str:
+    """Lookup key: quantity and food name, lower-cased with whitespace collapsed."""
+    def normalize(text: str) -> str:
+        return " ".join(text.lower().split())
+    
+    return f"{normalize(quantity or '')}|{normalize(food_name)}"
+
+
+class NutritionCache:
+    """
+    Cache of upstream nutrition lookups: a bounded in-memory LRU in front of
+    the nutrition_cache table, so entries survive restarts and are shared by
+    workers.
+    
+    Entries are fresh for ttl_seconds (negative_ttl_seconds for foods the
+    upstream did not find). For stale_seconds after that they are still
+    served while one background lookup per key refreshes them; older entries
+    are looked up before returning. Concurrent misses for the same key share
+    one upstream lookup.
+    """
+    
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float,
+        negative_ttl_seconds: float,
+        stale_seconds: float,
+        session_factory: Optional[async_sessionmaker] = None
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.session_factory = session_factory  # None: the application's session factory
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: "OrderedDict[str, CachedNutrition]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Task] = {}
+    
+    def _session(self) -> AsyncSession:
+        return (self.session_factory or get_async_session_factory())()
+    
+    def _remember(self, key: str, entry: CachedNutrition) -> None:
+        if self.max_size <= 0:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    async def _load(self, key: str) -> Optional[CachedNutrition]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+        async with self._session() as db:
+            row = await db.get(NutritionCacheEntry, key)
+        if row is None:
+            return None
+        entry = CachedNutrition(row.fetched_at, row.data if row.found else None)
+        self._remember(key, entry)
+        return entry
+    
+    async def _fetch(self, key: str, food_name: str, quantity: Optional[str], fetch: Fetch) -> CachedNutrition:
+        entry = CachedNutrition(datetime.utcnow(), await fetch(food_name, quantity))
+        self._remember(key, entry)
+        try:
+            async with self._session() as db:
+                stmt = insert(db, NutritionCacheEntry).values(
+                    key=key, found=entry.data is not None, data=entry.data, fetched_at=entry.fetched_at
+                )
+                await db.execute(stmt.on_conflict_do_update(
+                    index_elements=[NutritionCacheEntry.key],
+                    set_={
+                        "found": stmt.excluded.found,
+                        "data": stmt.excluded.data,
+                        "fetched_at": stmt.excluded.fetched_at,
+                    }
+                ))
+                await db.commit()
+        except Exception as e:
+            # The lookup succeeded; only sharing it with other workers failed
+            logger.warning("Storing nutrition data for %r failed: %s", key, e)
+        return entry
+    
+    def _lookup(self, key: str, food_name: str, quantity: Optional[str], fetch: Fetch) -> asyncio.Task:
+        # The upstream lookup of key in flight, started if there is none
+        task = self._in_flight.get(key)
+        if task is not None:
+            return task
+        task = asyncio.create_task(self._fetch(key, food_name, quantity, fetch))
+        self._in_flight[key] = task
+    
+        def done(task: asyncio.Task) -> None:
+            del self._in_flight[key]
+            if not task.cancelled() and task.exception() is not None:
+                logger.warning("Looking up nutrition data for %r failed: %s", key, task.exception())
+    
+        task.add_done_callback(done)
+        return task
+    
+    async def get(self, food_name: str, quantity: Optional[str], fetch: Fetch) -> Optional[Dict[str, Any]]:
+        """
+        Nutrition data for a food, from the cache or from fetch. Returns None
+        for foods the upstream does not know; fetch errors propagate on misses.
+        """
+        key = cache_key(food_name, quantity)
+        entry = await self._load(key)
+        if entry is not None:
+            age = (datetime.utcnow() - entry.fetched_at).total_seconds()
+            ttl = self.ttl_seconds if entry.data is not None else self.negative_ttl_seconds
+            if age < ttl:
+                self.hits += 1
+                return entry.data
+            if age < ttl + self.stale_seconds:
+                self.stale_hits += 1
+                self._lookup(key, food_name, quantity, fetch)
+                return entry.data
+    
+        if key in self._in_flight:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+        # Shielded: a cancelled request must not cancel a lookup others wait for
+        return (await asyncio.shield(self._lookup(key, food_name, quantity, fetch))).data
+    
+    async def close(self) -> None:
+        """Wait for lookups in flight (e.g. background refreshes) to finish."""
+        await asyncio.gather(*self._in_flight.values(), return_exceptions=True)
+    
+    def clear(self) -> None:
+        """Drop the in-memory entries and reset the counters (the table is kept)."""
+        self._entries.clear()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+    
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the in-memory size."""
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+        }
+
+
+# Singleton instance
+nutrition_cache = NutritionCache(
+    max_size=settings.NUTRITION_CACHE_MAX_SIZE,
+    ttl_seconds=settings.NUTRITION_CACHE_TTL_SECONDS,
+    negative_ttl_seconds=settings.NUTRITION_CACHE_NEGATIVE_TTL_SECONDS,
+    stale_seconds=settings.NUTRITION_CACHE_STALE_SECONDS
+)
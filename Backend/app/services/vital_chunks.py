@@ -0,0 +1,180 @@
+import struct
+import sys
+import zlib
+from array import array
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from operator import xor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.dialect import insert
+from app.models.vital_chunk import VitalChunk
+from app.services.change_log import VITAL_CHUNKS, record_changes
+from app.services.vital_rollups import Sample, to_utc_naive
+from app.services.vital_types import VitalSample, VitalTypeInfo
+
+CHUNK_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<BI")  # format version, sample count
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_micros(value: datetime) -> int:
+    """Microseconds since the Unix epoch (naive values are taken as UTC)."""
+    return (to_utc_naive(value) - _EPOCH) // _MICROSECOND
+
+
+def from_micros(value: int) -> datetime:
+    """Naive UTC datetime for microseconds since the Unix epoch."""
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def encode_samples(samples: Sequence[Tuple[int, float]]) -> bytes:
+    """
+    Pack (timestamp_us, value) samples, sorted by time, into a chunk blob.
+    Timestamps are stored as deltas and values as the XOR of consecutive
+    IEEE-754 bit patterns (lossless); both columns are then zlib-compressed.
+    Regular sampling intervals and slowly changing values leave mostly zero
+    bytes, which compress very well.
+    """
+    timestamps = array("q", (ts for ts, _ in samples))
+    value_bits = array("Q", array("d", (value for _, value in samples)).tobytes())
+    deltas = array("q", (b - a for a, b in zip([0] + timestamps[:-1].tolist(), timestamps)))
+    xors = array("Q", (b ^ a for a, b in zip([0] + value_bits[:-1].tolist(), value_bits)))
+    if sys.byteorder == "big":
+        deltas.byteswap()
+        xors.byteswap()
+    return _HEADER.pack(CHUNK_FORMAT_VERSION, len(samples)) + zlib.compress(deltas.tobytes() + xors.tobytes())
+
+
+def decode_samples(data: bytes) -> List[Tuple[int, float]]:
+    """Unpack a chunk blob into (timestamp_us, value) samples, oldest first."""
+    version, count = _HEADER.unpack_from(data)
+    if version != CHUNK_FORMAT_VERSION:
+        raise ValueError(f"Unsupported vital chunk format {version}")
+    payload = zlib.decompress(data[_HEADER.size:])
+    deltas = array("q", payload[:8 * count])
+    xors = array("Q", payload[8 * count:])
+    if sys.byteorder == "big":
+        deltas.byteswap()
+        xors.byteswap()
+    values = array("d", array("Q", accumulate(xors, xor)).tobytes())
+    return list(zip(accumulate(deltas), values))
+
+
+async def store_chunked_vitals(db: AsyncSession, user_id: int, samples: Sequence[VitalSample]) -> List[Sample]:
+    """
+    Merge vitals into their (user, type, UTC day) chunks.
+    A sample at a timestamp the series already has is treated as a duplicate
+    (chunks do not keep client sample IDs). Changed chunks are logged for
+    delta sync. Returns the samples actually added.
+    """
+    groups: Dict[Tuple[int, date], List[VitalSample]] = defaultdict(list)
+    for sample in samples:
+        groups[(sample.type_id, to_utc_naive(sample.recorded_at).date())].append(sample)
+    
+    stored: List[Sample] = []
+    changed: List[VitalChunk] = []
+    for (type_id, day), new_samples in groups.items():
+        # Create the day's chunk empty unless it exists, then lock it. A
+        # concurrent first write of the same day waits on the insert instead
+        # of adding a second chunk and failing on the unique constraint.
+        await db.execute(insert(db, VitalChunk).values(
+            user_id=user_id,
+            type_id=type_id,
+            day=day,
+            sample_count=0,
+            data=encode_samples([])
+        ).on_conflict_do_nothing(index_elements=["user_id", "type_id", "day"]))
+        chunk = await db.scalar(select(VitalChunk).where(
+            VitalChunk.user_id == user_id,
+            VitalChunk.type_id == type_id,
+            VitalChunk.day == day
+        ).with_for_update())
+        series = dict(decode_samples(chunk.data))
+    
+        added = []
+        for sample in new_samples:
+            ts = to_micros(sample.recorded_at)
+            if ts not in series:
+                series[ts] = sample.value
+                added.append((type_id, sample.value, from_micros(ts)))
+        if not added:
+            continue
+    
+        chunk.data = encode_samples(sorted(series.items()))
+        chunk.sample_count = len(series)
+        changed.append(chunk)
+        stored.extend(added)
+    
+    await db.flush()
+    await record_changes(db, user_id, VITAL_CHUNKS, [chunk.id for chunk in changed])
+    return stored
+
+
+def _vital_dict(user_id: int, vital_type: VitalTypeInfo, ts: int, value: float, updated_at: datetime) -> dict:
+    return {
+        "id": None,
+        "user_id": user_id,
+        "type": vital_type.name,
+        "value": value,
+        "unit": vital_type.unit,
+        "recorded_at": from_micros(ts),
+        "client_sample_id": None,
+        "created_at": updated_at,
+    }
+
+
+def chunk_vitals(chunk: VitalChunk, vital_type: VitalTypeInfo) -> List[dict]:
+    """All samples of a chunk as VitalResponse-shaped dicts."""
+    return [
+        _vital_dict(chunk.user_id, vital_type, ts, value, chunk.updated_at)
+        for ts, value in decode_samples(chunk.data)
+    ]
+
+
+async def read_chunked_vitals(
+    db: AsyncSession,
+    user_id: int,
+    vital_type: VitalTypeInfo,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    after: Optional[datetime] = None,
+    limit: Optional[int] = None
+) -> List[dict]:
+    """
+    Decode the samples of a series in [start, end] into VitalResponse-shaped dicts.
+    With `after` only samples strictly later are returned; with `limit`, chunks
+    stop being read once that many samples were collected.
+    """
+    query = select(VitalChunk.data, VitalChunk.updated_at).where(
+        VitalChunk.user_id == user_id,
+        VitalChunk.type_id == vital_type.id
+    )
+    start_us = end_us = None
+    if start is not None:
+        start_us = to_micros(start)
+        query = query.where(VitalChunk.day >= to_utc_naive(start).date())
+    if end is not None:
+        end_us = to_micros(end)
+        query = query.where(VitalChunk.day <= to_utc_naive(end).date())
+    if after is not None:
+        after_us = to_micros(after) + 1
+        start_us = after_us if start_us is None else max(start_us, after_us)
+        query = query.where(VitalChunk.day >= to_utc_naive(after).date())
+    
+    samples = []
+    result = await db.stream(query.order_by(VitalChunk.day.asc()))
+    async for data, updated_at in result:
+        for ts, value in decode_samples(data):
+            if (start_us is not None and ts < start_us) or (end_us is not None and ts > end_us):
+                continue
+            samples.append(_vital_dict(user_id, vital_type, ts, value, updated_at))
+        if limit is not None and len(samples) >= limit:
+            break
+    await result.close()
+    return samples[:limit]
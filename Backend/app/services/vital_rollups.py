@@ -0,0 +1,113 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.dialect import insert
+from app.models.vital_rollup import VitalRollupDay, VitalRollupHour, VitalRollupMinute
+
+ROLLUP_MODELS = {
+    "minute": VitalRollupMinute,
+    "hour": VitalRollupHour,
+    "day": VitalRollupDay,
+}
+
+# (type_id, value, recorded_at) of a stored vital
+Sample = Tuple[int, float, datetime]
+
+
+def to_utc_naive(value: datetime) -> datetime:
+    """Normalize a datetime to naive UTC (naive values are assumed to be UTC already)."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def bucket_start(recorded_at: datetime, bucket: str) -> datetime:
+    """Start of the minute, hour or day bucket containing recorded_at."""
+    start = to_utc_naive(recorded_at).replace(second=0, microsecond=0)
+    if bucket in ("hour", "day"):
+        start = start.replace(minute=0)
+    if bucket == "day":
+        start = start.replace(hour=0)
+    return start
+
+
+def aggregate_samples(samples: Sequence[Sample], bucket: str) -> List[dict]:
+    """Fold samples into one partial rollup row per (type, bucket)."""
+    rows: Dict[Tuple[int, datetime], dict] = {}
+    for type_id, value, recorded_at in samples:
+        recorded_at = to_utc_naive(recorded_at)
+        key = (type_id, bucket_start(recorded_at, bucket))
+        row = rows.get(key)
+        if row is None:
+            rows[key] = {
+                "type_id": type_id,
+                "bucket_start": key[1],
+                "count": 1,
+                "min": value,
+                "max": value,
+                "sum": value,
+                "last_value": value,
+                "last_recorded_at": recorded_at,
+            }
+            continue
+        row["count"] += 1
+        row["min"] = min(row["min"], value)
+        row["max"] = max(row["max"], value)
+        row["sum"] += value
+        if recorded_at >= row["last_recorded_at"]:
+            row["last_value"] = value
+            row["last_recorded_at"] = recorded_at
+    return list(rows.values())
+
+
+async def update_vital_rollups(db: AsyncSession, user_id: int, samples: Sequence[Sample]) -> None:
+    """
+    Merge newly stored vitals into the minute, hour and day rollups.
+    Runs in the caller's transaction, so rollups commit together with the samples.
+    """
+    if not samples:
+        return
+    for bucket, model in ROLLUP_MODELS.items():
+        rows = [{**row, "user_id": user_id} for row in aggregate_samples(samples, bucket)]
+        for start in range(0, len(rows), 500):
+            stmt = insert(db, model).values(rows[start:start + 500])
+            new = stmt.excluded
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[model.user_id, model.type_id, model.bucket_start],
+                set_={
+                    "count": model.count + new.count,
+                    "min": case((new.min < model.min, new.min), else_=model.min),
+                    "max": case((new.max > model.max, new.max), else_=model.max),
+                    "sum": model.sum + new.sum,
+                    "last_value": case(
+                        (new.last_recorded_at >= model.last_recorded_at, new.last_value),
+                        else_=model.last_value
+                    ),
+                    "last_recorded_at": case(
+                        (new.last_recorded_at >= model.last_recorded_at, new.last_recorded_at),
+                        else_=model.last_recorded_at
+                    ),
+                }
+            )
+            await db.execute(stmt)
+
+
+async def get_vital_rollups(
+    db: AsyncSession,
+    user_id: int,
+    type_id: int,
+    bucket: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+):
+    """Rollup rows for a user and vital type, oldest bucket first."""
+    model = ROLLUP_MODELS[bucket]
+    query = select(model).where(model.user_id == user_id, model.type_id == type_id)
+    if start is not None:
+        query = query.where(model.bucket_start >= bucket_start(start, bucket))
+    if end is not None:
+        query = query.where(model.bucket_start <= to_utc_naive(end))
+    return (await db.scalars(query.order_by(model.bucket_start.asc()))).all()
@@ -0,0 +1,199 @@
+import time
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.dialect import insert
+from app.models.vital_type import VitalType
+from app.schemas.vital import VitalCreate
+
+# Spellings accepted on ingest, mapped to the unit names used in vital_types
+UNIT_ALIASES = {
+    "bpm": "bpm",
+    "beats/min": "bpm",
+    "count/min": "bpm",
+    "beats per minute": "bpm",
+    "ms": "ms",
+    "mg/dl": "mg/dL",
+    "mmol/l": "mmol/L",
+    "hours": "hours",
+    "hour": "hours",
+    "hr": "hours",
+    "h": "hours",
+    "minutes": "minutes",
+    "minute": "minutes",
+    "min": "minutes",
+    "seconds": "seconds",
+    "second": "seconds",
+    "sec": "seconds",
+    "s": "seconds",
+    "kg": "kg",
+    "lb": "lb",
+    "lbs": "lb",
+    "°c": "°C",
+    "degc": "°C",
+    "c": "°C",
+    "°f": "°F",
+    "degf": "°F",
+    "f": "°F",
+    "%": "%",
+    "percent": "%",
+    "breaths/min": "breaths/min",
+    "mmhg": "mmHg",
+}
+
+# (from, to) -> (scale, offset): converted = value * scale + offset
+UNIT_CONVERSIONS: Dict[Tuple[str, str], Tuple[float, float]] = {
+    ("mmol/L", "mg/dL"): (18.0156, 0.0),
+    ("mg/dL", "mmol/L"): (1 / 18.0156, 0.0),
+    ("minutes", "hours"): (1 / 60, 0.0),
+    ("seconds", "hours"): (1 / 3600, 0.0),
+    ("hours", "minutes"): (60.0, 0.0),
+    ("seconds", "minutes"): (1 / 60, 0.0),
+    ("lb", "kg"): (0.45359237, 0.0),
+    ("kg", "lb"): (1 / 0.45359237, 0.0),
+    ("°F", "°C"): (5 / 9, -32 * 5 / 9),
+    ("°C", "°F"): (9 / 5, 32.0),
+}
+
+
+class UnitConversionError(ValueError):
+    """A vital was sent in a unit that cannot be converted to its type's canonical unit."""
+
+
+class VitalTypeInfo(NamedTuple):
+    id: int
+    name: str
+    unit: str
+
+
+class VitalSample(NamedTuple):
+    """A vital normalized for storage: type id and value in the canonical unit."""
+    type_id: int
+    value: float
+    recorded_at: datetime
+    client_sample_id: Optional[str] = None
+
+
+def canonical_unit(unit: str) -> str:
+    """Canonical spelling of a unit; unknown units are returned trimmed."""
+    unit = unit.strip()
+    return UNIT_ALIASES.get(unit.lower(), unit)
+
+
+def unit_conversion(from_unit: str, to_unit: str) -> Tuple[float, float]:
+    """(scale, offset) converting from_unit to to_unit, raising UnitConversionError if unsupported."""
+    from_unit = canonical_unit(from_unit)
+    if from_unit == to_unit:
+        return 1.0, 0.0
+    conversion = UNIT_CONVERSIONS.get((from_unit, to_unit))
+    if conversion is None:
+        raise UnitConversionError(f"Cannot convert {from_unit} to {to_unit}")
+    return conversion
+
+
+def convert_unit(value: float, from_unit: str, to_unit: str) -> float:
+    """Convert a value between units, raising UnitConversionError if unsupported."""
+    scale, offset = unit_conversion(from_unit, to_unit)
+    return value * scale + offset
+
+
+class VitalTypeRegistry:
+    """
+    Per-process cache of the vital_types table (name <-> id, canonical unit).
+    The table is small and append-only, so misses reload it whole. Types
+    created by a request are not cached until a later load sees them
+    committed.
+    
+    Unknown names reload the table at most every reload_seconds, so lookups
+    of names that do not exist (e.g. typos in URLs) do not each cost a
+    query; types created by another process show up within that interval.
+    """
+    
+    def __init__(self, reload_seconds: float = 0.0):
+        self.reload_seconds = reload_seconds
+        self._by_name: Dict[str, VitalTypeInfo] = {}
+        self._by_id: Dict[int, VitalTypeInfo] = {}
+        self._loaded_at: Optional[float] = None  # time.monotonic() of the last load
+    
+    async def _load(self, db: AsyncSession) -> None:
+        rows = (await db.execute(select(VitalType.id, VitalType.name, VitalType.unit))).all()
+        types = [VitalTypeInfo(*row) for row in rows]
+        self._by_name = {t.name: t for t in types}
+        self._by_id = {t.id: t for t in types}
+        self._loaded_at = time.monotonic()
+    
+    async def get(self, db: AsyncSession, name: str) -> Optional[VitalTypeInfo]:
+        """Look up a type by name without creating it."""
+        info = self._by_name.get(name)
+        if info is None and (
+            self._loaded_at is None or time.monotonic() - self._loaded_at >= self.reload_seconds
+        ):
+            await self._load(db)
+            info = self._by_name.get(name)
+        return info
+    
+    async def get_by_id(self, db: AsyncSession, type_id: int) -> VitalTypeInfo:
+        """Look up a type by id."""
+        info = self._by_id.get(type_id)
+        if info is None:
+            await self._load(db)
+            info = self._by_id[type_id]
+        return info
+    
+    async def resolve(self, db: AsyncSession, name: str, unit: str) -> VitalTypeInfo:
+        """Look up a type by name, registering it with unit as canonical unit if new."""
+        info = await self.get(db, name)
+        if info is not None:
+            return info
+        unit = canonical_unit(unit)
+        # The type may be new: look for it on the next miss
+        self._loaded_at = None
+        await db.execute(
+            insert(db, VitalType).values(name=name, unit=unit).on_conflict_do_nothing(
+                index_elements=[VitalType.name]
+            )
+        )
+        row = (await db.execute(
+            select(VitalType.id, VitalType.name, VitalType.unit).where(VitalType.name == name)
+        )).one()
+        return VitalTypeInfo(*row)
+    
+    async def normalize(
+        self,
+        db: AsyncSession,
+        vital: VitalCreate,
+        resolved: Optional[Dict[str, VitalTypeInfo]] = None
+    ) -> VitalSample:
+        """
+        Map a vital onto its type id and convert its value to the canonical unit.
+        `resolved` memoizes lookups across one batch, including types it creates.
+        """
+        info = resolved.get(vital.type) if resolved is not None else None
+        if info is None:
+            info = await self.resolve(db, vital.type, vital.unit)
+            if resolved is not None:
+                resolved[vital.type] = info
+        try:
+            value = convert_unit(vital.value, vital.unit, info.unit)
+        except UnitConversionError as e:
+            raise UnitConversionError(f"{vital.type}: {e}") from None
+        return VitalSample(info.id, value, vital.recorded_at, vital.client_sample_id)
+    
+    async def normalize_all(self, db: AsyncSession, vitals: Sequence[VitalCreate]) -> List[VitalSample]:
+        """Normalize a batch of vitals, raising UnitConversionError on the first bad unit."""
+        resolved: Dict[str, VitalTypeInfo] = {}
+        return [await self.normalize(db, vital, resolved) for vital in vitals]
+    
+    def clear(self) -> None:
+        """Drop the cache (e.g. after the table was recreated)."""
+        self._by_name = {}
+        self._by_id = {}
+        self._loaded_at = None
+
+
+# Singleton instance
+vital_types = VitalTypeRegistry(reload_seconds=settings.VITAL_TYPES_RELOAD_SECONDS)
@@ -1,23 +1,51 @@
+import os
+import tempfile
+from pathlib import Path
+
+# Keep password hashing cheap in tests
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
 import pytest
+from fastapi import Request
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 from app.main import app
+from app.core.config import settings
 from app.db.base import Base
-from app.db.session import get_db
+from app.db.session import SHARED_SESSION_KEY, get_db, get_async_db, apply_sqlite_pragmas
+from app.core.user_cache import user_cache
+from app.services.food_db import build_food_db, food_db
+from app.services.nutrition_cache import nutrition_cache
+from app.services.vital_types import vital_types
 
-# Create test database
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Create test database. A file is used so that the sync engine (schema setup,
+# assertions) and the async engine (the API) see the same data.
+TEST_DATABASE_PATH = os.path.join(tempfile.gettempdir(), f"trackme-test-{os.getpid()}.db")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DATABASE_PATH}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    f"sqlite+aiosqlite:///{TEST_DATABASE_PATH}",
+    poolclass=NullPool,
+)
+event.listen(engine, "connect", apply_sqlite_pragmas)
+event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 
 def override_get_db():
     try:
@@ -27,15 +55,36 @@ def override_get_db():
         db.close()
 
 
+async def override_get_async_db(request: Request):
+    shared = request.scope.get(SHARED_SESSION_KEY)
+    if shared is not None:
+        yield shared
+        return
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
+nutrition_cache.session_factory = TestingAsyncSessionLocal
+
+# The app only opens a prebuilt food database index
+food_db.path = Path(tempfile.gettempdir()) / f"trackme-test-foods-{os.getpid()}.db"
+build_food_db(food_db.source, food_db.path)
 
 
 @pytest.fixture
 def client():
     Base.metadata.create_all(bind=engine)
+    user_cache.clear()
+    vital_types.clear()
+    nutrition_cache.clear()
     with TestClient(app) as c:
         yield c
     Base.metadata.drop_all(bind=engine)
+    user_cache.clear()
+    vital_types.clear()
+    nutrition_cache.clear()
 
 
 @pytest.fixture
@@ -62,3 +111,8 @@ def auth_headers(client, test_user):
     token = response.json()["access_token"]
     return {"Authorization": f"Bearer {token}"}
 
+
+@pytest.fixture
+def upstream_lookups(monkeypatch):
+    """Send every nutrition lookup to the API instead of answering it from the food database."""
+    monkeypatch.setattr(settings, "FOOD_DB_MATCH_SCORE", float("inf"))
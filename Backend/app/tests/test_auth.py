@@ -62,3 +62,65 @@ def test_get_current_user_unauthorized(client):
     response = client.get("/api/v1/auth/me")
     assert response.status_code == 403
 
+
+def test_login_rehashes_on_cost_change(client, test_user, monkeypatch):
+    """Test that login transparently rehashes when the bcrypt cost changes."""
+    from app.core import security
+    from app.models.user import User
+    from app.tests.conftest import TestingSessionLocal
+    
+    context = security.build_password_context(5)
+    monkeypatch.setattr(security, "get_password_context", lambda: context)
+    
+    response = client.post(
+        "/api/v1/auth/login",
+        params={"email": test_user["email"], "password": test_user["password"]}
+    )
+    assert response.status_code == 200
+    
+    db = TestingSessionLocal()
+    try:
+        user = db.query(User).filter(User.email == test_user["email"]).first()
+        assert user.hashed_password.startswith("$2b$05$")
+    finally:
+        db.close()
+    
+    # The new hash still verifies
+    response = client.post(
+        "/api/v1/auth/login",
+        params={"email": test_user["email"], "password": test_user["password"]}
+    )
+    assert response.status_code == 200
+
+
+def test_login_rejected_when_hashing_pool_is_full(client, test_user, monkeypatch):
+    """Test that login returns 503 when the hashing queue is full."""
+    import threading
+    from app.core import security
+    
+    hasher = security.PasswordHashExecutor(max_workers=1, max_queue=0)
+    monkeypatch.setattr(security, "password_hasher", hasher)
+    
+    # Occupy the only slot
+    release = threading.Event()
+    started = threading.Event()
+    
+    def block():
+        started.set()
+        release.wait(5)
+    
+    future = hasher._get_executor().submit(block)
+    assert hasher._slots.acquire(blocking=False)
+    future.add_done_callback(lambda _: hasher._slots.release())
+    started.wait(5)
+    
+    try:
+        response = client.post(
+            "/api/v1/auth/login",
+            params={"email": test_user["email"], "password": test_user["password"]}
+        )
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+    finally:
+        release.set()
+        hasher.shutdown()
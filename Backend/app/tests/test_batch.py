@@ -0,0 +1,120 @@
+from app.api.routes import tasks
+from app.core.user_cache import user_cache
+from app.tests.test_sql_instrumentation import _query_count
+
+HOME_SCREEN = [
+    {"id": "tasks", "path": "/api/v1/tasks"},
+    {"id": "events", "path": "/api/v1/events"},
+    {"id": "steps", "path": "/api/v1/health/steps/summary", "params": {"from": "2026-01-01", "to": "2026-01-07"}},
+    {"id": "diet", "path": "/api/v1/diet/summary?from=2026-01-01&to=2026-01-07"},
+    {"id": "insights", "path": "/api/v1/insights/today"},
+]
+
+
+def test_batch_home_screen(client, auth_headers):
+    """Test that a batch returns what the separate requests would, without extra queries."""
+    client.post("/api/v1/tasks", json={"title": "Task"}, headers=auth_headers)
+    separate = [client.get(sub["path"], params=sub.get("params"), headers=auth_headers) for sub in HOME_SCREEN]
+    
+    response = client.post("/api/v1/batch", json={"requests": HOME_SCREEN}, headers=auth_headers)
+    assert response.status_code == 200
+    results = response.json()["responses"]
+    assert [result["id"] for result in results] == [sub["id"] for sub in HOME_SCREEN]
+    for sub, result, expected in zip(HOME_SCREEN, results, separate):
+        assert result["status"] == expected.status_code == 200
+        if sub["id"] != "insights":  # insights are regenerated on every request
+            assert result["body"] == expected.json()
+            assert result["headers"]["etag"] == expected.headers["etag"]
+    assert results[0]["body"][0]["title"] == "Task"
+    # The user is authenticated once and every sub-request shares the session
+    assert _query_count(response) <= sum(_query_count(expected) for expected in separate)
+
+
+def test_batch_write_then_read(client, auth_headers):
+    """Test that later sub-requests see the writes of earlier ones."""
+    response = client.post("/api/v1/batch", json={"requests": [
+        {"id": "create", "method": "POST", "path": "/api/v1/tasks", "body": {"title": "Batched"}},
+        {"id": "goals", "method": "PATCH", "path": "/api/v1/profile/goals", "body": {"daily_step_goal": 12345}},
+        {"id": "list", "path": "/api/v1/tasks"},
+        {"id": "read_goals", "path": "/api/v1/profile/goals"},
+    ]}, headers=auth_headers)
+    assert response.status_code == 200
+    create, goals, listed, read_goals = response.json()["responses"]
+    assert create["status"] == 201
+    assert goals["status"] == 200
+    assert [task["title"] for task in listed["body"]] == ["Batched"]
+    assert read_goals["body"]["daily_step_goal"] == 12345
+    
+    tasks = client.get("/api/v1/tasks", headers=auth_headers).json()
+    assert [task["id"] for task in tasks] == [create["body"]["id"]]
+
+
+def test_batch_user_cache_lookups(client, auth_headers):
+    """Test that writes in a batch reload the user context only after profile or goal changes."""
+    user_cache.clear()
+    response = client.post("/api/v1/batch", json={"requests": [
+        {"id": "first", "method": "POST", "path": "/api/v1/tasks", "body": {"title": "First"}},
+        {"id": "second", "method": "POST", "path": "/api/v1/tasks", "body": {"title": "Second"}},
+    ]}, headers=auth_headers)
+    assert [result["status"] for result in response.json()["responses"]] == [201, 201]
+    # Only the batch itself looked the user up
+    stats = user_cache.stats()
+    assert (stats["hits"], stats["misses"]) == (0, 1)
+    
+    response = client.post("/api/v1/batch", json={"requests": [
+        {"id": "profile", "method": "PATCH", "path": "/api/v1/profile", "body": {"name": "Renamed"}},
+        {"id": "read", "path": "/api/v1/profile"},
+    ]}, headers=auth_headers)
+    assert response.json()["responses"][1]["body"]["name"] == "Renamed"
+    # The reloaded context was cached for later requests
+    assert client.get("/api/v1/profile", headers=auth_headers).json()["name"] == "Renamed"
+    assert user_cache.stats()["hits"] == 2
+
+
+def test_batch_sub_request_errors(client, auth_headers):
+    """Test that failing sub-requests get their own status and are rolled back."""
+    response = client.post("/api/v1/batch", json={"requests": [
+        {"id": "missing", "path": "/api/v1/nothing-here"},
+        {"id": "method", "method": "PUT", "path": "/api/v1/tasks"},
+        {"id": "invalid", "method": "POST", "path": "/api/v1/tasks", "body": {"description": "No title"}},
+        {"id": "not_found", "method": "DELETE", "path": "/api/v1/tasks/999"},
+        {"id": "ok", "method": "POST", "path": "/api/v1/tasks", "body": {"title": "Kept"}},
+    ]}, headers=auth_headers)
+    assert response.status_code == 200
+    statuses = {result["id"]: result["status"] for result in response.json()["responses"]}
+    assert statuses == {"missing": 404, "method": 405, "invalid": 422, "not_found": 404, "ok": 201}
+    
+    tasks = client.get("/api/v1/tasks", headers=auth_headers).json()
+    assert [task["title"] for task in tasks] == ["Kept"]
+    
+    # Paths outside the API, nested batches and unauthenticated batches are refused
+    for path in ["/health", "/api/v1/batch"]:
+        response = client.post("/api/v1/batch", json={"requests": [{"path": path}]}, headers=auth_headers)
+        assert response.status_code == 400
+    response = client.post("/api/v1/batch", json={"requests": []}, headers=auth_headers)
+    assert response.status_code == 422
+    response = client.post("/api/v1/batch", json={"requests": HOME_SCREEN})
+    assert response.status_code == 403
+
+
+def test_batch_sub_request_unexpected_error(client, auth_headers, monkeypatch, caplog):
+    """Test that a sub-request raising an unexpected error fails alone, rolled back and logged."""
+    async def broken(*args, **kwargs):
+        raise RuntimeError("boom")
+    
+    monkeypatch.setattr(tasks, "record_changes", broken)
+    response = client.post("/api/v1/batch", json={"requests": [
+        {"id": "broken", "method": "POST", "path": "/api/v1/tasks", "body": {"title": "Lost"}},
+        {"id": "ok", "method": "POST", "path": "/api/v1/events",
+         "body": {"title": "Kept", "start_datetime": "2026-01-01T09:00:00", "end_datetime": "2026-01-01T10:00:00"}},
+    ]}, headers=auth_headers)
+    assert response.status_code == 200
+    results = {result["id"]: result for result in response.json()["responses"]}
+    assert results["broken"]["status"] == 500
+    assert results["broken"]["body"] == {"detail": "Internal Server Error"}
+    assert results["ok"]["status"] == 201
+    assert "POST /api/v1/tasks failed" in caplog.text
+    
+    monkeypatch.undo()
+    assert client.get("/api/v1/tasks", headers=auth_headers).json() == []
+    assert [event["title"] for event in client.get("/api/v1/events", headers=auth_headers).json()] == ["Kept"]
@@ -0,0 +1,125 @@
+import asyncio
+from datetime import date, timedelta
+
+from app.models.daily_stat import DailyStat
+from app.services.daily_stats import rebuild_daily_stats
+from app.tests.conftest import TestingAsyncSessionLocal, TestingSessionLocal
+
+COLUMNS = [
+    "calories", "carbs", "protein", "fat", "meal_count", "steps", "activity_minutes", "activity_count",
+    "calories_burned", "sleep_sum", "sleep_count", "heart_rate_sum", "heart_rate_count",
+]
+
+
+def _stats():
+    db = TestingSessionLocal()
+    try:
+        rows = db.query(DailyStat).order_by(DailyStat.day).all()
+        return {row.day.isoformat(): {column: getattr(row, column) for column in COLUMNS} for row in rows}
+    finally:
+        db.close()
+
+
+async def _rebuild(user_id=None):
+    async with TestingAsyncSessionLocal() as db:
+        rows = await rebuild_daily_stats(db, user_id)
+        await db.commit()
+        return rows
+
+
+def test_daily_stats_follow_writes(client, auth_headers):
+    """Test that creates, updates and deletes keep the daily totals exact."""
+    meal = {"meal_type": "lunch", "calories": 300, "carbs": 40, "protein": 15, "fat": 10}
+    first = client.post(
+        "/api/v1/diet/meals", json={**meal, "name": "Salad", "datetime": "2026-01-02T08:00:00"}, headers=auth_headers
+    ).json()
+    second = client.post(
+        "/api/v1/diet/meals", json={**meal, "name": "Soup", "datetime": "2026-01-01T12:00:00", "calories": 0.1},
+        headers=auth_headers
+    ).json()
+    client.patch(f"/api/v1/diet/meals/{first['id']}", json={"calories": 350, "fat": 12}, headers=auth_headers)
+    client.delete(f"/api/v1/diet/meals/{second['id']}", headers=auth_headers)
+    
+    client.post("/api/v1/health/steps", json={"date": "2026-01-01", "step_count": 3000}, headers=auth_headers)
+    activity = client.post(
+        "/api/v1/health/activities",
+        json={"type": "run", "duration_minutes": 30, "calories_burned": 250, "datetime": "2026-01-02T18:00:00"},
+        headers=auth_headers
+    ).json()
+    client.patch(f"/api/v1/health/activities/{activity['id']}", json={"duration_minutes": 45}, headers=auth_headers)
+    client.post(
+        "/api/v1/health/vitals",
+        json={"type": "heart_rate", "value": 60, "unit": "bpm", "recorded_at": "2026-01-01T08:00:00"},
+        headers=auth_headers
+    )
+    client.post("/api/v1/health/sync", json=[
+        {"kind": "steps", "date": "2026-01-01", "step_count": 8000},
+        {"kind": "steps", "date": "2026-01-02", "step_count": 5000},
+        {"kind": "activity", "type": "walk", "duration_minutes": 20, "datetime": "2026-01-02T07:00:00"},
+        {"kind": "vital", "type": "heart_rate", "value": 80, "unit": "bpm", "recorded_at": "2026-01-01T09:00:00"},
+        {"kind": "vital", "type": "sleep_duration", "value": 7.5, "unit": "hours", "recorded_at": "2026-01-02T07:00:00"},
+        {"kind": "vital", "type": "blood_glucose", "value": 99, "unit": "mg/dL", "recorded_at": "2026-01-02T07:00:00"},
+    ], headers=auth_headers)
+    
+    empty = dict.fromkeys(COLUMNS, 0)
+    expected = {
+        "2026-01-01": {**empty, "steps": 8000, "heart_rate_sum": 140, "heart_rate_count": 2},
+        "2026-01-02": {
+            **empty, "calories": 350, "carbs": 40, "protein": 15, "fat": 12, "meal_count": 1, "steps": 5000,
+            "activity_minutes": 65, "activity_count": 2, "calories_burned": 250, "sleep_sum": 7.5, "sleep_count": 1,
+        },
+    }
+    # Removing the last meal of a day leaves exact zeros, not rounding residue
+    assert _stats() == expected
+    
+    summary = client.get("/api/v1/diet/summary?from=2026-01-01&to=2026-01-02", headers=auth_headers).json()
+    assert [(day["total_calories"], len(day["meals"])) for day in summary] == [(0, 0), (350, 1)]
+    
+    # Rebuilding recomputes the same totals and repairs drift
+    db = TestingSessionLocal()
+    try:
+        db.query(DailyStat).update({"calories": 999, "steps": None})
+        db.commit()
+    finally:
+        db.close()
+    user_id = client.get("/api/v1/profile", headers=auth_headers).json()["id"]
+    assert asyncio.run(_rebuild(user_id)) == 2
+    assert _stats() == expected
+    assert asyncio.run(_rebuild()) == 2
+    assert _stats() == expected
+
+
+def test_daily_stats_use_utc_days(client, auth_headers):
+    """Test that records sent with an offset count towards their UTC day on every write."""
+    meal = client.post("/api/v1/diet/meals", json={
+        "name": "Late dinner", "meal_type": "dinner", "calories": 500, "datetime": "2026-01-01T21:30:00-05:00"
+    }, headers=auth_headers).json()
+    client.post("/api/v1/health/activities", json={
+        "type": "walk", "duration_minutes": 20, "datetime": "2026-01-02T01:00:00+03:00"
+    }, headers=auth_headers)
+    
+    stats = _stats()
+    assert (stats["2026-01-02"]["calories"], stats["2026-01-02"]["meal_count"]) == (500, 1)
+    assert (stats["2026-01-01"]["activity_minutes"], stats["2026-01-01"]["activity_count"]) == (20, 1)
+    
+    # The rebuild puts them on the same days
+    assert asyncio.run(_rebuild()) == 2
+    assert _stats() == stats
+    
+    client.delete(f"/api/v1/diet/meals/{meal['id']}", headers=auth_headers)
+    assert (_stats()["2026-01-02"]["calories"], _stats()["2026-01-02"]["meal_count"]) == (0, 0)
+
+
+def test_insights_use_daily_stats(client, auth_headers):
+    """Test that insights average the daily totals of the lookback window."""
+    today = date.today()
+    for days_ago, steps in [(0, 4000), (1, 2000), (30, 20000)]:
+        client.post(
+            "/api/v1/health/steps",
+            json={"date": (today - timedelta(days=days_ago)).isoformat(), "step_count": steps},
+            headers=auth_headers
+        )
+    
+    messages = [insight["message"] for insight in client.get("/api/v1/insights/today", headers=auth_headers).json()]
+    assert any(message.startswith("You're averaging 3000 steps/day") for message in messages)
+    assert "You've been less active the past 3 days. Consider going outside for a walk!" in messages
@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.db.session import get_async_database_url
+from app.models.meal import Meal
+from app.models.user import User
+from app.tests.conftest import TestingSessionLocal
+
+
+def test_async_database_url():
+    """Test mapping database URLs onto async drivers."""
+    assert get_async_database_url("sqlite:///./trackme.db") == "sqlite+aiosqlite:///./trackme.db"
+    assert get_async_database_url("postgresql://u:p@db/trackme") == "postgresql+asyncpg://u:p@db/trackme"
+    assert get_async_database_url("postgresql+asyncpg://u:p@db/trackme") == "postgresql+asyncpg://u:p@db/trackme"
+
+
+def test_sqlite_production_pragmas(client):
+    """Test that the SQLite production profile is applied on connect."""
+    db = TestingSessionLocal()
+    try:
+        assert db.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert db.execute(text("PRAGMA foreign_keys")).scalar() == 1
+        assert db.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert db.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+    finally:
+        db.close()
+
+
+def test_user_delete_cascades(client, test_user):
+    """Test that ON DELETE CASCADE removes a user's rows."""
+    db = TestingSessionLocal()
+    try:
+        user = db.query(User).filter(User.email == test_user["email"]).first()
+        db.add(Meal(user_id=user.id, name="Toast", meal_type="breakfast", datetime=datetime.now()))
+        db.commit()
+        
+        db.execute(text("DELETE FROM users WHERE id = :id"), {"id": user.id})
+        db.commit()
+        
+        assert db.query(Meal).count() == 0
+    finally:
+        db.close()
@@ -0,0 +1,86 @@
+from datetime import date, timedelta
+
+from app.tests.test_sql_instrumentation import _query_count
+
+
+def test_conditional_get(client, auth_headers):
+    """Test that a matching If-None-Match is answered with an empty 304."""
+    client.post("/api/v1/tasks", json={"title": "Task"}, headers=auth_headers)
+    
+    response = client.get("/api/v1/tasks", headers=auth_headers)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, no-cache"
+    
+    response = client.get("/api/v1/tasks", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    # Only the version lookup runs (the user comes from the user cache)
+    assert _query_count(response) == 1
+    
+    response = client.get("/api/v1/tasks", headers={**auth_headers, "If-None-Match": f'"other", W/{etag}'})
+    assert response.status_code == 304
+    
+    response = client.get("/api/v1/tasks", headers={**auth_headers, "If-None-Match": '"other"'})
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+
+
+def test_writes_change_etag(client, auth_headers):
+    """Test that every write bumps the version of its own collection only."""
+    def etags():
+        return {
+            url: client.get(url, headers=auth_headers).headers["etag"]
+            for url in ["/api/v1/tasks", "/api/v1/diet/meals", "/api/v1/health/activities"]
+        }
+    
+    before = etags()
+    task = client.post("/api/v1/tasks", json={"title": "Task"}, headers=auth_headers).json()
+    after_create = etags()
+    assert after_create["/api/v1/tasks"] != before["/api/v1/tasks"]
+    assert after_create["/api/v1/diet/meals"] == before["/api/v1/diet/meals"]
+    
+    client.patch(f"/api/v1/tasks/{task['id']}", json={"status": "done"}, headers=auth_headers)
+    after_update = etags()
+    assert after_update["/api/v1/tasks"] != after_create["/api/v1/tasks"]
+    
+    client.delete(f"/api/v1/tasks/{task['id']}", headers=auth_headers)
+    assert etags()["/api/v1/tasks"] != after_update["/api/v1/tasks"]
+    
+    # Bulk sync bumps only the collections it wrote to
+    before = etags()
+    client.post(
+        "/api/v1/health/sync",
+        json=[{"kind": "activity", "type": "run", "duration_minutes": 30,
+               "datetime": "2026-01-01T08:00:00", "client_sample_id": "a-1"}],
+        headers=auth_headers
+    )
+    after_sync = etags()
+    assert after_sync["/api/v1/health/activities"] != before["/api/v1/health/activities"]
+    assert after_sync["/api/v1/tasks"] == before["/api/v1/tasks"]
+
+
+def test_summary_cache_control(client, auth_headers):
+    """Test that past-day summaries are cacheable and today's are revalidated."""
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    
+    for url in ["/api/v1/diet/summary", "/api/v1/health/steps/summary"]:
+        response = client.get(url, params={"from": yesterday, "to": yesterday}, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "private, max-age=86400"
+        assert date.today().isoformat() in response.headers["etag"]
+    
+        response = client.get(url, headers=auth_headers)
+        assert response.headers["cache-control"] == "private, no-cache"
+    
+        response = client.get(url, headers={**auth_headers, "If-None-Match": response.headers["etag"]})
+        assert response.status_code == 304
+    
+    etag = client.get("/api/v1/health/steps/summary", headers=auth_headers).headers["etag"]
+    client.post(
+        "/api/v1/health/steps",
+        json={"date": yesterday, "step_count": 5000, "source": "manual"},
+        headers=auth_headers
+    )
+    assert client.get("/api/v1/health/steps/summary", headers=auth_headers).headers["etag"] != etag
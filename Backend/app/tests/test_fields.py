@@ -0,0 +1,79 @@
+import asyncio
+from datetime import date, datetime
+from typing import List
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.api.fields import render_list
+from app.models.activity import ActivityType
+from app.models.meal import MealType
+from app.models.task import TaskStatus, TaskTag
+from app.schemas.activity import ActivityResponse
+from app.schemas.meal import MealListResponse, MealResponse
+from app.schemas.step_summary import StepSummaryResponse
+from app.schemas.task import TaskResponse
+
+NOW = datetime(2026, 1, 1, 8, 30, 15, 123456)
+TEXT = ["plain", "café – ☕", "quote \" backslash \\ slash /", "\x00\x1f\x7f  controls", "emoji 😀", ""]
+FLOATS = [0.0, -0.0, 72.0, 0.1 + 0.2, 1e-05, 0.00004, 1e16, 1.5e300, 123456789.123, 5e-324]
+
+
+def _fastapi_body(response_model, items) -> bytes:
+    field = create_response_field(name="Response", type_=List[response_model], mode="serialization")
+    content = asyncio.run(serialize_response(field=field, response_content=items))
+    return JSONResponse(content).body
+
+
+def test_render_list_matches_fastapi():
+    """Test that the fast list path renders byte-identical JSON to response_model."""
+    tasks = [
+        {"id": i, "user_id": 1, "title": text, "description": None if i % 2 else text,
+         "status": TaskStatus.TODO, "tag": TaskTag.WORK, "due_datetime": None if i % 3 else NOW,
+         "created_at": NOW, "updated_at": None}
+        for i, text in enumerate(TEXT)
+    ]
+    meals = [
+        {"id": i, "user_id": 1, "name": TEXT[i % len(TEXT)], "meal_type": MealType.SNACK, "datetime": NOW,
+         "calories": value, "carbs": 12, "protein": -value, "fat": value / 3, "created_at": NOW,
+         "raw_nutrition_data": {"items": [{"qty": value, "unit": "g"}], "note": TEXT[i % len(TEXT)]}}
+        for i, value in enumerate(FLOATS)
+    ]
+    activities = [
+        {"id": i, "user_id": 1, "type": ActivityType.RUN, "duration_minutes": value, "distance_km": None,
+         "calories_burned": value, "datetime": NOW, "notes": None, "client_sample_id": f"a-{i}",
+         "created_at": NOW}
+        for i, value in enumerate(FLOATS)
+    ]
+    steps = [{"id": 1, "user_id": 1, "date": date(2026, 1, 1), "step_count": 12000, "source": "healthkit"}]
+    
+    for response_model, items in [
+        (TaskResponse, tasks),
+        (MealListResponse, meals),
+        (MealResponse, meals),
+        (ActivityResponse, activities),
+        (StepSummaryResponse, steps),
+        (TaskResponse, []),
+    ]:
+        expected = _fastapi_body(response_model, items)
+        assert render_list(items, response_model, None, Response()).body == expected
+    
+    # Values a driver returns in another type than the schema's are still coerced
+    loose = [{**steps[0], "date": "2026-01-01", "step_count": 12000.0}]
+    assert render_list(loose, StepSummaryResponse, None, Response()).body == _fastapi_body(StepSummaryResponse, loose)
+
+
+def test_render_list_projection():
+    """Test rendering a subset of fields in the requested order."""
+    task = {"id": 3, "user_id": 1, "title": "Call", "description": None, "status": TaskStatus.DONE,
+            "tag": TaskTag.OTHER, "due_datetime": NOW, "created_at": NOW, "updated_at": None}
+    response = Response()
+    response.headers["X-Next-Cursor"] = "abc"
+    
+    rendered = render_list([task], TaskResponse, ("status", "title"), response)
+    assert rendered.body == b'[{"status":"done","title":"Call"}]'
+    assert rendered.headers["X-Next-Cursor"] == "abc"
+    assert rendered.headers["content-type"] == "application/json"
+    assert rendered.headers["content-length"] == str(len(rendered.body))
@@ -0,0 +1,86 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from app.services.food_db import FOODS_CSV, FoodDatabase, build_food_db, servings
+from app.services.nutrition_api import nutrition_client
+
+
+def test_food_db_fuzzy_matching(tmp_path):
+    """Test matching names, aliases, typos and longer descriptions, read-only and memory-mapped."""
+    assert build_food_db(FOODS_CSV, tmp_path / "foods.db") > 100
+    food_db = FoodDatabase(str(tmp_path / "foods.db"))
+    try:
+        for query, name in [
+            ("Apple", "apple"),
+            ("grilled chicken", "chicken breast"),
+            ("bannana", "banana"),
+            ("chiken salad", "chicken salad"),
+            ("spagetti bolognese", "spaghetti bolognese"),
+            ("cheese burger", "cheeseburger"),
+            ("large bowl of chicken salad with dressing", "chicken salad"),
+        ]:
+            assert food_db.match(query).name == name, query
+        assert food_db.match("zzzz qqq") is None
+        assert food_db.match("pb") is None
+        assert food_db.match("chiken salad", min_score=0.95) is None
+    
+        data = food_db.lookup("brown rice", "1/2 cup", 0.9)
+        assert (data["calories"], data["carbs"]) == (108, 22.4)
+        assert data["raw_data"]["match"] == "brown rice"
+        # Servings of several items or units are scaled by their count
+        for food_name, quantity, calories in [
+            ("chicken wings", "6 wings", 520),
+            ("chicken wings", "9 wings", 780),
+            ("chicken wings", "3", 260),
+            ("peanut butter", "2 tbsp", 188),
+            ("peanut butter", "1 tablespoon", 94),
+            ("scrambled eggs", "2 eggs", 182),
+            ("bacon", "3 slices", 130),
+            ("bacon", "1 slice", 43.3),
+        ]:
+            assert food_db.lookup(food_name, quantity, 0.9)["calories"] == calories, (food_name, quantity)
+    
+        assert food_db._db.execute("PRAGMA mmap_size").fetchone()[0] > 0
+        with pytest.raises(sqlite3.OperationalError):
+            food_db._db.execute("DELETE FROM foods")
+    finally:
+        food_db.close()
+    
+    assert servings("150g", "1 breast cooked", 172) == pytest.approx(150 / 172)
+    assert servings("6 oz", "1 fillet cooked", 170) == pytest.approx(1.0, abs=0.01)
+    assert servings("2 slices", "1 slice", 28) == 2
+    assert servings("2", "1 medium", 118) == servings("2 bananas", "1 medium", 118) == 2
+    assert servings("1 cup", "2 tbsp", 32) == 8
+    assert servings("2 slices", "1 cup", 150) == 1
+    assert servings("a large bowl", "1 bowl", 150) == 1
+    
+    # A missing index is not built on demand; lookups find nothing
+    missing = FoodDatabase(str(tmp_path / "missing.db"))
+    assert missing.match("apple") is None
+    assert not missing.stats()["open"]
+    assert not (tmp_path / "missing.db").exists()
+
+
+def test_food_db_answers_before_upstream(client, monkeypatch):
+    """Test that close matches skip the API and other foods still reach it."""
+    calls = []
+    
+    async def fetch(food_name, quantity):
+        calls.append(food_name)
+        return {"calories": 640, "carbs": 70, "protein": 30, "fat": 25, "raw_data": {"foods": []}}
+    
+    monkeypatch.setattr(nutrition_client, "api_key", "key")
+    monkeypatch.setattr(nutrition_client, "_fetch_nutrition_data", fetch)
+    
+    async def run():
+        banana = await nutrition_client.get_nutrition_data("Banana", "2")
+        assert (banana["calories"], banana["raw_data"]["source"]) == (210, "food_db")
+        assert calls == []
+    
+        curry = await nutrition_client.get_nutrition_data("paneer tikka wrap with mint chutney", None)
+        assert curry["calories"] == 640
+        assert calls == ["paneer tikka wrap with mint chutney"]
+    
+    asyncio.run(run())
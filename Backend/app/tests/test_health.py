@@ -1,4 +1,16 @@
-from datetime import date, datetime
+import asyncio
+import json
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app.models.vital import Vital
+from app.models.vital_chunk import VitalChunk
+from app.models.vital_type import VitalType
+from app.services.health_sync import ingest_vitals_stream
+from app.services.vital_chunks import store_chunked_vitals
+from app.services.vital_types import VitalSample, VitalTypeRegistry
+from app.tests.conftest import TestingAsyncSessionLocal
 
 
 def test_create_step_summary(client, auth_headers):
@@ -102,3 +114,417 @@ def test_create_activity(client, auth_headers):
     assert data["duration_minutes"] == 30
     assert data["distance_km"] == 5.0
 
+
+def test_step_summary_upsert(client, auth_headers):
+    """Test that posting steps twice for a date updates the same row."""
+    today = date.today().isoformat()
+    first = client.post(
+        "/api/v1/health/steps",
+        json={"date": today, "step_count": 1000, "source": "manual"},
+        headers=auth_headers
+    )
+    second = client.post(
+        "/api/v1/health/steps",
+        json={"date": today, "step_count": 4000, "source": "apple_healthkit"},
+        headers=auth_headers
+    )
+    assert second.status_code == 201
+    assert second.json()["id"] == first.json()["id"]
+    assert second.json()["step_count"] == 4000
+    
+    response = client.get("/api/v1/health/steps/summary", headers=auth_headers)
+    assert len(response.json()) == 1
+
+
+def _sync_batch():
+    today = date.today()
+    now = datetime.now()
+    items = [
+        {"kind": "steps", "date": (today - timedelta(days=1)).isoformat(), "step_count": 5000, "source": "apple_healthkit"},
+        {"kind": "steps", "date": today.isoformat(), "step_count": 1000, "source": "apple_healthkit"},
+        {"kind": "steps", "date": today.isoformat(), "step_count": 2500, "source": "apple_healthkit"},
+        {
+            "kind": "activity",
+            "type": "walk",
+            "duration_minutes": 20,
+            "datetime": now.isoformat(),
+            "client_sample_id": "act-1"
+        },
+    ]
+    for i in range(50):
+        items.append({
+            "kind": "vital",
+            "type": "heart_rate",
+            "value": 60 + i,
+            "unit": "bpm",
+            "recorded_at": (now - timedelta(minutes=i)).isoformat(),
+            "client_sample_id": f"hr-{i}"
+        })
+    return items
+
+
+def test_health_sync(client, auth_headers):
+    """Test bulk-syncing a mixed batch in one request."""
+    response = client.post("/api/v1/health/sync", json=_sync_batch(), headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == {"steps": 2, "vitals": 50, "activities": 1, "duplicates": 0}
+    
+    # The last entry for a repeated date wins
+    steps = client.get("/api/v1/health/steps/summary", headers=auth_headers).json()
+    assert sorted(s["step_count"] for s in steps) == [2500, 5000]
+    
+    vitals = client.get("/api/v1/health/vitals/heart_rate", headers=auth_headers).json()
+    assert len(vitals) == 50
+    assert {v["client_sample_id"] for v in vitals} == {f"hr-{i}" for i in range(50)}
+
+
+def test_health_sync_retry_is_idempotent(client, auth_headers):
+    """Test that resending a batch skips samples that were already stored."""
+    client.post("/api/v1/health/sync", json=_sync_batch(), headers=auth_headers)
+    response = client.post("/api/v1/health/sync", json=_sync_batch(), headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == {"steps": 2, "vitals": 0, "activities": 0, "duplicates": 51}
+    
+    vitals = client.get("/api/v1/health/vitals/heart_rate", headers=auth_headers).json()
+    assert len(vitals) == 50
+    activities = client.get("/api/v1/health/activities", headers=auth_headers).json()
+    assert len(activities) == 1
+
+
+def test_health_sync_validation(client, auth_headers):
+    """Test that an invalid item rejects the whole batch."""
+    items = _sync_batch()
+    items.append({"kind": "vital", "type": "heart_rate", "unit": "bpm"})
+    response = client.post("/api/v1/health/sync", json=items, headers=auth_headers)
+    assert response.status_code == 422
+    
+    response = client.post("/api/v1/health/sync", json=[{"kind": "unknown"}], headers=auth_headers)
+    assert response.status_code == 422
+    
+    vitals = client.get("/api/v1/health/vitals/heart_rate", headers=auth_headers).json()
+    assert vitals == []
+
+
+def _ndjson_vitals(count, start=0):
+    now = datetime.now()
+    lines = []
+    for i in range(start, start + count):
+        lines.append(json.dumps({
+            "type": "heart_rate",
+            "value": 60 + i % 40,
+            "unit": "bpm",
+            "recorded_at": (now - timedelta(seconds=5 * i)).isoformat(),
+            "client_sample_id": f"hr-{i}"
+        }))
+    return lines
+
+
+def test_stream_vitals(client, auth_headers, monkeypatch):
+    """Test NDJSON vitals ingestion in size-bounded batches."""
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "VITALS_STREAM_BATCH_SIZE", 100)
+    
+    def body():
+        # Chunk boundaries deliberately split lines
+        data = ("\n".join(_ndjson_vitals(250)) + "\n").encode()
+        for start in range(0, len(data), 1000):
+            yield data[start:start + 1000]
+    
+    response = client.post(
+        "/api/v1/health/vitals/stream",
+        content=body(),
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["accepted"] == 250
+    assert data["batches"] == 3
+    assert data["rejected"] == 0
+    
+    vitals = client.get("/api/v1/health/vitals/heart_rate", headers=auth_headers).json()
+    assert len(vitals) == 250
+
+
+def test_stream_vitals_rejects_bad_lines(client, auth_headers):
+    """Test that invalid lines are reported while valid lines are stored."""
+    lines = _ndjson_vitals(3)
+    lines.insert(1, "{not json")
+    lines.insert(2, json.dumps({"type": "heart_rate", "unit": "bpm"}))
+    lines.append(_ndjson_vitals(1)[0])  # duplicate client_sample_id
+    
+    response = client.post(
+        "/api/v1/health/vitals/stream",
+        content="\n".join(lines),
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["accepted"] == 3
+    assert data["duplicates"] == 1
+    assert data["rejected"] == 2
+    assert [e["line"] for e in data["errors"]] == [2, 3]
+
+
+def test_stream_vitals_line_too_long(client, auth_headers, monkeypatch):
+    """Test that an oversized line is rejected without buffering the body."""
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "VITALS_STREAM_MAX_LINE_BYTES", 100)
+    
+    response = client.post(
+        "/api/v1/health/vitals/stream",
+        content="x" * 1000,
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 413
+    
+    # Complete lines are checked too, not just the unterminated rest of a chunk
+    response = client.post(
+        "/api/v1/health/vitals/stream",
+        content="x" * 1000 + "\n" + _ndjson_vitals(1)[0],
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 413
+
+
+def test_stream_vitals_flushes_while_idle(client, auth_headers):
+    """Test that a partial batch is committed after flush_seconds even if the client goes quiet."""
+    user_id = client.get("/api/v1/profile", headers=auth_headers).json()["id"]
+    committed_while_idle = []
+    
+    async def stored() -> int:
+        async with TestingAsyncSessionLocal() as db:
+            return await db.scalar(select(func.count()).select_from(Vital).where(Vital.user_id == user_id))
+    
+    async def chunks():
+        yield ("\n".join(_ndjson_vitals(2)) + "\n").encode()
+        await asyncio.sleep(0.3)
+        committed_while_idle.append(await stored())
+        yield (_ndjson_vitals(1, start=2)[0] + "\n").encode()
+    
+    async def run():
+        async with TestingAsyncSessionLocal() as db:
+            return await ingest_vitals_stream(db, user_id, chunks(), batch_size=100, flush_seconds=0.05,
+                                              max_line_bytes=65536)
+    
+    result = asyncio.run(run())
+    assert committed_while_idle == [2]
+    assert (result.accepted, result.batches) == (3, 2)
+
+
+def test_vital_rollups(client, auth_headers):
+    """Test that vitals are rolled up per bucket as they are written."""
+    base = datetime(2026, 1, 1, 8, 0, 0)
+    samples = [(base, 60), (base + timedelta(seconds=40), 80), (base + timedelta(hours=1, minutes=5), 70)]
+    
+    client.post(
+        "/api/v1/health/vitals",
+        json={"type": "heart_rate", "value": 60, "unit": "bpm", "recorded_at": samples[0][0].isoformat()},
+        headers=auth_headers
+    )
+    client.post(
+        "/api/v1/health/sync",
+        json=[
+            {"kind": "vital", "type": "heart_rate", "value": value, "unit": "bpm",
+             "recorded_at": recorded_at.isoformat(), "client_sample_id": f"s{i}"}
+            for i, (recorded_at, value) in enumerate(samples[1:])
+        ],
+        headers=auth_headers
+    )
+    
+    response = client.get("/api/v1/health/vitals/heart_rate/rollup?bucket=hour", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == [
+        {"bucket_start": "2026-01-01T08:00:00", "count": 2, "min": 60.0, "max": 80.0,
+         "avg": 70.0, "sum": 140.0, "last": 80.0},
+        {"bucket_start": "2026-01-01T09:00:00", "count": 1, "min": 70.0, "max": 70.0,
+         "avg": 70.0, "sum": 70.0, "last": 70.0},
+    ]
+    
+    # An out-of-order sample updates the aggregates but not "last"
+    client.post(
+        "/api/v1/health/vitals",
+        json={"type": "heart_rate", "value": 50, "unit": "bpm",
+              "recorded_at": (base + timedelta(seconds=20)).isoformat()},
+        headers=auth_headers
+    )
+    day = client.get(
+        "/api/v1/health/vitals/heart_rate/rollup",
+        params={"bucket": "day", "from": "2026-01-01T12:00:00"},
+        headers=auth_headers
+    ).json()
+    assert day == [{"bucket_start": "2026-01-01T00:00:00", "count": 4, "min": 50.0, "max": 80.0,
+                    "avg": 65.0, "sum": 260.0, "last": 70.0}]
+    
+    minute = client.get(
+        "/api/v1/health/vitals/heart_rate/rollup?bucket=minute&to=2026-01-01T08:30:00",
+        headers=auth_headers
+    ).json()
+    assert [(m["count"], m["last"]) for m in minute] == [(3, 80.0)]
+    
+    response = client.get("/api/v1/health/vitals/heart_rate/rollup?bucket=week", headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_chunked_vitals_concurrent_first_writes(client, auth_headers):
+    """Test that two transactions creating the same day's chunk both keep their samples."""
+    user_id = client.get("/api/v1/profile", headers=auth_headers).json()["id"]
+    base = datetime(2026, 1, 1, 8, 0, 0)
+    
+    async def write(offset: int):
+        async with TestingAsyncSessionLocal() as db:
+            type_id = await db.scalar(select(VitalType.id).where(VitalType.name == "heart_rate"))
+            samples = [VitalSample(type_id, 60.0 + i, base + timedelta(seconds=10 * i + offset)) for i in range(5)]
+            stored = await store_chunked_vitals(db, user_id, samples)
+            # Keep the transaction open so that the other one runs into it
+            await asyncio.sleep(0.05)
+            await db.commit()
+            return len(stored)
+    
+    async def run():
+        return await asyncio.gather(write(0), write(5))
+    
+    assert asyncio.run(run()) == [5, 5]
+    
+    async def chunks():
+        async with TestingAsyncSessionLocal() as db:
+            return (await db.scalars(select(VitalChunk).where(VitalChunk.user_id == user_id))).all()
+    
+    assert [chunk.sample_count for chunk in asyncio.run(chunks())] == [10]
+
+
+def test_chunked_vitals_storage(client, auth_headers, monkeypatch):
+    """Test storing and reading vitals in compressed per-day chunks."""
+    from app.core.config import settings
+    from app.models.vital import Vital
+    from app.models.vital_chunk import VitalChunk
+    from app.tests.conftest import TestingSessionLocal
+    monkeypatch.setattr(settings, "VITALS_STORAGE_MODE", "chunked")
+    
+    base = datetime(2026, 1, 1, 23, 59, 0)
+    lines = [
+        json.dumps({"type": "heart_rate", "value": 60 + i % 7 + 0.5, "unit": "bpm",
+                    "recorded_at": (base + timedelta(seconds=5 * i)).isoformat()})
+        for i in range(30)
+    ]
+    response = client.post(
+        "/api/v1/health/vitals/stream",
+        content="\n".join(lines),
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.json()["accepted"] == 30
+    
+    # Same timestamp again is a duplicate; a single POST adds to the chunk
+    response = client.post("/api/v1/health/sync", json=[
+        {"kind": "vital", "type": "heart_rate", "value": 99, "unit": "bpm", "recorded_at": base.isoformat()}
+    ], headers=auth_headers)
+    assert response.json()["duplicates"] == 1
+    response = client.post(
+        "/api/v1/health/vitals",
+        json={"type": "heart_rate", "value": 72, "unit": "bpm",
+              "recorded_at": (base + timedelta(minutes=10)).isoformat()},
+        headers=auth_headers
+    )
+    assert response.status_code == 201
+    assert response.json()["id"] is None
+    
+    db = TestingSessionLocal()
+    try:
+        assert db.query(Vital).count() == 0
+        chunks = db.query(VitalChunk).order_by(VitalChunk.day).all()
+        assert [(c.day.isoformat(), c.sample_count) for c in chunks] == [("2026-01-01", 12), ("2026-01-02", 19)]
+    finally:
+        db.close()
+    
+    vitals = client.get(
+        "/api/v1/health/vitals/heart_rate",
+        params={"from": (base + timedelta(seconds=5)).isoformat(), "to": (base + timedelta(minutes=10)).isoformat()},
+        headers=auth_headers
+    ).json()
+    assert len(vitals) == 30
+    assert vitals[0]["recorded_at"] == "2026-01-01T23:59:05"
+    assert vitals[0]["value"] == 61.5
+    assert vitals[-1]["value"] == 72.0
+    assert all(v["unit"] == "bpm" for v in vitals)
+    
+    # Rollups are maintained in chunked mode too
+    rollup = client.get("/api/v1/health/vitals/heart_rate/rollup?bucket=day", headers=auth_headers).json()
+    assert [r["count"] for r in rollup] == [12, 19]
+
+
+def test_vital_units_are_normalized(client, auth_headers):
+    """Test that vitals are converted to their type's canonical unit on ingest."""
+    response = client.post(
+        "/api/v1/health/vitals",
+        json={"type": "blood_glucose", "value": 5.5, "unit": "mmol/L", "recorded_at": "2026-01-01T08:00:00"},
+        headers=auth_headers
+    )
+    assert response.status_code == 201
+    data = response.json()
+    assert data["unit"] == "mg/dL"
+    assert round(data["value"], 2) == 99.09
+    
+    vitals = client.get("/api/v1/health/vitals/blood_glucose", headers=auth_headers).json()
+    assert [(round(v["value"], 2), v["unit"]) for v in vitals] == [(99.09, "mg/dL")]
+
+
+def test_vital_incompatible_unit(client, auth_headers):
+    """Test that a unit that cannot be converted is rejected everywhere."""
+    vital = {"type": "heart_rate", "value": 72, "unit": "mmHg", "recorded_at": "2026-01-01T08:00:00"}
+    response = client.post("/api/v1/health/vitals", json=vital, headers=auth_headers)
+    assert response.status_code == 422
+    
+    response = client.post("/api/v1/health/sync", json=[{"kind": "vital", **vital}], headers=auth_headers)
+    assert response.status_code == 422
+    
+    response = client.post(
+        "/api/v1/health/vitals/stream",
+        content=json.dumps(vital),
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    assert response.json()["rejected"] == 1
+    
+    assert client.get("/api/v1/health/vitals/heart_rate", headers=auth_headers).json() == []
+
+
+def test_unknown_vital_type_is_registered(client, auth_headers):
+    """Test that a new vital type is created with the unit it was first sent in."""
+    for value in (3, 4):
+        response = client.post(
+            "/api/v1/health/vitals",
+            json={"type": "stress_level", "value": value, "unit": "score", "recorded_at": "2026-01-01T08:00:00"},
+            headers=auth_headers
+        )
+        assert response.status_code == 201
+    
+    vitals = client.get("/api/v1/health/vitals/stress_level", headers=auth_headers).json()
+    assert sorted(v["value"] for v in vitals) == [3, 4]
+    assert all(v["unit"] == "score" for v in vitals)
+
+
+def test_unknown_vital_type_lookups_are_throttled(client, monkeypatch):
+    """Test that lookups of unknown type names do not reload the type table each time."""
+    registry = VitalTypeRegistry(reload_seconds=60)
+    loads = []
+    load = registry._load
+    
+    async def counting_load(db):
+        loads.append(1)
+        await load(db)
+    
+    monkeypatch.setattr(registry, "_load", counting_load)
+    
+    async def run():
+        async with TestingAsyncSessionLocal() as db:
+            assert (await registry.get(db, "heart_rate")).unit == "bpm"
+            for name in ("no_such_type", "no_such_type", "other_typo"):
+                assert await registry.get(db, name) is None
+            assert len(loads) == 1
+    
+            # A type created through the registry is found on the next miss
+            await registry.resolve(db, "stress_level", "score")
+            await db.commit()
+            assert (await registry.get(db, "stress_level")).unit == "score"
+            assert len(loads) == 2
+    
+    asyncio.run(run())
@@ -1,6 +1,10 @@
 import pytest
 from datetime import datetime, date
 
+from sqlalchemy import event
+
+from app.tests.conftest import async_engine
+
 
 @pytest.mark.asyncio
 async def test_create_meal_with_food_name(client, auth_headers):
@@ -43,6 +47,88 @@ def test_create_meal_manual(client, auth_headers):
     assert data["protein"] == 30
 
 
+def test_create_meal_with_items(client, auth_headers):
+    """Test a meal logged as line items: totals are their sums and the detail lists them."""
+    response = client.post(
+        "/api/v1/diet/meals",
+        json={
+            "name": "Lunch plate",
+            "meal_type": "lunch",
+            "datetime": "2026-01-01T12:00:00",
+            "items": [
+                {"food_name": "green salad", "quantity": "1 bowl"},
+                {"food_name": "grilled chicken", "quantity": "150g"},
+                {"food_name": "rice"}
+            ]
+        },
+        headers=auth_headers
+    )
+    assert response.status_code == 201
+    data = response.json()
+    # From the food database: a bowl of salad, 150 g of a 172 g chicken breast, a cup of rice
+    assert [item["calories"] for item in data["items"]] == [25, 247.7, 205]
+    assert data["calories"] == pytest.approx(477.7)
+    assert [item["food_name"] for item in data["items"]] == ["green salad", "grilled chicken", "rice"]
+    assert data["items"][1]["quantity"] == "150g"
+    assert data["raw_nutrition_data"] is None
+    
+    detail = client.get(f"/api/v1/diet/meals/{data['id']}", headers=auth_headers).json()
+    assert detail["items"] == data["items"]
+    summary = client.get("/api/v1/diet/summary?from=2026-01-01&to=2026-01-01", headers=auth_headers).json()
+    assert summary[0]["total_calories"] == pytest.approx(477.7)
+    # Line items are deleted with their meal
+    assert client.delete(f"/api/v1/diet/meals/{data['id']}", headers=auth_headers).status_code == 204
+    
+    # Manual meals have no items; an empty list is rejected
+    manual = client.post(
+        "/api/v1/diet/meals",
+        json={"name": "Snack", "meal_type": "snack", "datetime": "2026-01-01T16:00:00", "calories": 90},
+        headers=auth_headers
+    )
+    assert manual.json()["items"] == []
+    empty = client.post(
+        "/api/v1/diet/meals",
+        json={"name": "Snack", "meal_type": "snack", "datetime": "2026-01-01T16:00:00", "items": []},
+        headers=auth_headers
+    )
+    assert empty.status_code == 422
+
+
+def test_meal_with_items_nutrition_follows_items(client, auth_headers):
+    """Test that items cannot be mixed with other nutrition input, and totals of an itemized meal stay their sum."""
+    meal = {"name": "Breakfast", "meal_type": "breakfast", "datetime": "2026-01-01T08:00:00"}
+    for mixed in ({"food_name": "toast"}, {"quantity": "2"}, {"calories": 300}):
+        response = client.post(
+            "/api/v1/diet/meals",
+            json={**meal, "items": [{"food_name": "banana"}], **mixed},
+            headers=auth_headers
+        )
+        assert response.status_code == 422, mixed
+    
+    data = client.post(
+        "/api/v1/diet/meals",
+        json={**meal, "items": [{"food_name": "banana"}, {"food_name": "apple"}]},
+        headers=auth_headers
+    ).json()
+    for field in ("calories", "carbs", "protein", "fat"):
+        response = client.patch(f"/api/v1/diet/meals/{data['id']}", json={field: 1000}, headers=auth_headers)
+        assert response.status_code == 409, field
+    
+    response = client.patch(f"/api/v1/diet/meals/{data['id']}", json={"name": "Fruit"}, headers=auth_headers)
+    assert response.status_code == 200
+    updated = response.json()
+    assert updated["name"] == "Fruit"
+    assert updated["calories"] == data["calories"] == sum(item["calories"] for item in data["items"])
+    assert updated["items"] == data["items"]
+    summary = client.get("/api/v1/diet/summary?from=2026-01-01&to=2026-01-01", headers=auth_headers).json()
+    assert summary[0]["total_calories"] == data["calories"]
+    
+    # Meals without items keep their editable totals
+    manual = client.post("/api/v1/diet/meals", json={**meal, "calories": 300}, headers=auth_headers).json()
+    response = client.patch(f"/api/v1/diet/meals/{manual['id']}", json={"calories": 350}, headers=auth_headers)
+    assert (response.json()["calories"], response.json()["items"]) == (350, [])
+
+
 def test_get_meals(client, auth_headers):
     """Test getting meals."""
     # Create a meal
@@ -107,3 +193,83 @@ def test_get_diet_summary(client, auth_headers):
     assert today_summary is not None
     assert today_summary["total_calories"] == 800
 
+
+def test_diet_summary_range_and_totals_only(client, auth_headers):
+    """Test the summary's day boundaries and include_meals=false."""
+    for name, when in [("Late", "2026-01-02T23:59:59"), ("Early", "2026-01-03T00:00:00")]:
+        client.post(
+            "/api/v1/diet/meals",
+            json={"name": name, "meal_type": "snack", "datetime": when, "calories": 100},
+            headers=auth_headers
+        )
+    
+    statements = []
+    
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        summary = client.get("/api/v1/diet/summary?from=2026-01-01&to=2026-01-02", headers=auth_headers).json()
+        meal_statements = [statement for statement in statements if "FROM meals" in statement]
+        statements.clear()
+        totals = client.get(
+            "/api/v1/diet/summary?from=2026-01-01&to=2026-01-02&include_meals=false", headers=auth_headers
+        ).json()
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    
+    assert [(day["total_calories"], [meal["name"] for meal in day["meals"]]) for day in summary] == [
+        (0, []), (100, ["Late"])
+    ]
+    # The range is on the indexed column itself, not date(datetime)
+    assert len(meal_statements) == 1 and "date(" not in meal_statements[0]
+    
+    assert totals == [{key: value for key, value in day.items() if key != "meals"} for day in summary]
+    assert not any("FROM meals" in statement for statement in statements)
+
+
+def test_raw_nutrition_data_is_deferred(client, auth_headers):
+    """Test that meal lists neither load nor return the raw nutrition payload."""
+    meal_id = client.post(
+        "/api/v1/diet/meals",
+        json={"name": "Dinner", "meal_type": "dinner", "datetime": datetime.now().isoformat(), "food_name": "rice"},
+        headers=auth_headers
+    ).json()["id"]
+    
+    statements = []
+    
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        meals = client.get("/api/v1/diet/meals", headers=auth_headers).json()
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    assert "raw_nutrition_data" not in meals[0]
+    assert not any("raw_nutrition_data" in statement for statement in statements)
+    
+    meal = client.get(f"/api/v1/diet/meals/{meal_id}", headers=auth_headers).json()
+    assert meal["raw_nutrition_data"]["food_name"] == "rice"
+
+
+def test_meal_fields_projection(client, auth_headers):
+    """Test narrowing list responses with ?fields=."""
+    client.post(
+        "/api/v1/diet/meals",
+        json={"name": "Dinner", "meal_type": "dinner", "datetime": datetime.now().isoformat(), "food_name": "rice"},
+        headers=auth_headers
+    )
+    
+    response = client.get("/api/v1/diet/meals?fields=name,calories", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == [{"name": "Dinner", "calories": response.json()[0]["calories"]}]
+    
+    # The deferred payload can be asked for explicitly
+    response = client.get("/api/v1/diet/meals?fields=id,raw_nutrition_data", headers=auth_headers)
+    assert set(response.json()[0]) == {"id", "raw_nutrition_data"}
+    assert response.json()[0]["raw_nutrition_data"]["food_name"] == "rice"
+    
+    response = client.get("/api/v1/diet/meals?fields=name,password", headers=auth_headers)
+    assert response.status_code == 400
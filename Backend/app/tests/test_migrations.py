@@ -0,0 +1,95 @@
+import os
+import sqlite3
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine
+
+import app.models  # noqa: F401 - registers every model on Base
+from app.db.base import Base
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _alembic_config(url: str) -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+def test_migrations_upgrade_populated_database(tmp_path):
+    """Test upgrading a pre-migration database that has duplicate step rows."""
+    path = tmp_path / "legacy.db"
+    url = f"sqlite:///{path}"
+    
+    # Build the pre-migration schema, then add data including duplicates
+    command.upgrade(_alembic_config(url), "0001")
+    con = sqlite3.connect(path)
+    con.execute("INSERT INTO users (id, name, email, hashed_password) VALUES (1, 'a', 'a@example.com', 'x')")
+    for steps in (100, 200, 300):
+        con.execute(
+            "INSERT INTO step_summaries (user_id, date, step_count, source) VALUES (1, '2026-01-01', ?, 'manual')",
+            (steps,)
+        )
+    con.execute(
+        "INSERT INTO meals (user_id, name, meal_type, datetime, calories) "
+        "VALUES (1, 'Toast', 'BREAKFAST', '2026-01-01 08:00:00', 120)"
+    )
+    con.commit()
+    con.close()
+    
+    # Vitals as stored before types were dictionary-encoded
+    command.upgrade(_alembic_config(url), "0005")
+    con = sqlite3.connect(path)
+    con.executemany(
+        "INSERT INTO vitals (user_id, type, value, unit, recorded_at) VALUES (1, ?, ?, ?, '2026-01-01 08:00:00')",
+        [("blood_glucose", 5.5, "mmol/L"), ("heart_rate", 60, "bpm"), ("stress_level", 3, "score")]
+    )
+    con.commit()
+    con.close()
+    
+    command.upgrade(_alembic_config(url), "head")
+    
+    con = sqlite3.connect(path)
+    try:
+        assert con.execute("SELECT step_count FROM step_summaries").fetchall() == [(300,)]
+        assert con.execute("SELECT COUNT(*) FROM meals").fetchone() == (1,)
+        indexes = {row[0] for row in con.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert "ix_vitals_user_id_type_id_recorded_at" in indexes
+        assert "ix_vitals_type" not in indexes
+        assert "uq_vitals_user_id_client_sample_id" in indexes
+    
+        vitals = dict(con.execute(
+            "SELECT vital_types.name, vitals.value FROM vitals JOIN vital_types ON vital_types.id = vitals.type_id"
+        ).fetchall())
+        assert round(vitals["blood_glucose"], 2) == 99.09
+        assert vitals["heart_rate"] == 60
+        assert vitals["stress_level"] == 3
+        assert con.execute("SELECT unit FROM vital_types WHERE name = 'stress_level'").fetchone() == ("score",)
+        assert con.execute("SELECT SUM(count) FROM vital_rollups_day").fetchone() == (3,)
+    
+        # Existing records are backfilled into the delta sync change log
+        changes = con.execute("SELECT collection, COUNT(*) FROM change_log GROUP BY collection").fetchall()
+        assert dict(changes) == {"meals": 1, "steps": 1, "vitals": 3}
+        
+        # Daily stats are backfilled from the same records
+        stats = con.execute(
+            "SELECT day, calories, meal_count, steps, heart_rate_sum, heart_rate_count FROM daily_stats"
+        ).fetchall()
+        assert stats == [("2026-01-01", 120, 1, 300, 60, 1)]
+    finally:
+        con.close()
+
+
+def test_migrations_upgrade_create_all_database(tmp_path):
+    """Test that a database created with create_all() matches the migrated schema once stamped."""
+    url = f"sqlite:///{tmp_path / 'created.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    
+    config = _alembic_config(url)
+    command.stamp(config, "head")
+    command.upgrade(config, "head")
+    command.check(config)
@@ -0,0 +1,119 @@
+from datetime import date, datetime, timezone
+
+import cbor2
+import msgpack
+
+from app.api.negotiation import CBOR, JSON, MSGPACK, negotiate
+
+MSGPACK_HEADERS = {"Accept": "application/msgpack"}
+CBOR_HEADERS = {"Accept": "application/cbor"}
+
+
+def _iso(value):
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None).isoformat()
+    return value
+
+
+def test_negotiate():
+    """Test Accept header negotiation with q-values."""
+    assert negotiate(None) is JSON
+    assert negotiate("*/*") is JSON
+    assert negotiate("text/html") is JSON
+    assert negotiate("application/msgpack") is MSGPACK
+    assert negotiate("application/json;q=0.5, application/cbor") is CBOR
+    assert negotiate("application/x-msgpack, application/json") is MSGPACK
+    assert negotiate("application/msgpack;q=0.2, */*;q=0.8") is JSON
+
+
+def test_msgpack_list(client, auth_headers):
+    """Test that lists render as msgpack with native timestamps."""
+    client.post(
+        "/api/v1/tasks",
+        json={"title": "Task", "due_datetime": "2026-01-01T09:30:00"},
+        headers=auth_headers
+    )
+    
+    response = client.get("/api/v1/tasks", headers={**auth_headers, **MSGPACK_HEADERS})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    assert response.headers["vary"] == "Accept"
+    
+    tasks = msgpack.unpackb(response.content, timestamp=3)
+    expected = client.get("/api/v1/tasks", headers=auth_headers).json()
+    assert tasks[0]["due_datetime"] == datetime(2026, 1, 1, 9, 30, tzinfo=timezone.utc)
+    assert [{key: _iso(value) for key, value in task.items()} for task in tasks] == expected
+    assert len(response.content) < len(client.get("/api/v1/tasks", headers=auth_headers).content)
+
+
+def test_cbor_summary(client, auth_headers):
+    """Test that responses rendered by FastAPI are re-encoded with native dates."""
+    client.post(
+        "/api/v1/diet/meals",
+        json={"name": "Lunch", "meal_type": "lunch", "datetime": "2026-01-01T12:00:00", "calories": 500},
+        headers=auth_headers
+    )
+    
+    response = client.get(
+        "/api/v1/diet/summary",
+        params={"from": "2026-01-01", "to": "2026-01-02"},
+        headers={**auth_headers, **CBOR_HEADERS}
+    )
+    assert response.headers["content-type"] == "application/cbor"
+    summaries = cbor2.loads(response.content)
+    assert [s["total_calories"] for s in summaries] == [500, 0]
+    assert summaries[0]["meals"][0]["datetime"] == datetime(2026, 1, 1, 12, tzinfo=timezone.utc)
+    
+    # Single objects too
+    response = client.get("/api/v1/profile", headers={**auth_headers, **CBOR_HEADERS})
+    assert cbor2.loads(response.content)["email"] == "test@example.com"
+
+
+def test_binary_request_bodies(client, auth_headers):
+    """Test msgpack and CBOR request bodies on the health ingestion endpoints."""
+    recorded_at = datetime(2026, 1, 1, 8, tzinfo=timezone.utc)
+    response = client.post(
+        "/api/v1/health/vitals",
+        content=msgpack.packb({"type": "heart_rate", "value": 61, "unit": "bpm",
+                               "recorded_at": msgpack.Timestamp.from_datetime(recorded_at)}),
+        headers={**auth_headers, "Content-Type": "application/msgpack"}
+    )
+    assert response.status_code == 201
+    assert response.json()["recorded_at"] == "2026-01-01T08:00:00"
+    
+    response = client.post(
+        "/api/v1/health/sync",
+        content=cbor2.dumps([
+            {"kind": "steps", "date": date(2026, 1, 1), "step_count": 9000, "source": "healthkit"},
+            {"kind": "vital", "type": "heart_rate", "value": 64, "unit": "bpm",
+             "recorded_at": datetime(2026, 1, 1, 9, tzinfo=timezone.utc), "client_sample_id": "hr-1"},
+        ], datetime_as_timestamp=True),
+        headers={**auth_headers, "Content-Type": "application/cbor", **CBOR_HEADERS}
+    )
+    assert response.status_code == 200
+    assert cbor2.loads(response.content)["vitals"] == 1
+    
+    vitals = client.get("/api/v1/health/vitals/heart_rate", headers=auth_headers).json()
+    assert [v["recorded_at"] for v in vitals] == ["2026-01-01T08:00:00", "2026-01-01T09:00:00"]
+    
+    # Malformed bodies are rejected; errors stay JSON
+    response = client.post(
+        "/api/v1/health/vitals",
+        content=b"\xc1",
+        headers={**auth_headers, "Content-Type": "application/msgpack", **MSGPACK_HEADERS}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid msgpack body"
+
+
+def test_etag_per_representation(client, auth_headers):
+    """Test that JSON and msgpack representations have distinct ETags."""
+    json_etag = client.get("/api/v1/tasks", headers=auth_headers).headers["etag"]
+    msgpack_etag = client.get("/api/v1/tasks", headers={**auth_headers, **MSGPACK_HEADERS}).headers["etag"]
+    assert json_etag != msgpack_etag
+    
+    response = client.get("/api/v1/tasks", headers={**auth_headers, **MSGPACK_HEADERS, "If-None-Match": json_etag})
+    assert response.status_code == 200
+    response = client.get("/api/v1/tasks", headers={**auth_headers, **MSGPACK_HEADERS, "If-None-Match": msgpack_etag})
+    assert response.status_code == 304
+    assert response.headers["vary"] == "Accept"
@@ -0,0 +1,112 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.services.nutrition_api import NutritionAPIClient, nutrition_client
+
+CHICKEN = {"foods": [{"food_name": "chicken", "nf_calories": 231, "nf_total_carbohydrate": 0,
+                      "nf_protein": 43, "nf_total_fat": 5}]}
+
+
+async def _upstream(request: httpx.Request) -> httpx.Response:
+    query = json.loads(request.content)["query"]
+    await asyncio.sleep(0.01)
+    if "chicken" in query:
+        return httpx.Response(200, json=CHICKEN)
+    if "boom" in query:
+        return httpx.Response(503)
+    if "busy" in query:
+        raise httpx.PoolTimeout("pool exhausted", request=request)
+    return httpx.Response(404)
+
+
+def test_shared_client_requests_and_metrics():
+    """Test upstream lookups through one pooled client and its counters."""
+    seen = []
+    in_flight = []
+    
+    async def handler(request):
+        seen.append(request)
+        in_flight.append(api.pool_stats()["in_flight"])
+        return await _upstream(request)
+    
+    api = NutritionAPIClient()
+    
+    async def run():
+        api.api_key = "key"
+        api.open(transport=httpx.MockTransport(handler))
+        client = api._http
+        try:
+            results = await asyncio.gather(*[api._fetch_nutrition_data("chicken", "200 g") for _ in range(5)])
+            assert all(result["calories"] == 231 and result["protein"] == 43 for result in results)
+            assert await api._fetch_nutrition_data("zzzz", None) is None
+            with pytest.raises(httpx.HTTPStatusError):
+                await api._fetch_nutrition_data("boom", None)
+            with pytest.raises(httpx.PoolTimeout):
+                await api._fetch_nutrition_data("busy", None)
+            assert api._http is client
+    
+            stats = api.pool_stats()
+            assert stats["requests"] == 8
+            assert stats["errors"] == 2
+            assert stats["pool_timeouts"] == 1
+            assert stats["in_flight"] == 0
+            assert stats["peak_in_flight"] == 5
+            assert max(in_flight) == 5
+            assert client.timeout.connect == settings.NUTRITION_HTTP_CONNECT_TIMEOUT_SECONDS
+            assert client.timeout.read == settings.NUTRITION_HTTP_READ_TIMEOUT_SECONDS
+            assert client.timeout.pool == settings.NUTRITION_HTTP_POOL_TIMEOUT_SECONDS
+        finally:
+            await api.close()
+        assert not api.pool_stats()["open"]
+    
+    asyncio.run(run())
+    assert seen[0].url == f"{settings.NUTRITION_API_URL}/natural/nutrients"
+    assert seen[0].headers["x-app-key"] == "key"
+    assert json.loads(seen[0].content) == {"query": "200 g chicken"}
+
+
+def test_upstream_failures_fall_back_to_food_db(client, auth_headers, upstream_lookups, monkeypatch):
+    """Test that timeouts and unknown foods fall back to local estimates, and only the latter is cached."""
+    calls = []
+    
+    async def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ConnectTimeout("timed out", request=request)
+        return httpx.Response(404)
+    
+    monkeypatch.setattr(nutrition_client, "api_key", "key")
+    nutrition_client.open(transport=httpx.MockTransport(handler))
+    try:
+        for _ in range(3):
+            response = client.post(
+                "/api/v1/diet/meals",
+                json={"name": "Snack", "meal_type": "snack", "datetime": "2026-01-01T15:00:00", "food_name": "apple"},
+                headers=auth_headers
+            )
+            assert response.status_code == 201
+            assert response.json()["raw_nutrition_data"]["source"] == "food_db"
+            assert response.json()["calories"] == 95
+    finally:
+        asyncio.run(nutrition_client.close())
+    # The timeout is retried on the next meal; the 404 is then cached
+    assert len(calls) == 2
+
+
+def test_lifespan_owns_client(monkeypatch):
+    """Test that the app opens the pooled client on startup and closes it on shutdown."""
+    monkeypatch.setattr(nutrition_client, "api_key", "key")
+    with TestClient(app) as c:
+        stats = c.get("/health/nutrition").json()
+        assert stats["http"]["open"]
+        assert stats["http"]["max_connections"] == settings.NUTRITION_HTTP_MAX_CONNECTIONS
+        assert stats["http"]["in_flight"] == 0
+        assert set(stats["cache"]) == {"hits", "stale_hits", "misses", "coalesced", "size", "max_size"}
+        assert stats["food_db"]["open"]
+    assert not nutrition_client.pool_stats()["open"]
@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.nutrition_api import nutrition_client
+from app.services.nutrition_cache import NutritionCache, cache_key
+from app.tests.conftest import TestingAsyncSessionLocal
+
+
+class FakeUpstream:
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = []
+    
+    async def fetch(self, food_name, quantity):
+        self.calls.append((food_name, quantity))
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def _cache(**kwargs):
+    options = {"max_size": 100, "ttl_seconds": 3600, "negative_ttl_seconds": 3600, "stale_seconds": 3600}
+    return NutritionCache(**{**options, **kwargs}, session_factory=TestingAsyncSessionLocal)
+
+
+def test_nutrition_cache_hits_and_negatives(client):
+    """Test fresh, negative and persisted entries, and that errors are not cached."""
+    async def run():
+        upstream = FakeUpstream([{"calories": 250}, None, RuntimeError("timeout"), {"calories": 80}])
+        cache = _cache(max_size=1)
+    
+        assert await cache.get("Chicken Salad", "1 bowl", upstream.fetch) == {"calories": 250}
+        assert await cache.get("  chicken   salad ", "1 Bowl", upstream.fetch) == {"calories": 250}
+        assert await cache.get("zzzz", None, upstream.fetch) is None
+        assert await cache.get("ZZZZ", None, upstream.fetch) is None
+        assert len(upstream.calls) == 2
+    
+        with pytest.raises(RuntimeError):
+            await cache.get("apple", None, upstream.fetch)
+        assert await cache.get("apple", None, upstream.fetch) == {"calories": 80}
+        assert cache.stats() == {"hits": 2, "stale_hits": 0, "misses": 4, "coalesced": 0, "size": 1, "max_size": 1}
+    
+        # A new process starts with an empty LRU but finds the stored entries
+        restarted = _cache()
+        assert await restarted.get("chicken salad", "1 bowl", upstream.fetch) == {"calories": 250}
+        assert await restarted.get("zzzz", None, upstream.fetch) is None
+        assert restarted.stats()["hits"] == 2
+        assert len(upstream.calls) == 4
+    
+    asyncio.run(run())
+    assert cache_key("Chicken  Salad", " 1 Bowl") == "1 bowl|chicken salad"
+
+
+def test_nutrition_cache_keeps_lookup_when_storing_fails(client, caplog):
+    """Test that a failed write to the cache table still returns and remembers the fetched entry."""
+    def failing_session():
+        db = TestingAsyncSessionLocal()
+    
+        async def commit():
+            raise RuntimeError("database is locked")
+    
+        db.commit = commit
+        return db
+    
+    async def run():
+        upstream = FakeUpstream([{"calories": 250}])
+        cache = NutritionCache(
+            max_size=100, ttl_seconds=3600, negative_ttl_seconds=3600, stale_seconds=3600,
+            session_factory=failing_session
+        )
+        assert await cache.get("chicken salad", None, upstream.fetch) == {"calories": 250}
+        assert await cache.get("chicken salad", None, upstream.fetch) == {"calories": 250}
+        assert len(upstream.calls) == 1
+        # Nothing was stored for other processes
+        assert await _cache().get("chicken salad", None, FakeUpstream([None]).fetch) is None
+    
+    asyncio.run(run())
+    assert "Storing nutrition data for '|chicken salad' failed: database is locked" in caplog.text
+
+
+def test_nutrition_cache_stale_while_revalidate(client):
+    """Test that stale entries are served at once and refreshed in the background."""
+    async def run():
+        upstream = FakeUpstream([{"calories": 1}, {"calories": 2}, {"calories": 3}])
+        cache = _cache(ttl_seconds=0)
+    
+        assert await cache.get("rice", None, upstream.fetch) == {"calories": 1}
+        # Stale: the old value is returned and one refresh is started
+        assert await cache.get("rice", None, upstream.fetch) == {"calories": 1}
+        assert await cache.get("rice", None, upstream.fetch) == {"calories": 1}
+        await cache.close()
+        assert len(upstream.calls) == 2
+        assert await _cache().get("rice", None, upstream.fetch) == {"calories": 2}
+    
+        # Past the stale window the lookup is synchronous
+        cache.stale_seconds = 0
+        assert await cache.get("rice", None, upstream.fetch) == {"calories": 3}
+        assert cache.stats()["stale_hits"] == 2
+    
+    asyncio.run(run())
+
+
+def test_concurrent_lookups_are_coalesced(client, upstream_lookups, monkeypatch):
+    """Test that concurrent lookups of one food hit upstream once and item lookups are bounded."""
+    calls = []
+    active = peak = 0
+    
+    async def fetch(food_name, quantity):
+        nonlocal active, peak
+        calls.append(food_name)
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return {"calories": len(food_name), "carbs": 0, "protein": 0, "fat": 0}
+    
+    async def run():
+        cache = _cache()
+        results = await asyncio.gather(*(cache.get("Chicken Salad", None, fetch) for _ in range(10)))
+        assert all(result == {"calories": 13, "carbs": 0, "protein": 0, "fat": 0} for result in results)
+        assert calls == ["Chicken Salad"]
+        assert (cache.stats()["misses"], cache.stats()["coalesced"]) == (1, 9)
+    
+        calls.clear()
+        foods = [("apple", None), ("bread", "2 slices"), ("cheese", None), ("apple", None), ("eggs", "2")]
+        results = await nutrition_client.get_nutrition_data_many(foods)
+        assert [result["calories"] for result in results] == [5, 5, 6, 5, 4]
+        assert sorted(calls) == ["apple", "bread", "cheese", "eggs"]
+    
+    monkeypatch.setattr(nutrition_client, "api_key", "key")
+    monkeypatch.setattr(nutrition_client, "_fetch_nutrition_data", fetch)
+    monkeypatch.setattr(settings, "MEAL_ITEM_MAX_CONCURRENT_LOOKUPS", 2)
+    asyncio.run(run())
+    assert peak == 2
+
+
+def test_create_meal_uses_nutrition_cache(client, auth_headers, upstream_lookups, monkeypatch):
+    """Test that logging the same food twice looks it up upstream once."""
+    upstream = FakeUpstream([{"calories": 420, "carbs": 12, "protein": 38, "fat": 22, "raw_data": {"foods": []}}])
+    monkeypatch.setattr(nutrition_client, "api_key", "key")
+    monkeypatch.setattr(nutrition_client, "_fetch_nutrition_data", upstream.fetch)
+    
+    for food_name in ["Chicken Salad", "chicken salad"]:
+        response = client.post(
+            "/api/v1/diet/meals",
+            json={"name": "Lunch", "meal_type": "lunch", "datetime": "2026-01-01T12:00:00",
+                  "food_name": food_name, "quantity": "1 bowl"},
+            headers=auth_headers
+        )
+        assert response.status_code == 201
+        assert response.json()["calories"] == 420
+    assert len(upstream.calls) == 1
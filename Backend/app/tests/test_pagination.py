@@ -0,0 +1,163 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.api.pagination import NEXT_CURSOR_HEADER, PageParams, encode_cursor, keyset
+from app.models.meal import Meal
+from app.models.task import Task
+from app.tests.conftest import TestingSessionLocal, engine
+
+
+def _pages(client, url, headers, limit):
+    pages = []
+    params = {"limit": limit}
+    while True:
+        response = client.get(url, params=params, headers=headers)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages
+        params = {"limit": limit, "cursor": cursor}
+
+
+def test_paginate_tasks(client, auth_headers):
+    """Test that pages cover every task once, including tasks without a due date."""
+    base = datetime(2026, 1, 1, 9)
+    for i in range(7):
+        due = (base + timedelta(days=i % 3)).isoformat() if i < 5 else None
+        client.post("/api/v1/tasks", json={"title": f"Task {i}", "due_datetime": due}, headers=auth_headers)
+    
+    pages = _pages(client, "/api/v1/tasks", auth_headers, limit=3)
+    assert [len(page) for page in pages] == [3, 3, 1]
+    tasks = [task for page in pages for task in page]
+    assert sorted(t["title"] for t in tasks) == [f"Task {i}" for i in range(7)]
+    
+    # Due tasks in order (ties by creation), then tasks without a due date
+    dues = [t["due_datetime"] for t in tasks]
+    assert dues[5:] == [None, None]
+    assert dues[:5] == sorted(dues[:5])
+    
+    # Without limit or cursor every task is returned, without a cursor
+    response = client.get("/api/v1/tasks", headers=auth_headers)
+    assert len(response.json()) == 7
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_paginate_meals_descending(client, auth_headers):
+    """Test newest-first paging with several meals at the same time."""
+    when = datetime(2026, 1, 1, 12).isoformat()
+    for i in range(5):
+        client.post(
+            "/api/v1/diet/meals",
+            json={"name": f"Meal {i}", "meal_type": "lunch", "datetime": when, "calories": 100},
+            headers=auth_headers
+        )
+    
+    pages = _pages(client, "/api/v1/diet/meals", auth_headers, limit=2)
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [m["name"] for page in pages for m in page] == [f"Meal {i}" for i in reversed(range(5))]
+
+
+def test_paginate_chunked_vitals(client, auth_headers, monkeypatch):
+    """Test paging across vitals rows and chunked samples."""
+    from app.core.config import settings
+    
+    base = datetime(2026, 1, 1, 8)
+    for i in range(3):
+        client.post(
+            "/api/v1/health/vitals",
+            json={"type": "heart_rate", "value": 60 + i, "unit": "bpm",
+                  "recorded_at": (base + timedelta(minutes=2 * i)).isoformat()},
+            headers=auth_headers
+        )
+    monkeypatch.setattr(settings, "VITALS_STORAGE_MODE", "chunked")
+    for i in range(3):
+        client.post(
+            "/api/v1/health/vitals",
+            json={"type": "heart_rate", "value": 70 + i, "unit": "bpm",
+                  "recorded_at": (base + timedelta(minutes=2 * i + 1)).isoformat()},
+            headers=auth_headers
+        )
+    
+    pages = _pages(client, "/api/v1/health/vitals/heart_rate", auth_headers, limit=4)
+    assert [len(page) for page in pages] == [4, 2]
+    assert [v["value"] for page in pages for v in page] == [60, 70, 61, 71, 62, 72]
+
+
+def test_chunked_vitals_merge_offset_times(client, auth_headers, monkeypatch):
+    """Test that rows and chunked samples sent with offsets merge in UTC order."""
+    from app.api.routes.health import _vital_position
+    from app.core.config import settings
+    
+    for value, recorded_at in [(60, "2026-01-01T09:00:00+01:00"), (62, "2026-01-01T03:10:00-05:00")]:
+        client.post(
+            "/api/v1/health/vitals",
+            json={"type": "heart_rate", "value": value, "unit": "bpm", "recorded_at": recorded_at},
+            headers=auth_headers
+        )
+    monkeypatch.setattr(settings, "VITALS_STORAGE_MODE", "chunked")
+    for value, recorded_at in [(61, "2026-01-01T08:05:00Z"), (63, "2026-01-01T10:15:00+02:00")]:
+        client.post(
+            "/api/v1/health/vitals",
+            json={"type": "heart_rate", "value": value, "unit": "bpm", "recorded_at": recorded_at},
+            headers=auth_headers
+        )
+    
+    pages = _pages(client, "/api/v1/health/vitals/heart_rate", auth_headers, limit=3)
+    assert [v["value"] for page in pages for v in page] == [60, 61, 62, 63]
+    
+    # PostgreSQL returns rows with aware times; they still sort with naive chunk times
+    row = {"recorded_at": datetime.fromisoformat("2026-01-01T09:00:00+01:00"), "id": 1}
+    sample = {"recorded_at": datetime(2026, 1, 1, 7, 30), "id": None}
+    assert sorted([row, sample], key=_vital_position) == [sample, row]
+
+
+def test_paginate_with_fields(client, auth_headers):
+    """Test that a projected page keeps its next-page cursor."""
+    for i in range(3):
+        client.post("/api/v1/tasks", json={"title": f"Task {i}"}, headers=auth_headers)
+    
+    response = client.get("/api/v1/tasks", params={"limit": 2, "fields": "title"}, headers=auth_headers)
+    assert response.json() == [{"title": "Task 0"}, {"title": "Task 1"}]
+    
+    cursor = response.headers[NEXT_CURSOR_HEADER]
+    response = client.get("/api/v1/tasks", params={"cursor": cursor, "fields": "title"}, headers=auth_headers)
+    assert response.json() == [{"title": "Task 2"}]
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_pagination_validation(client, auth_headers):
+    """Test that malformed cursors and oversized limits are rejected."""
+    response = client.get("/api/v1/events", params={"cursor": "not-a-cursor"}, headers=auth_headers)
+    assert response.status_code == 400
+    
+    response = client.get("/api/v1/events", params={"limit": 100000}, headers=auth_headers)
+    assert response.status_code == 422
+
+
+def _query_plan(query) -> str:
+    compiled = query.compile(engine, compile_kwargs={"literal_binds": True})
+    db = TestingSessionLocal()
+    try:
+        return " ".join(row[-1] for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}"))
+    finally:
+        db.close()
+
+
+def test_keyset_query_uses_index(client):
+    """Test that a deep page is an index range seek rather than a scan."""
+    page = PageParams(cursor=encode_cursor(datetime(2026, 1, 1), 500), limit=50)
+    query = keyset(select(Meal).where(Meal.user_id == 1), page, Meal.datetime, Meal.id, descending=True)
+    plan = _query_plan(query)
+    assert "USING INDEX ix_meals_user_id_datetime" in plan
+    assert "datetime<" in plan.replace(" ", "")
+
+
+def test_keyset_nullable_column_uses_index(client):
+    """Test that pages of a nullable sort column, also past its NULLs, seek the sort key index in order."""
+    for cursor in (encode_cursor(datetime(2026, 1, 1), 500), encode_cursor(None, 500)):
+        page = PageParams(cursor=cursor, limit=50)
+        plan = _query_plan(keyset(select(Task).where(Task.user_id == 1), page, Task.due_datetime, Task.id))
+        assert "USING INDEX ix_tasks_user_id_due_datetime_id (user_id=? AND <expr>>?)" in plan
+        assert "TEMP B-TREE" not in plan
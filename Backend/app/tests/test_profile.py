@@ -0,0 +1,58 @@
+from app.core.user_cache import user_cache
+
+
+def test_user_context_is_cached(client, auth_headers):
+    """Test that repeated authenticated requests hit the user cache."""
+    client.get("/api/v1/auth/me", headers=auth_headers)
+    misses = user_cache.stats()["misses"]
+    hits = user_cache.stats()["hits"]
+    
+    response = client.get("/api/v1/profile/goals", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["daily_step_goal"] == 10000
+    
+    stats = user_cache.stats()
+    assert stats["misses"] == misses
+    assert stats["hits"] == hits + 1
+
+
+def test_update_profile_invalidates_cache(client, auth_headers):
+    """Test that profile updates are visible on the next request."""
+    client.get("/api/v1/profile", headers=auth_headers)
+    
+    response = client.patch(
+        "/api/v1/profile",
+        json={"name": "Renamed User"},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["name"] == "Renamed User"
+    
+    response = client.get("/api/v1/profile", headers=auth_headers)
+    assert response.json()["name"] == "Renamed User"
+
+
+def test_update_goals_invalidates_cache(client, auth_headers):
+    """Test that goal and connection updates are visible on the next request."""
+    client.get("/api/v1/profile/goals", headers=auth_headers)
+    
+    response = client.patch(
+        "/api/v1/profile/goals",
+        json={"daily_step_goal": 12000},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["daily_step_goal"] == 12000
+    
+    response = client.get("/api/v1/profile/goals", headers=auth_headers)
+    assert response.json()["daily_step_goal"] == 12000
+    
+    response = client.patch(
+        "/api/v1/profile/connections",
+        json={"apple_health_connected": True},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    
+    response = client.get("/api/v1/profile/connections", headers=auth_headers)
+    assert response.json()["apple_health_connected"] is True
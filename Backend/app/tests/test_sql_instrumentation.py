@@ -0,0 +1,52 @@
+import json
+import logging
+
+from app.core.sql_instrumentation import QueryStats
+
+
+def _query_count(response) -> int:
+    server_timing = response.headers["server-timing"]
+    return int(server_timing.split('desc="')[1].split(" ")[0])
+
+
+def test_server_timing_header(client, auth_headers):
+    """Test that responses report the SQL statement count and time."""
+    response = client.get("/", headers=auth_headers)
+    assert response.status_code == 200
+    assert _query_count(response) == 0
+    
+    response = client.get("/api/v1/insights/today", headers=auth_headers)
+    assert response.status_code == 200
+    server_timing = response.headers["server-timing"]
+    assert server_timing.startswith("db;dur=")
+    assert "db-slowest;dur=" in server_timing
+    assert _query_count(response) > 0
+
+
+def test_structured_log_line(client, auth_headers, caplog):
+    """Test that each request logs one JSON line with its SQL statistics."""
+    with caplog.at_level(logging.INFO, logger="app.sql"):
+        response = client.get("/api/v1/tasks", headers=auth_headers)
+    assert response.status_code == 200
+    
+    lines = [json.loads(r.getMessage()) for r in caplog.records if r.name == "app.sql"]
+    stats = [line for line in lines if line["event"] == "sql_stats"]
+    assert len(stats) == 1
+    assert stats[0]["path"] == "/api/v1/tasks"
+    assert stats[0]["status"] == 200
+    assert stats[0]["queries"] == _query_count(response)
+    assert stats[0]["slowest_statement"].startswith("SELECT")
+
+
+def test_n_plus_one_detection():
+    """Test that repeated identical statement shapes are flagged."""
+    stats = QueryStats()
+    for _ in range(5):
+        stats.record("SELECT * FROM meals WHERE meals.id = ?", 1.0)
+    stats.record("SELECT * FROM users WHERE users.id = ?", 3.0)
+    
+    assert stats.count == 6
+    assert stats.slowest_ms == 3.0
+    assert stats.repeated_statements(5) == {"SELECT * FROM meals WHERE meals.id = ?": 5}
+    assert stats.repeated_statements(6) == {}
+    assert stats.repeated_statements(0) == {}
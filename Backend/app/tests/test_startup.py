@@ -0,0 +1,47 @@
+import json
+import os
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Loaded on first use only (hashing, tokens, HTTP calls, database connections)
+LAZY_MODULES = ["passlib", "jose", "httpx", "aiosqlite", "bcrypt"]
+
+
+def test_import_has_no_side_effects(tmp_path):
+    """Test that importing the app neither touches the database nor loads heavy modules."""
+    database_path = tmp_path / "import.db"
+    code = (
+        "import json, sys\n"
+        "import app.main\n"
+        f"print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))\n"
+    )
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database_path}", PYTHONPATH=BACKEND_DIR)
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+    assert not database_path.exists()
+
+
+def test_create_app_returns_independent_apps():
+    """Test that the factory builds a fresh, fully routed app."""
+    from app.main import app, create_app
+    
+    new_app = create_app()
+    assert new_app is not app
+    
+    with TestClient(new_app) as client:
+        response = client.get("/health")
+        assert response.status_code == 200
+        assert response.json() == {"status": "healthy"}
@@ -0,0 +1,148 @@
+import asyncio
+
+from sqlalchemy import delete
+
+from app.core.config import settings
+from app.core.user_cache import user_cache
+from app.models.goal import Goal
+from app.services.change_log import record_changes
+from app.services.collection_versions import TASKS
+from app.tests.conftest import TestingAsyncSessionLocal
+
+
+def _sync(client, headers, **params):
+    response = client.get("/api/v1/sync", params=params, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_full_then_delta_sync(client, auth_headers):
+    """Test that a delta sync returns only records changed since the token, and tombstones."""
+    task = client.post("/api/v1/tasks", json={"title": "Task"}, headers=auth_headers).json()
+    meal = client.post(
+        "/api/v1/diet/meals",
+        json={"name": "Lunch", "meal_type": "lunch", "datetime": "2026-01-01T12:00:00", "calories": 500},
+        headers=auth_headers
+    ).json()
+    client.post(
+        "/api/v1/events",
+        json={"title": "Meeting", "start_datetime": "2026-01-01T09:00:00", "end_datetime": "2026-01-01T10:00:00"},
+        headers=auth_headers
+    )
+    client.post(
+        "/api/v1/health/sync",
+        json=[
+            {"kind": "steps", "date": "2026-01-01", "step_count": 9000, "source": "healthkit"},
+            {"kind": "vital", "type": "heart_rate", "value": 61, "unit": "bpm",
+             "recorded_at": "2026-01-01T08:00:00", "client_sample_id": "hr-1"},
+            {"kind": "activity", "type": "run", "duration_minutes": 30,
+             "datetime": "2026-01-01T07:00:00", "client_sample_id": "run-1"},
+        ],
+        headers=auth_headers
+    )
+    
+    full = _sync(client, auth_headers)
+    assert {name: len(records) for name, records in full["changes"].items()} == {
+        "tasks": 1, "events": 1, "meals": 1, "steps": 1, "vitals": 1, "activities": 1, "goals": 1
+    }
+    assert full["changes"]["vitals"][0]["type"] == "heart_rate"
+    assert full["has_more"] is False
+    
+    # Nothing changed
+    assert _sync(client, auth_headers, since=full["next_token"])["changes"]["tasks"] == []
+    
+    client.patch(f"/api/v1/tasks/{task['id']}", json={"status": "done"}, headers=auth_headers)
+    client.patch(f"/api/v1/tasks/{task['id']}", json={"title": "Renamed"}, headers=auth_headers)
+    client.delete(f"/api/v1/diet/meals/{meal['id']}", headers=auth_headers)
+    client.patch("/api/v1/profile/goals", json={"daily_step_goal": 12000}, headers=auth_headers)
+    
+    delta = _sync(client, auth_headers, since=full["next_token"])
+    assert [(t["title"], t["status"]) for t in delta["changes"]["tasks"]] == [("Renamed", "done")]
+    assert delta["changes"]["goals"][0]["daily_step_goal"] == 12000
+    assert delta["changes"]["meals"] == [] and delta["changes"]["vitals"] == []
+    assert delta["deleted"]["meals"] == [meal["id"]]
+    assert int(delta["next_token"]) > int(full["next_token"])
+
+
+def test_sync_pagination(client, auth_headers):
+    """Test that paging through the change log returns every record once."""
+    for i in range(5):
+        client.post("/api/v1/tasks", json={"title": f"Task {i}"}, headers=auth_headers)
+    
+    titles, token, pages = [], None, 0
+    while True:
+        page = _sync(client, auth_headers, limit=2, **({"since": token} if token else {}))
+        titles += [t["title"] for t in page["changes"]["tasks"]]
+        token, pages = page["next_token"], pages + 1
+        if not page["has_more"]:
+            break
+    assert titles == [f"Task {i}" for i in range(5)]
+    assert pages == 3  # goals entry from registration + 5 tasks
+    
+    response = client.get("/api/v1/sync", params={"since": "abc"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_sync_chunked_vitals(client, auth_headers, monkeypatch):
+    """Test that chunked vitals sync as the samples of their changed chunks."""
+    monkeypatch.setattr(settings, "VITALS_STORAGE_MODE", "chunked")
+    token = _sync(client, auth_headers)["next_token"]
+    for minute in range(3):
+        client.post(
+            "/api/v1/health/vitals",
+            json={"type": "heart_rate", "value": 60 + minute, "unit": "bpm",
+                  "recorded_at": f"2026-01-01T08:0{minute}:00"},
+            headers=auth_headers
+        )
+    
+    delta = _sync(client, auth_headers, since=token)
+    assert [v["value"] for v in delta["changes"]["vitals"]] == [60, 61, 62]
+
+
+def test_concurrent_changes_commit_in_token_order(client, auth_headers):
+    """Test that a write started during another one takes its sync token only after the other commits."""
+    first = client.post("/api/v1/tasks", json={"title": "First"}, headers=auth_headers).json()
+    second = client.post("/api/v1/tasks", json={"title": "Second"}, headers=auth_headers).json()
+    token = _sync(client, auth_headers)["next_token"]
+    user_id = client.get("/api/v1/profile", headers=auth_headers).json()["id"]
+    commits = []
+    
+    async def write(task_id, delay, hold):
+        async with TestingAsyncSessionLocal() as db:
+            await asyncio.sleep(delay)
+            await record_changes(db, user_id, TASKS, [task_id])
+            await asyncio.sleep(hold)
+            await db.commit()
+            commits.append(task_id)
+    
+    async def run():
+        # The first write takes its token, then the second starts and would commit first
+        await asyncio.gather(write(first["id"], 0, 0.1), write(second["id"], 0.02, 0))
+    
+    asyncio.run(run())
+    assert commits == [first["id"], second["id"]]
+    
+    delta = _sync(client, auth_headers, since=token)
+    assert [t["title"] for t in delta["changes"]["tasks"]] == ["First", "Second"]
+    page = _sync(client, auth_headers, since=token, limit=1)
+    assert [t["title"] for t in page["changes"]["tasks"]] == ["First"]
+    page = _sync(client, auth_headers, since=page["next_token"])
+    assert [t["title"] for t in page["changes"]["tasks"]] == ["Second"]
+
+
+def test_default_goals_created_on_load_are_synced(client, auth_headers):
+    """Test that goals created for a user found without any are logged for delta sync."""
+    token = _sync(client, auth_headers)["next_token"]
+    user_id = client.get("/api/v1/profile", headers=auth_headers).json()["id"]
+    
+    async def drop_goals():
+        async with TestingAsyncSessionLocal() as db:
+            await db.execute(delete(Goal).where(Goal.user_id == user_id))
+            await db.commit()
+    
+    asyncio.run(drop_goals())
+    user_cache.clear()
+    
+    delta = _sync(client, auth_headers, since=token)
+    assert [goal["user_id"] for goal in delta["changes"]["goals"]] == [user_id]
+    assert delta["deleted"]["goals"] == []
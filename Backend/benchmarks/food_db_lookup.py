@@ -0,0 +1,65 @@
+"""
+Food database lookup benchmark.
+
+Builds the food database index from the bundled CSV into a temporary
+directory and times fuzzy lookups of exact names, aliases, misspellings
+and longer meal descriptions. Reports the matched food and the median and
+99th percentile wall time per lookup.
+
+Usage (from the Backend directory):
+    python -m benchmarks.food_db_lookup --repeat 2000
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.food_db import FOODS_CSV, FoodDatabase, build_food_db
+
+QUERIES = [
+    "apple",
+    "grilled chicken",
+    "bannana",
+    "chiken salad",
+    "spagetti bolognese",
+    "cheese burger",
+    "1 slice pepperoni pizza",
+    "large bowl of chicken salad with dressing",
+    "paneer tikka wrap with mint chutney",
+]
+
+
+def run(repeat: int) -> None:
+    path = Path(tempfile.mkdtemp(prefix="trackme-bench-")) / "foods.db"
+    started = time.perf_counter()
+    build_food_db(FOODS_CSV, path)
+    food_db = FoodDatabase(str(path))
+    food_db.open()
+    print(f"Index built and opened in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    print(f"{'query':<44}{'match':<22}{'score':>6}{'median':>10}{'p99':>10}")
+    for query in QUERIES:
+        match = food_db.match(query)
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            food_db.match(query)
+            times.append((time.perf_counter() - started) * 1e6)
+        times.sort()
+        median, p99 = statistics.median(times), times[int(len(times) * 0.99) - 1]
+        name, score = (match.name, match.score) if match else ("-", 0.0)
+        print(f"{query:<44}{name:<22}{score:>6.2f}{median:>8.0f}us{p99:>8.0f}us")
+
+    food_db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000, help="Timed lookups per query")
+    args = parser.parse_args()
+    run(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Import-time budget check for the API entry point.
+
+Imports app.main in fresh interpreters several times, reports the median
+wall time, and exits non-zero when it is over budget, so that a
+regression (an eager heavy import or import-time I/O) fails CI.
+Use `python -X importtime -c "import app.main"` to find the culprit.
+
+Usage (from the Backend directory):
+    python -m benchmarks.import_time --runs 7 --budget-ms 1500
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = (
+    "import time\n"
+    "started = time.perf_counter()\n"
+    "import {module}\n"
+    "print((time.perf_counter() - started) * 1000)\n"
+)
+
+
+def measure(module: str) -> float:
+    """Import module in a fresh interpreter and return the import time in ms."""
+    with tempfile.TemporaryDirectory(prefix="trackme-import-") as workdir:
+        env = dict(os.environ, PYTHONPATH=BACKEND_DIR)
+        result = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module)],
+            cwd=workdir,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="app.main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=7, help="Fresh interpreters to measure")
+    parser.add_argument("--budget-ms", type=float, default=1500, help="Maximum median import time")
+    args = parser.parse_args()
+    
+    # The first run warms the bytecode cache and the OS page cache
+    measure(args.module)
+    timings = [measure(args.module) for _ in range(args.runs)]
+    median = statistics.median(timings)
+    
+    print(f"import {args.module}: median {median:.0f} ms over {args.runs} runs "
+          f"(min {min(timings):.0f}, max {max(timings):.0f}, budget {args.budget_ms:.0f})")
+    if median > args.budget_ms:
+        print("Import time is over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+List response serialization benchmark.
+
+Renders large task, meal and activity lists twice: the way the list
+endpoints used to (ORM instances validated through FastAPI's response_model
+and rendered by JSONResponse) and through the fast path (Core rows, cached
+strict TypeAdapters, pydantic's JSON writer where it is byte-identical).
+Checks that both produce the same bytes and reports the median CPU time
+per response.
+
+Usage (from the Backend directory):
+    python -m benchmarks.list_serialization --rows 5000 --repeat 15
+"""
+import argparse
+import asyncio
+import gc
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+import app.models  # noqa: F401 - registers every model on Base
+from app.api.fields import fetch_rows, render_list, select_fields
+from app.db.base import Base
+from app.db.session import build_async_engine
+from app.models.activity import Activity, ActivityType
+from app.models.meal import Meal, MealType
+from app.models.task import Task
+from app.models.user import User
+from app.schemas.activity import ActivityResponse
+from app.schemas.meal import MealListResponse
+from app.schemas.task import TaskResponse
+
+CASES = [
+    ("tasks", Task, TaskResponse, Task.due_datetime),
+    ("meals", Meal, MealListResponse, Meal.datetime),
+    ("activities", Activity, ActivityResponse, Activity.datetime),
+]
+
+
+async def _seed(Session, rows: int) -> None:
+    base = datetime(2024, 1, 1, 8)
+    async with Session() as db:
+        db.add(User(id=1, name="Bench", email="bench@example.com", hashed_password="x"))
+        await db.commit()
+        for i in range(rows):
+            when = base + timedelta(minutes=37 * i)
+            db.add(Task(user_id=1, title=f"Task {i} – café", description="Notes " * 8, due_datetime=when))
+            db.add(Meal(
+                user_id=1,
+                name=f"Meal {i}",
+                meal_type=MealType.LUNCH,
+                datetime=when,
+                calories=412.5 + i % 7,
+                carbs=51.2,
+                protein=23.0,
+                fat=0.00004 * i  # exponent floats must render like the json module
+            ))
+            db.add(Activity(
+                user_id=1,
+                type=ActivityType.RUN,
+                duration_minutes=31.5,
+                distance_km=5.2,
+                datetime=when,
+                notes=None
+            ))
+        await db.commit()
+
+
+async def _baseline(Session, model, response_model, sort_column) -> bytes:
+    field = create_response_field(name="Response", type_=List[response_model], mode="serialization")
+    async with Session() as db:
+        items = (await db.scalars(select(model).where(model.user_id == 1).order_by(sort_column))).all()
+        content = await serialize_response(field=field, response_content=items)
+        return JSONResponse(content).body
+
+
+async def _fast(Session, model, response_model, sort_column) -> bytes:
+    async with Session() as db:
+        query = select_fields(model, response_model, None).where(model.user_id == 1).order_by(sort_column)
+        return render_list(await fetch_rows(db, query), response_model, None, Response()).body
+
+
+async def _cpu_ms(fn) -> float:
+    gc.collect()
+    started = time.process_time()
+    await fn()
+    return (time.process_time() - started) * 1000
+
+
+async def run(rows: int, repeat: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(prefix="trackme-bench-"), "bench.db")
+    engine = build_async_engine(f"sqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(bind=engine, expire_on_commit=False)
+    await _seed(Session, rows)
+
+    print(f"{rows} rows per response, median CPU time of {repeat} runs")
+    print(f"{'list':<12}{'baseline':>10}{'fast':>10}{'speedup':>9}{'bytes':>10}  identical")
+    for name, model, response_model, sort_column in CASES:
+        args = (Session, model, response_model, sort_column)
+        expected = await _baseline(*args)
+        actual = await _fast(*args)
+        baseline, fast = [], []
+        for _ in range(repeat):
+            baseline.append(await _cpu_ms(lambda: _baseline(*args)))
+            fast.append(await _cpu_ms(lambda: _fast(*args)))
+        b, f = statistics.median(baseline), statistics.median(fast)
+        print(f"{name:<12}{b:>8.1f}ms{f:>8.1f}ms{b / f:>8.2f}x{len(actual):>10}  {actual == expected}")
+
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000, help="Rows per list response")
+    parser.add_argument("--repeat", type=int, default=15, help="Timed runs per variant")
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Response encoding benchmark.
+
+Encodes large vitals, step summary and diet summary responses as JSON,
+msgpack and CBOR through the same paths the API uses (list endpoints encode
+straight from validated rows; the diet summary goes through FastAPI's
+response_model serialization) and reports the median CPU time per response and payload size.
+
+Usage (from the Backend directory):
+    python -m benchmarks.response_encoding --rows 5000 --repeat 15
+"""
+import argparse
+import asyncio
+import gc
+import statistics
+import time
+from datetime import date, datetime, timedelta
+from typing import List
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.api.fields import render_list
+from app.api.negotiation import CBOR, JSON, MSGPACK, RESPONSE_CLASSES, NativeResponseField
+from app.models.meal import MealType
+from app.schemas.meal import DailySummary
+from app.schemas.step_summary import StepSummaryResponse
+from app.schemas.vital import VitalResponse
+
+FORMATS = [JSON, MSGPACK, CBOR]
+
+
+def _vitals(rows: int) -> List[dict]:
+    base = datetime(2026, 1, 1)
+    return [
+        {"id": i, "user_id": 1, "type": "heart_rate", "value": 60 + i % 40 + 0.5, "unit": "bpm",
+         "recorded_at": base + timedelta(seconds=30 * i), "client_sample_id": None, "created_at": base}
+        for i in range(rows)
+    ]
+
+
+def _steps(rows: int) -> List[dict]:
+    return [
+        {"id": i, "user_id": 1, "date": date(2000, 1, 1) + timedelta(days=i), "step_count": 4000 + i % 9000,
+         "source": "healthkit"}
+        for i in range(rows)
+    ]
+
+
+def _diet_summary(rows: int) -> List[dict]:
+    base = datetime(2020, 1, 1, 12)
+    days = []
+    for day in range(rows // 4):
+        meals = [
+            {"id": 4 * day + i, "user_id": 1, "name": f"Meal {i}", "meal_type": MealType.LUNCH,
+             "datetime": base + timedelta(days=day, hours=i), "calories": 512.5, "carbs": 61.2, "protein": 23.0,
+             "fat": 14.8, "created_at": base}
+            for i in range(4)
+        ]
+        days.append({"date": (base + timedelta(days=day)).date().isoformat(), "total_calories": 2050.0,
+                     "total_carbs": 244.8, "total_protein": 92.0, "total_fat": 59.2, "meals": meals})
+    return days
+
+
+def _list_encoder(items, response_model, body_format):
+    def encode() -> bytes:
+        return render_list(items, response_model, None, Response(), body_format).body
+    return encode
+
+
+def _summary_encoder(items, body_format):
+    field = create_response_field(name="Response", type_=List[DailySummary], mode="serialization")
+    response_class = RESPONSE_CLASSES.get(body_format.name, JSONResponse)
+    if body_format.encode is not None:
+        field = NativeResponseField(field)
+
+    def encode() -> bytes:
+        return response_class(asyncio.run(serialize_response(field=field, response_content=items))).body
+    return encode
+
+
+def _cpu_ms(fn) -> float:
+    gc.collect()
+    started = time.process_time()
+    fn()
+    return (time.process_time() - started) * 1000
+
+
+def run(rows: int, repeat: int) -> None:
+    cases = [
+        ("vitals", lambda body_format: _list_encoder(_vitals(rows), VitalResponse, body_format)),
+        ("steps", lambda body_format: _list_encoder(_steps(rows), StepSummaryResponse, body_format)),
+        ("diet summary", lambda body_format: _summary_encoder(_diet_summary(rows), body_format)),
+    ]
+
+    print(f"{rows} rows per response, median CPU time of {repeat} runs")
+    print(f"{'response':<14}{'format':<9}{'encode':>10}{'bytes':>10}{'vs json':>9}")
+    for name, encoder in cases:
+        json_size = None
+        for body_format in FORMATS:
+            encode = encoder(body_format)
+            size = len(encode())
+            json_size = json_size or size
+            ms = statistics.median(_cpu_ms(encode) for _ in range(repeat))
+            print(f"{name:<14}{body_format.name:<9}{ms:>8.1f}ms{size:>10}{size / json_size:>8.0%}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000, help="Rows per response")
+    parser.add_argument("--repeat", type=int, default=15, help="Timed runs per format")
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
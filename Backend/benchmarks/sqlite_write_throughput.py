@@ -0,0 +1,145 @@
+"""
+SQLite write-throughput benchmark for the production profile.
+
+Runs several writer processes (each committing one meal or step row per
+transaction, like POST /diet/meals and POST /health/steps) alongside a
+reader process, first against the plain engine and then with the
+production profile applied, and reports committed rows per second and
+"database is locked" failures.
+
+Usage (from the Backend directory):
+    python -m benchmarks.sqlite_write_throughput --writers 4 --rows 500
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401 - registers every model on Base
+from app.db.base import Base
+from app.db.session import build_engine
+from app.models.meal import Meal, MealType
+from app.models.step_summary import StepSummary
+from app.models.user import User
+
+
+def _make_engine(url: str, profile: bool):
+    if profile:
+        return build_engine(url, sqlite_production_profile=True)
+    # The engine configuration before the production profile existed
+    return create_engine(url, connect_args={"check_same_thread": False})
+
+
+def _writer(url: str, profile: bool, worker: int, rows: int, results) -> None:
+    Session = sessionmaker(bind=_make_engine(url, profile))
+    committed = 0
+    locked = 0
+    for i in range(rows):
+        db = Session()
+        try:
+            if i % 2:
+                db.add(StepSummary(
+                    user_id=1,
+                    date=date(2000, 1, 1) + timedelta(days=worker * rows + i),
+                    step_count=i
+                ))
+            else:
+                db.add(Meal(
+                    user_id=1,
+                    name=f"meal {worker}-{i}",
+                    meal_type=MealType.SNACK,
+                    datetime=datetime.utcnow(),
+                    calories=100
+                ))
+            db.commit()
+            committed += 1
+        except OperationalError:
+            db.rollback()
+            locked += 1
+        finally:
+            db.close()
+    results.put(("write", committed, locked))
+
+
+def _reader(url: str, profile: bool, stop, results) -> None:
+    Session = sessionmaker(bind=_make_engine(url, profile))
+    reads = 0
+    locked = 0
+    while not stop.is_set():
+        db = Session()
+        try:
+            db.execute(select(func.sum(Meal.calories)).where(Meal.user_id == 1)).scalar()
+            reads += 1
+        except OperationalError:
+            locked += 1
+        finally:
+            db.close()
+    results.put(("read", reads, locked))
+
+
+def run(profile: bool, writers: int, rows: int) -> dict:
+    path = os.path.join(tempfile.mkdtemp(prefix="trackme-bench-"), "bench.db")
+    url = f"sqlite:///{path}"
+    setup_engine = _make_engine(url, profile)
+    Base.metadata.create_all(bind=setup_engine)
+    with sessionmaker(bind=setup_engine)() as db:
+        db.add(User(id=1, name="Bench", email="bench@example.com", hashed_password="x"))
+        db.commit()
+    setup_engine.dispose()
+
+    results = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    reader = multiprocessing.Process(target=_reader, args=(url, profile, stop, results))
+    workers = [
+        multiprocessing.Process(target=_writer, args=(url, profile, n, rows, results))
+        for n in range(writers)
+    ]
+
+    reader.start()
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    reader.join()
+
+    summary = {"committed": 0, "write_locked": 0, "reads": 0, "read_locked": 0}
+    for _ in range(writers + 1):
+        kind, count, locked = results.get()
+        if kind == "write":
+            summary["committed"] += count
+            summary["write_locked"] += locked
+        else:
+            summary["reads"] = count
+            summary["read_locked"] = locked
+    summary["elapsed"] = elapsed
+    summary["rows_per_second"] = summary["committed"] / elapsed
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4, help="Concurrent writer processes")
+    parser.add_argument("--rows", type=int, default=500, help="Rows committed per writer")
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers x {args.rows} rows, 1 concurrent reader")
+    print(f"{'profile':<12}{'rows/s':>10}{'committed':>11}{'locked':>8}{'reads':>8}{'elapsed':>9}")
+    for name, profile in (("default", False), ("production", True)):
+        r = run(profile, args.writers, args.rows)
+        print(
+            f"{name:<12}{r['rows_per_second']:>10.0f}{r['committed']:>11}"
+            f"{r['write_locked'] + r['read_locked']:>8}{r['reads']:>8}{r['elapsed']:>8.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
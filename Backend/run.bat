@@ -12,7 +12,7 @@ REM Activate virtual environment
 call venv\Scripts\activate.bat
 
 REM Install dependencies
-pip install -q fastapi uvicorn[standard] sqlalchemy alembic python-jose[cryptography] passlib[bcrypt] python-multipart pydantic pydantic-settings python-dotenv httpx pytest pytest-asyncio email-validator
+pip install -q fastapi uvicorn[standard] sqlalchemy alembic aiosqlite python-jose[cryptography] passlib[bcrypt] python-multipart pydantic pydantic-settings python-dotenv httpx msgpack cbor2 pytest pytest-asyncio email-validator
 
 REM Create .env if it doesn't exist
 if not exist ".env" (
@@ -31,6 +31,12 @@ if not exist ".env" (
     echo Created .env file
 )
 
+REM Apply database migrations
+alembic upgrade head
+
+REM Build the food database index
+python -m app.commands.build_food_db
+
 echo Starting backend...
 echo API: http://localhost:8000/docs
 echo.
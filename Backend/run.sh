@@ -12,9 +12,9 @@ fi
 source venv/bin/activate
 
 # Install dependencies if needed
-if ! python -c "import fastapi" 2>/dev/null; then
+if ! python -c "import fastapi, msgpack, cbor2" 2>/dev/null; then
     echo "Installing dependencies..."
-    pip install -q fastapi uvicorn[standard] sqlalchemy alembic python-jose[cryptography] passlib[bcrypt] python-multipart pydantic pydantic-settings python-dotenv httpx pytest pytest-asyncio email-validator
+    pip install -q fastapi uvicorn[standard] sqlalchemy alembic aiosqlite python-jose[cryptography] passlib[bcrypt] python-multipart pydantic pydantic-settings python-dotenv httpx msgpack cbor2 pytest pytest-asyncio email-validator
 fi
 
 # Create .env if it doesn't exist
@@ -34,6 +34,12 @@ EOL
     echo "Created .env file"
 fi
 
+# Apply database migrations
+alembic upgrade head
+
+# Build the food database index
+python -m app.commands.build_food_db
+
 echo "Starting backend..."
 echo "API: http://localhost:8000/docs"
 echo ""